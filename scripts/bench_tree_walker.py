@@ -0,0 +1,93 @@
+"""Benchmark the scandir tree walker against the former pathlib walker.
+
+Usage: python scripts/bench_tree_walker.py [--files 200000] [--fanout 20]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from codebase_to_llm.domain.directory_tree import DEFAULT_IGNORES, build_tree
+
+
+def make_tree(root: Path, files: int, fanout: int) -> None:
+    """Create ``files`` small files spread over nested directories."""
+    created = 0
+    directories = [root]
+    while created < files:
+        parent = directories.pop(0)
+        for index in range(fanout):
+            if created >= files:
+                break
+            child = parent / f"dir_{index:02d}"
+            child.mkdir()
+            directories.append(child)
+            for file_index in range(fanout):
+                if created >= files:
+                    break
+                (child / f"file_{file_index:02d}.py").write_bytes(b"")
+                created += 1
+
+
+def legacy_tree(root: Path) -> str:
+    """The walker build_tree used before: iterdir, token checks, stat per call."""
+    lines: list[str] = []
+    prefix_stack: list[str] = []
+
+    def should_ignore(path: Path) -> bool:
+        for token in DEFAULT_IGNORES:
+            if token and token in path.parts:
+                return True
+        return path.is_file() and path.name.endswith(".pyc")
+
+    def walk(current: Path) -> None:
+        entries = sorted(p for p in current.iterdir() if not should_ignore(p))
+        for index, entry in enumerate(entries):
+            connector = "└── " if index == len(entries) - 1 else "├── "
+            lines.append("".join(prefix_stack) + connector + entry.name)
+            if entry.is_dir():
+                prefix_stack.append("    " if index == len(entries) - 1 else "│   ")
+                walk(entry)
+                prefix_stack.pop()
+
+    lines.append(root.name)
+    walk(root)
+    return os.linesep.join(lines)
+
+
+def best_of(runs: int, function, root: Path) -> tuple[float, str]:
+    best = float("inf")
+    output = ""
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = function(root)
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=200_000)
+    parser.add_argument("--fanout", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_tree(root, args.files, args.fanout)
+        legacy_time, legacy_output = best_of(args.runs, legacy_tree, root)
+        scandir_time, scandir_output = best_of(
+            args.runs, lambda path: build_tree(path).ok() or "", root
+        )
+
+    assert legacy_output == scandir_output, "walkers disagree"
+    print(f"files:   {args.files}")
+    print(f"legacy:  {legacy_time:.3f}s")
+    print(f"scandir: {scandir_time:.3f}s")
+    print(f"speedup: {legacy_time / scandir_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
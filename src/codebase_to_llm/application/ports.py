@@ -1,8 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any, Protocol
-from openai import Stream
+from typing import Any, Iterable, Protocol
 from pydantic import BaseModel
 from codebase_to_llm.domain.api_key import ApiKeys, ApiKey, ApiKeyId
 from codebase_to_llm.domain.user import (
@@ -19,6 +18,11 @@ from codebase_to_llm.domain.context_buffer import (
     Snippet,
 )
 from codebase_to_llm.domain.prompt import Prompt, PromptVariable
+from codebase_to_llm.domain.repository_index import (
+    IndexedFile,
+    IndexRefreshStats,
+    IndexSummary,
+)
 
 from codebase_to_llm.domain.result import Result
 from codebase_to_llm.domain.rules import Rules
@@ -54,6 +58,24 @@ class DirectoryRepositoryPort(Protocol):
     ) -> Result[str, str]: ...  # pragma: no cover
 
 
+class RepositoryIndexPort(Protocol):
+    """Persistent per-repository index of files, kept fresh incrementally."""
+
+    def refresh(self) -> Result[IndexRefreshStats, str]: ...  # pragma: no cover
+
+    def files(self) -> Result[list[IndexedFile], str]: ...  # pragma: no cover
+
+    def summary(self) -> Result[IndexSummary, str]: ...  # pragma: no cover
+
+    def search_paths(
+        self, query: str, limit: int = 50
+    ) -> Result[list[str], str]: ...  # pragma: no cover
+
+    def token_estimates(
+        self, paths: Iterable[str]
+    ) -> Result[dict[str, int], str]: ...  # pragma: no cover
+
+
 class RulesRepositoryPort(Protocol):
     """Pure port for persisting / loading the user's custom rules."""
 
@@ -96,6 +118,9 @@ class ContextBufferPort(Protocol):
     ) -> Result[None, str]: ...  # pragma: no cover
 
     def add_file(self, file: BufferFile) -> Result[None, str]: ...  # pragma: no cover
+    def add_files(
+        self, files: list[BufferFile]
+    ) -> Result[int, str]: ...  # pragma: no cover
     def remove_file(self, path: Path) -> Result[None, str]: ...  # pragma: no cover
 
     def add_snippet(
@@ -189,7 +214,11 @@ class EmailSenderPort(Protocol):
 
 
 class LLMAdapterPort(Protocol):
-    """Pure port for LLM adapters."""
+    """Pure port for LLM adapters.
+
+    ``generate_response`` streams provider events for ``cacheable_prefix +
+    prompt``; the prefix is marked for the provider's prompt cache.
+    """
 
     def generate_response(
         self,
@@ -197,7 +226,8 @@ class LLMAdapterPort(Protocol):
         model: str,
         api_key: ApiKey,
         previous_response_id: str | None = None,
-    ) -> Result[Stream[Any], str]: ...  # pragma: no cover
+        cacheable_prefix: str = "",
+    ) -> Result[Iterable[Any], str]: ...  # pragma: no cover
 
     def structured_output(
         self,
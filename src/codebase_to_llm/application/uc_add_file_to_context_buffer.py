@@ -3,22 +3,56 @@ from pathlib import Path
 
 from codebase_to_llm.application.ports import ContextBufferPort
 from codebase_to_llm.domain.context_buffer import File
+from codebase_to_llm.domain.ingestion_policy import (
+    DEFAULT_INGESTION_POLICY,
+    IngestionDecision,
+    IngestionPolicy,
+)
 from codebase_to_llm.domain.result import Err, Ok, Result
 
 
 @dataclass
 class AddFileToContextBufferUseCase:
-    def __init__(self, context_buffer: ContextBufferPort):
+    def __init__(
+        self,
+        context_buffer: ContextBufferPort,
+        policy: IngestionPolicy = DEFAULT_INGESTION_POLICY,
+    ):
         self._context_buffer = context_buffer
+        self._policy = policy
 
-    def execute(self, path: Path) -> Result[None, str]:
-        file_result = File.try_from_path(path)
-        if file_result.is_err():
-            return Err(file_result.err() or "Unknown error")
-        file = file_result.ok()
+    def execute(self, path: Path) -> Result[IngestionDecision, str]:
+        ingest_result = self._policy.ingest(path)
+        if ingest_result.is_err():
+            return Err(ingest_result.err() or "Unknown error")
+        ingested = ingest_result.ok()
+        assert ingested is not None
+        decision, file = ingested
         if file is None:
-            return Err("File creation failed")
+            return Ok(decision)
         result = self._context_buffer.add_file(file)
         if result.is_err():
             return Err(result.err() or "Unknown error")
-        return Ok(None)
+        return Ok(decision)
+
+    def execute_many(self, paths: list[Path]) -> Result[list[IngestionDecision], str]:
+        """Add ``paths`` in one call and report what was done with each.
+
+        Unreadable paths are left out of the report; skipped files are
+        reported but not added.
+        """
+        decisions: list[IngestionDecision] = []
+        files: list[File] = []
+        for path in paths:
+            ingest_result = self._policy.ingest(path)
+            ingested = ingest_result.ok()
+            if ingested is None:
+                continue
+            decision, file = ingested
+            decisions.append(decision)
+            if file is not None:
+                files.append(file)
+        result = self._context_buffer.add_files(files)
+        if result.is_err():
+            return Err(result.err() or "Unknown error")
+        return Ok(decisions)
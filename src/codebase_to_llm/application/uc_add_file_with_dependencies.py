@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from codebase_to_llm.application.ports import ContextBufferPort
+from codebase_to_llm.application.uc_add_file_to_context_buffer import (
+    AddFileToContextBufferUseCase,
+)
+from codebase_to_llm.domain.import_graph import ImportGraph
+from codebase_to_llm.domain.ingestion_policy import (
+    DEFAULT_INGESTION_POLICY,
+    IngestionDecision,
+    IngestionPolicy,
+)
+from codebase_to_llm.domain.result import Err, Result
+
+
+class AddFileWithDependenciesUseCase:
+    """Add a file and the local files it imports, nearest first."""
+
+    __slots__ = ("_add_files",)
+
+    def __init__(
+        self,
+        context_buffer: ContextBufferPort,
+        policy: IngestionPolicy = DEFAULT_INGESTION_POLICY,
+    ):
+        self._add_files = AddFileToContextBufferUseCase(context_buffer, policy)
+
+    def execute(
+        self,
+        graph: ImportGraph,
+        path: Path,
+        max_depth: int | None = 2,
+        token_budget: int | None = None,
+    ) -> Result[list[IngestionDecision], str]:
+        dependencies = graph.dependencies(path, max_depth, token_budget)
+        if dependencies.is_err():
+            return Err(dependencies.err() or "Unknown error")
+        return self._add_files.execute_many([path, *(dependencies.ok() or [])])
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 from pathlib import Path
 
 from codebase_to_llm.application.ports import PromptRepositoryPort
+from codebase_to_llm.domain.file_cache import read_text_file
 from codebase_to_llm.domain.prompt import Prompt
 from codebase_to_llm.domain.result import Err, Ok, Result
 
@@ -15,10 +16,10 @@ class AddPromptFromFileUseCase:
     _prompt_repo: PromptRepositoryPort
 
     def execute(self, path: Path) -> Result[Prompt, str]:
-        try:
-            text = path.read_text(encoding="utf-8", errors="ignore")
-        except Exception as exc:  # noqa: BLE001
-            return Err(str(exc))
+        text_result = read_text_file(path)
+        if text_result.is_err():
+            return Err(text_result.err() or "Could not read file")
+        text = text_result.ok() or ""
 
         prompt_result = Prompt.try_create(text)
         if prompt_result.is_err():
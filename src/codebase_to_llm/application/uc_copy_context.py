@@ -1,11 +1,31 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
+from functools import partial
+from itertools import chain
+from operator import itemgetter
 import os
 from pathlib import Path
-from typing import List, final
+from typing import Callable, Iterable, Iterator, Mapping, final
 
 
+from codebase_to_llm.domain.context_buffer import ExternalSource, File, Snippet
+from codebase_to_llm.domain.context_compaction import (
+    DEFAULT_COMPACTION_CACHE,
+    CompactionOptions,
+    CompactionReport,
+    compaction_report,
+    duplicate_pointer,
+)
+from codebase_to_llm.domain.context_layout import ContextLayout, changed_since_added
+from codebase_to_llm.domain.context_overlap import OverlapReport, remove_overlaps
+from codebase_to_llm.domain.context_packing import (
+    DEFAULT_TOKEN_ESTIMATOR,
+    ContextPackingReport,
+    PackingCandidate,
+    PackingContent,
+    pack_candidates,
+)
 from codebase_to_llm.domain.prompt import Prompt
 from codebase_to_llm.domain.result import Err, Ok, Result
 
@@ -18,103 +38,623 @@ from .ports import (
 )
 
 
-def get_full_context(
+def _display_path(path: Path, root_directory_path: str | None) -> Path:
+    if root_directory_path is None:
+        return path
+    try:
+        return path.relative_to(Path(root_directory_path))
+    except ValueError:
+        return path
+
+
+def _join_lines(parts: Iterable[str]) -> Iterator[str]:
+    """Yield ``parts`` separated by ``os.linesep`` without concatenating them."""
+    first = True
+    for part in parts:
+        if not first:
+            yield os.linesep
+        first = False
+        yield part
+
+
+@final
+@dataclass(frozen=True)
+class _ContextSources:
+    """Everything that goes into the context, with fallible lookups resolved."""
+
+    tree_text: str | None
+    files: list[File]
+    snippets: list[Snippet]
+    external_sources: list[ExternalSource]
+    rules_contents: list[str]
+    user_request: str | None
+    root_directory_path: str | None
+    # Files edited since they were added; only computed for cache_stable.
+    volatile_paths: frozenset[Path] = frozenset()
+    # Lazy stand-ins for file bodies (compacted text), rendered in place of
+    # the file's own content.
+    file_bodies: Mapping[Path, Callable[[], str]] = field(default_factory=dict)
+
+
+def _external_source_label(external_source: ExternalSource) -> str:
+    if external_source.is_youtube_transcript:
+        return f"video_transcript for {external_source.url}"
+    return external_source.url
+
+
+def _block(opening: str, body: str, closing: str) -> str:
+    return os.linesep.join((opening, body, closing))
+
+
+def _file_body(sources: _ContextSources, file_: File) -> str:
+    body = sources.file_bodies.get(file_.path)
+    return file_.content if body is None else body()
+
+
+def _render_file(sources: _ContextSources, file_: File, rel_path: Path) -> str:
+    # Referenced files are read here, one at a time, so the text is fresh
+    # and only the file being emitted is held in memory.
+    return _block(f"<{rel_path}>", _file_body(sources, file_), f"</{rel_path}>")
+
+
+_Block = Callable[[], str]
+
+
+def _layout_blocks(
+    sources: _ContextSources, layout: ContextLayout
+) -> tuple[list[_Block], list[_Block]]:
+    """Split the context into a stable prefix and a volatile tail of lazy blocks.
+
+    The default layout keeps the historical order and puts everything in the
+    tail. ``cache_stable`` emits rules, tree, unchanged files (by path) and
+    external sources (by URL) first; snippets, changed files and the user
+    request follow, so edits only invalidate the end of the prompt.
+    """
+
+    root_directory_path = sources.root_directory_path
+    tree_blocks: list[_Block] = []
+    if sources.tree_text is not None:
+        tree_blocks.append(
+            partial(_block, "<tree_structure>", sources.tree_text, "</tree_structure>")
+        )
+
+    file_blocks: list[tuple[str, bool, _Block]] = []
+    for file_ in sources.files:
+        rel_path = _display_path(file_.path, root_directory_path)
+        file_blocks.append(
+            (
+                str(rel_path),
+                file_.path in sources.volatile_paths,
+                partial(_render_file, sources, file_, rel_path),
+            )
+        )
+
+    snippet_blocks: list[tuple[tuple[str, int, int], _Block]] = []
+    for snippet in sources.snippets:
+        rel_path = _display_path(snippet.path, root_directory_path)
+        label = f"{rel_path}:{snippet.start}:{snippet.end}"
+        snippet_blocks.append(
+            (
+                (str(rel_path), snippet.start, snippet.end),
+                partial(_block, f"<{label}>", snippet.content, f"</{label}>"),
+            )
+        )
+
+    external_blocks: list[tuple[str, _Block]] = []
+    for external_source in sources.external_sources:
+        label = _external_source_label(external_source)
+        external_blocks.append(
+            (
+                external_source.url,
+                partial(_block, f"<{label}>", external_source.content, f"</{label}>"),
+            )
+        )
+
+    rules_blocks: list[_Block] = []
+    if sources.rules_contents:
+        rules_blocks.append(
+            partial(
+                os.linesep.join,
+                ("<rules_to_follow>", *sources.rules_contents, "</rules_to_follow>"),
+            )
+        )
+
+    # The prompt is what changes between copies; it is cheap to render anew.
+    request_blocks: list[_Block] = []
+    if sources.user_request is not None:
+        request_blocks.append(
+            partial(_block, "<user_request>", sources.user_request, "</user_request>")
+        )
+
+    if layout == "default":
+        return [], [
+            *tree_blocks,
+            *(block for _, _, block in file_blocks),
+            *(block for _, block in snippet_blocks),
+            *(block for _, block in external_blocks),
+            *rules_blocks,
+            *request_blocks,
+        ]
+
+    by_key = itemgetter(0)
+    file_blocks.sort(key=by_key)
+    stable = [
+        *rules_blocks,
+        *tree_blocks,
+        *(block for _, volatile, block in file_blocks if not volatile),
+        *(block for _, block in sorted(external_blocks, key=by_key)),
+    ]
+    volatile = [
+        *(block for _, block in sorted(snippet_blocks, key=by_key)),
+        *(block for _, volatile, block in file_blocks if volatile),
+        *request_blocks,
+    ]
+    return stable, volatile
+
+
+def _iter_blocks(
+    sources: _ContextSources, layout: ContextLayout = "default"
+) -> Iterator[str]:
+    """Yield one rendered block per context item."""
+    stable, volatile = _layout_blocks(sources, layout)
+    for render in chain(stable, volatile):
+        yield render()
+
+
+def _render_sections(sources: _ContextSources) -> tuple[str, str]:
+    """Render the cache-stable layout as ``(prefix, tail)``; joined they are the context."""
+    stable, volatile = _layout_blocks(sources, "cache_stable")
+    prefix = "".join(_join_lines(render() for render in stable))
+    tail = "".join(_join_lines(render() for render in volatile))
+    if prefix and tail:
+        prefix += os.linesep
+    return prefix, tail
+
+
+def _with_layout(sources: _ContextSources, layout: ContextLayout) -> _ContextSources:
+    if layout == "default":
+        return sources
+    volatile_paths = frozenset(
+        file_.path for file_ in sources.files if changed_since_added(file_)
+    )
+    return replace(sources, volatile_paths=volatile_paths)
+
+
+def _collect_sources(
     repo: DirectoryRepositoryPort,
     prompt_repo: PromptRepositoryPort,
     context_buffer: ContextBufferPort,
     rules_repo: RulesRepositoryPort,
-    include_tree: bool = False,
-    root_directory_path: str | None = None,
-) -> Result[str, str]:
-
-    parts: List[str] = []
-
+    include_tree: bool,
+    root_directory_path: str | None,
+) -> Result[_ContextSources, str]:
+    tree_text: str | None = None
     if include_tree:
         tree_result = repo.build_tree()
         if tree_result.is_err():
             return Err(tree_result.err() or "Error building tree")
+        tree_text = tree_result.ok() or ""
 
-        parts.extend(
-            [
-                "<tree_structure>",
-                tree_result.ok() or "",
-                "</tree_structure>",
-            ]
-        )
-
-    for file_ in context_buffer.get_files():
-        if root_directory_path is not None:
-            root_path = Path(root_directory_path)
-            try:
-                rel_path = file_.path.relative_to(root_path)
-            except ValueError:
-                rel_path = file_.path
-        else:
-            rel_path = file_.path
-        tag = f"<{rel_path}>"
-        parts.append(tag)
-        parts.append(file_.content)
-        parts.append(f"</{rel_path}>")
-
-    if context_buffer.get_snippets():
-        for snippet in context_buffer.get_snippets():
-            if root_directory_path is not None:
-                root_path = Path(root_directory_path)
-                try:
-                    rel_path = snippet.path.relative_to(root_path)
-                except ValueError:
-                    rel_path = snippet.path
-            else:
-                rel_path = snippet.path
-            tag = f"<{rel_path}:{snippet.start}:{snippet.end}>"
-            parts.append(tag)
-            parts.append(snippet.content)
-            parts.append(f"</{rel_path}:{snippet.start}:{snippet.end}>")
-    if context_buffer.get_external_sources():
-        for external_source in context_buffer.get_external_sources():
-            if external_source.is_youtube_transcript:
-                tag = f"<video_transcript for {external_source.url}>"
-                parts.append(tag)
-                parts.append(external_source.content)
-                parts.append(f"</video_transcript for {external_source.url}>")
-            else:
-                tag = f"<{external_source.url}>"
-                parts.append(tag)
-                parts.append(external_source.content)
-                parts.append(f"</{external_source.url}>")
-
+    rules_contents: list[str] = []
     rules_result = rules_repo.load_rules()
     if rules_result.is_ok():
         rules_val = rules_result.ok()
         assert rules_val is not None
-        if (
-            rules_val.rules()
-            and len(list(filter(lambda x: x.enabled(), rules_val.rules()))) > 0
-        ):
-            parts.append("<rules_to_follow>")
-            for rule in rules_val.rules():
-                if rule.enabled():
-                    parts.append(rule.content())
-            parts.append("</rules_to_follow>")
-
-    if prompt_repo.get_prompt().is_ok():
-        user_prompt: Prompt | None = prompt_repo.get_prompt().ok()
-
-        if user_prompt is not None:
-            user_prompt_full_text_result: Result[str, str] = user_prompt.full_text()
-            if user_prompt_full_text_result.is_ok():
-                parts.append("<user_request>")
-                parts.append(user_prompt_full_text_result.ok() or "")
-                parts.append("</user_request>")
-            else:
-                return Err(
-                    user_prompt_full_text_result.err()
-                    or "Error getting prompt full text"
+        rules_contents = [
+            rule.content() for rule in rules_val.rules() if rule.enabled()
+        ]
+
+    prompt_result = prompt_repo.get_prompt()
+    if prompt_result.is_err():
+        return Err(prompt_result.err() or "Error getting prompt")
+    user_prompt: Prompt | None = prompt_result.ok()
+    user_request: str | None = None
+    if user_prompt is not None:
+        user_prompt_full_text_result: Result[str, str] = user_prompt.full_text()
+        if user_prompt_full_text_result.is_err():
+            return Err(
+                user_prompt_full_text_result.err() or "Error getting prompt full text"
+            )
+        user_request = user_prompt_full_text_result.ok() or ""
+
+    return Ok(
+        _ContextSources(
+            tree_text=tree_text,
+            files=list(context_buffer.get_files()),
+            snippets=list(context_buffer.get_snippets()),
+            external_sources=list(context_buffer.get_external_sources()),
+            rules_contents=rules_contents,
+            user_request=user_request,
+            root_directory_path=root_directory_path,
+        )
+    )
+
+
+def _without_overlaps(sources: _ContextSources) -> _ContextSources:
+    snippets, _ = remove_overlaps(
+        [file_.path for file_ in sources.files], sources.snippets
+    )
+    return replace(sources, snippets=snippets)
+
+
+def _packed_text(content: PackingContent) -> str:
+    return content if isinstance(content, str) else content()
+
+
+def _pack_sources(
+    sources: _ContextSources, token_budget: int
+) -> Result[tuple[_ContextSources, ContextPackingReport], str]:
+    root = sources.root_directory_path
+    # Merging touching ranges is always safe; dropping snippets covered by a
+    # file has to wait until we know the file is not truncated.
+    merged_snippets, _ = remove_overlaps([], sources.snippets)
+    sources = replace(sources, snippets=merged_snippets)
+    candidates: list[PackingCandidate] = []
+    if sources.tree_text is not None:
+        candidates.append(PackingCandidate("tree", "tree_structure", sources.tree_text))
+    for file_ in sources.files:
+        # Size each file as we go and let the text go again: only files that
+        # end up truncated are read a second time, by the packer.
+        candidates.append(
+            PackingCandidate(
+                "file",
+                str(_display_path(file_.path, root)),
+                partial(_file_body, sources, file_),
+                DEFAULT_TOKEN_ESTIMATOR.estimate(_file_body(sources, file_)),
+            )
+        )
+    for snippet in sources.snippets:
+        label = f"{_display_path(snippet.path, root)}:{snippet.start}:{snippet.end}"
+        candidates.append(PackingCandidate("snippet", label, snippet.content))
+    for external_source in sources.external_sources:
+        candidates.append(
+            PackingCandidate(
+                "external_source",
+                _external_source_label(external_source),
+                external_source.content,
+            )
+        )
+
+    reserved_parts = list(sources.rules_contents)
+    if sources.rules_contents:
+        reserved_parts.append("<rules_to_follow></rules_to_follow>")
+    if sources.user_request is not None:
+        reserved_parts.append(sources.user_request)
+        reserved_parts.append("<user_request></user_request>")
+    reserved_tokens = sum(
+        DEFAULT_TOKEN_ESTIMATOR.estimate(part) for part in reserved_parts
+    )
+
+    packing_result = pack_candidates(candidates, token_budget, reserved_tokens)
+    if packing_result.is_err():
+        return Err(packing_result.err() or "Error packing context")
+    packing = packing_result.ok()
+    assert packing is not None
+    packed_contents, report = packing
+
+    contents = zip(packed_contents, report.decisions)
+    tree_text: str | None = None
+    if sources.tree_text is not None:
+        content, _ = next(contents)
+        if content is not None:
+            tree_text = _packed_text(content)
+    files: list[File] = []
+    whole_files: list[Path] = []
+    file_bodies = dict(sources.file_bodies)
+    for file_ in sources.files:
+        content, decision = next(contents)
+        if decision.status == "kept":
+            # Kept files stay references and are read again when rendered.
+            files.append(file_)
+            whole_files.append(file_.path)
+        elif content is not None:
+            files.append(File(file_.path, _packed_text(content)))
+            # The truncated copy is already compacted.
+            file_bodies.pop(file_.path, None)
+    snippets: list[Snippet] = []
+    for snippet in sources.snippets:
+        content, _ = next(contents)
+        if content is not None:
+            snippets.append(
+                Snippet(snippet.path, snippet.start, snippet.end, _packed_text(content))
+            )
+    snippets, _ = remove_overlaps(whole_files, snippets)
+    external_sources: list[ExternalSource] = []
+    for external_source in sources.external_sources:
+        content, _ = next(contents)
+        if content is not None:
+            external_sources.append(
+                ExternalSource(
+                    external_source.url,
+                    _packed_text(content),
+                    external_source.is_youtube_transcript,
                 )
-    else:
-        return Err(prompt_repo.get_prompt().err() or "Error getting prompt")
+            )
+
+    packed_sources = _ContextSources(
+        tree_text=tree_text,
+        files=files,
+        snippets=snippets,
+        external_sources=external_sources,
+        rules_contents=sources.rules_contents,
+        user_request=sources.user_request,
+        root_directory_path=root,
+        volatile_paths=sources.volatile_paths,
+        file_bodies=file_bodies,
+    )
+    return Ok((packed_sources, report))
+
+
+def _compacted_text(file_: File, label: str, options: CompactionOptions) -> str:
+    return DEFAULT_COMPACTION_CACHE.compact(file_.content, label, options)
+
+
+def _compact_sources(
+    sources: _ContextSources, options: CompactionOptions
+) -> tuple[_ContextSources, CompactionReport]:
+    """Size the compacted files now; compact again as each block is rendered.
+
+    The compaction cache makes the second pass cheap, and no compacted body
+    outlives the block it goes into.
+    """
+    root = sources.root_directory_path
+    labels = [str(_display_path(file_.path, root)) for file_ in sources.files]
+    report = compaction_report(
+        ((label, file_.content) for file_, label in zip(sources.files, labels)),
+        options,
+    )
+    file_bodies: dict[Path, Callable[[], str]] = {}
+    for file_, label, item in zip(sources.files, labels, report.items):
+        if item.duplicate_of is not None:
+            file_bodies[file_.path] = partial(duplicate_pointer, item.duplicate_of)
+        else:
+            file_bodies[file_.path] = partial(_compacted_text, file_, label, options)
+    return replace(sources, file_bodies=file_bodies), report
+
+
+def iter_full_context(
+    repo: DirectoryRepositoryPort,
+    prompt_repo: PromptRepositoryPort,
+    context_buffer: ContextBufferPort,
+    rules_repo: RulesRepositoryPort,
+    include_tree: bool = False,
+    root_directory_path: str | None = None,
+    layout: ContextLayout = "default",
+) -> Result[Iterator[str], str]:
+    """Return the full context as a lazy stream of text fragments.
+
+    Every fallible step (tree, prompt variables) is resolved before the
+    iterator is handed out, so consumers never see a half-rendered context.
+    Concatenating the fragments gives exactly the text of :func:`get_full_context`.
+    ``layout`` picks the block order (see :func:`_layout_blocks`).
+    """
+    sources_result = _collect_sources(
+        repo,
+        prompt_repo,
+        context_buffer,
+        rules_repo,
+        include_tree,
+        root_directory_path,
+    )
+    if sources_result.is_err():
+        return Err(sources_result.err() or "Error getting full context")
+    sources = sources_result.ok()
+    assert sources is not None
+    sources = _with_layout(_without_overlaps(sources), layout)
+    return Ok(_join_lines(_iter_blocks(sources, layout)))
+
+
+def full_context_sections(
+    repo: DirectoryRepositoryPort,
+    prompt_repo: PromptRepositoryPort,
+    context_buffer: ContextBufferPort,
+    rules_repo: RulesRepositoryPort,
+    include_tree: bool = False,
+    root_directory_path: str | None = None,
+) -> Result[tuple[str, str], str]:
+    """Render the whole context in the cache-stable layout as ``(prefix, tail)``.
 
-    return Ok(os.linesep.join(parts))
+    The unpacked counterpart of :func:`packed_context_sections`.
+    """
+    sources_result = _collect_sources(
+        repo,
+        prompt_repo,
+        context_buffer,
+        rules_repo,
+        include_tree,
+        root_directory_path,
+    )
+    if sources_result.is_err():
+        return Err(sources_result.err() or "Error getting full context")
+    sources = sources_result.ok()
+    assert sources is not None
+    sources = _with_layout(_without_overlaps(sources), "cache_stable")
+    return Ok(_render_sections(sources))
+
+
+def _collect_packed_sources(
+    repo: DirectoryRepositoryPort,
+    prompt_repo: PromptRepositoryPort,
+    context_buffer: ContextBufferPort,
+    rules_repo: RulesRepositoryPort,
+    token_budget: int,
+    include_tree: bool,
+    root_directory_path: str | None,
+    compaction: CompactionOptions | None,
+    layout: ContextLayout,
+) -> Result[tuple[_ContextSources, ContextPackingReport], str]:
+    sources_result = _collect_sources(
+        repo,
+        prompt_repo,
+        context_buffer,
+        rules_repo,
+        include_tree,
+        root_directory_path,
+    )
+    if sources_result.is_err():
+        return Err(sources_result.err() or "Error getting full context")
+    sources = sources_result.ok()
+    assert sources is not None
+    # Packing turns truncated files into inline copies, so look at disk first.
+    sources = _with_layout(sources, layout)
+    if compaction is not None:
+        sources, _ = _compact_sources(sources, compaction)
+    return _pack_sources(sources, token_budget)
+
+
+def iter_packed_context(
+    repo: DirectoryRepositoryPort,
+    prompt_repo: PromptRepositoryPort,
+    context_buffer: ContextBufferPort,
+    rules_repo: RulesRepositoryPort,
+    token_budget: int,
+    include_tree: bool = False,
+    root_directory_path: str | None = None,
+    compaction: CompactionOptions | None = None,
+    layout: ContextLayout = "default",
+) -> Result[tuple[Iterator[str], ContextPackingReport], str]:
+    """Like :func:`iter_full_context`, but fitted into ``token_budget`` tokens.
+
+    Rules and the user request are always kept; buffer items and the tree are
+    kept, truncated or dropped, and the report says which. With
+    ``compaction`` the files are compacted before packing.
+    """
+    packed_result = _collect_packed_sources(
+        repo,
+        prompt_repo,
+        context_buffer,
+        rules_repo,
+        token_budget,
+        include_tree,
+        root_directory_path,
+        compaction,
+        layout,
+    )
+    if packed_result.is_err():
+        return Err(packed_result.err() or "Error packing context")
+    packed = packed_result.ok()
+    assert packed is not None
+    packed_sources, report = packed
+    return Ok((_join_lines(_iter_blocks(packed_sources, layout)), report))
+
+
+def packed_context_sections(
+    repo: DirectoryRepositoryPort,
+    prompt_repo: PromptRepositoryPort,
+    context_buffer: ContextBufferPort,
+    rules_repo: RulesRepositoryPort,
+    token_budget: int,
+    include_tree: bool = False,
+    root_directory_path: str | None = None,
+    compaction: CompactionOptions | None = None,
+) -> Result[tuple[str, str, ContextPackingReport], str]:
+    """Pack the context in the cache-stable layout, split as ``(prefix, tail)``.
+
+    ``prefix + tail`` is the text :func:`iter_packed_context` gives for that
+    layout; the prefix is what a provider cache breakpoint should cover.
+    """
+    packed_result = _collect_packed_sources(
+        repo,
+        prompt_repo,
+        context_buffer,
+        rules_repo,
+        token_budget,
+        include_tree,
+        root_directory_path,
+        compaction,
+        "cache_stable",
+    )
+    if packed_result.is_err():
+        return Err(packed_result.err() or "Error packing context")
+    packed = packed_result.ok()
+    assert packed is not None
+    packed_sources, report = packed
+    prefix, tail = _render_sections(packed_sources)
+    return Ok((prefix, tail, report))
+
+
+def iter_compacted_context(
+    repo: DirectoryRepositoryPort,
+    prompt_repo: PromptRepositoryPort,
+    context_buffer: ContextBufferPort,
+    rules_repo: RulesRepositoryPort,
+    options: CompactionOptions,
+    include_tree: bool = False,
+    root_directory_path: str | None = None,
+    layout: ContextLayout = "default",
+) -> Result[tuple[Iterator[str], CompactionReport], str]:
+    """Like :func:`iter_full_context`, with file bodies compacted per ``options``.
+
+    The report gives each file's size before and after compaction.
+    """
+    sources_result = _collect_sources(
+        repo,
+        prompt_repo,
+        context_buffer,
+        rules_repo,
+        include_tree,
+        root_directory_path,
+    )
+    if sources_result.is_err():
+        return Err(sources_result.err() or "Error getting full context")
+    sources = sources_result.ok()
+    assert sources is not None
+    sources = _with_layout(_without_overlaps(sources), layout)
+    compacted_sources, report = _compact_sources(sources, options)
+    return Ok((_join_lines(_iter_blocks(compacted_sources, layout)), report))
+
+
+def context_overlap_report(context_buffer: ContextBufferPort) -> OverlapReport:
+    """Say how many snippets rendering folds away and how many bytes it saves."""
+    _, report = remove_overlaps(
+        [file_.path for file_ in context_buffer.get_files()],
+        context_buffer.get_snippets(),
+    )
+    return report
+
+
+def get_full_context(
+    repo: DirectoryRepositoryPort,
+    prompt_repo: PromptRepositoryPort,
+    context_buffer: ContextBufferPort,
+    rules_repo: RulesRepositoryPort,
+    include_tree: bool = False,
+    root_directory_path: str | None = None,
+    compaction: CompactionOptions | None = None,
+    layout: ContextLayout = "default",
+) -> Result[str, str]:
+    fragments_result: Result[Iterator[str], str]
+    if compaction is None:
+        fragments_result = iter_full_context(
+            repo,
+            prompt_repo,
+            context_buffer,
+            rules_repo,
+            include_tree,
+            root_directory_path,
+            layout=layout,
+        )
+    else:
+        compacted_result = iter_compacted_context(
+            repo,
+            prompt_repo,
+            context_buffer,
+            rules_repo,
+            compaction,
+            include_tree,
+            root_directory_path,
+            layout,
+        )
+        if compacted_result.is_err():
+            return Err(compacted_result.err() or "Error getting full context")
+        compacted = compacted_result.ok()
+        assert compacted is not None
+        fragments_result = Ok(compacted[0])
+    if fragments_result.is_err():
+        return Err(fragments_result.err() or "Error getting full context")
+    fragments = fragments_result.ok()
+    assert fragments is not None
+    return Ok("".join(fragments))
 
 
 @final
@@ -138,20 +678,76 @@ class CopyContextUseCase:  # noqa: D101 (public‑API docstring not mandatory he
         include_tree: bool = True,
         root_directory_path: str | None = None,
     ) -> Result[None, str]:  # noqa: D401 (simple verb)
-        full_contxt_result: Result[str, str] = get_full_context(
+        fragments_result = self.stream(
+            repo, prompt_repo, include_tree, root_directory_path
+        )
+        if fragments_result.is_err():
+            return Err(fragments_result.err() or "Error getting full context")
+        fragments = fragments_result.ok()
+        if fragments is None:
+            return Err("Context text is None")
+        self._clipboard.set_text("".join(fragments))
+        return Ok(None)
+
+    def stream(
+        self,
+        repo: DirectoryRepositoryPort,
+        prompt_repo: PromptRepositoryPort,
+        include_tree: bool = True,
+        root_directory_path: str | None = None,
+        layout: ContextLayout = "default",
+    ) -> Result[Iterator[str], str]:
+        """Return the context fragments without touching the clipboard."""
+        return iter_full_context(
             repo,
             prompt_repo,
             self._context_buffer,
             self._rules_repo,
             include_tree,
             root_directory_path,
+            layout=layout,
+        )
+
+    def stream_within_budget(
+        self,
+        repo: DirectoryRepositoryPort,
+        prompt_repo: PromptRepositoryPort,
+        token_budget: int,
+        include_tree: bool = True,
+        root_directory_path: str | None = None,
+        compaction: CompactionOptions | None = None,
+        layout: ContextLayout = "default",
+    ) -> Result[tuple[Iterator[str], ContextPackingReport], str]:
+        """Return the context fragments packed into ``token_budget`` tokens."""
+        return iter_packed_context(
+            repo,
+            prompt_repo,
+            self._context_buffer,
+            self._rules_repo,
+            token_budget,
+            include_tree,
+            root_directory_path,
+            compaction,
+            layout,
+        )
+
+    def stream_compacted(
+        self,
+        repo: DirectoryRepositoryPort,
+        prompt_repo: PromptRepositoryPort,
+        options: CompactionOptions,
+        include_tree: bool = True,
+        root_directory_path: str | None = None,
+        layout: ContextLayout = "default",
+    ) -> Result[tuple[Iterator[str], CompactionReport], str]:
+        """Return the context fragments with compacted file bodies."""
+        return iter_compacted_context(
+            repo,
+            prompt_repo,
+            self._context_buffer,
+            self._rules_repo,
+            options,
+            include_tree,
+            root_directory_path,
+            layout,
         )
-        if full_contxt_result.is_ok():
-            context_text = full_contxt_result.ok()
-            if context_text is not None:
-                self._clipboard.set_text(context_text)
-            else:
-                return Err("Context text is None")
-        else:
-            return Err(full_contxt_result.err() or "Error getting full context")
-        return Ok(None)
@@ -1,3 +1,5 @@
+from typing import Any, Iterable
+
 from codebase_to_llm.application.ports import (
     ApiKeyRepositoryPort,
     ContextBufferPort,
@@ -7,12 +9,170 @@ from codebase_to_llm.application.ports import (
     PromptRepositoryPort,
     RulesRepositoryPort,
 )
-from codebase_to_llm.application.uc_copy_context import get_full_context
+from codebase_to_llm.application.uc_copy_context import (
+    full_context_sections,
+    iter_full_context,
+    iter_packed_context,
+    packed_context_sections,
+)
+from codebase_to_llm.domain.context_layout import ContextLayout
+from codebase_to_llm.domain.context_packing import ContextPackingReport
 from codebase_to_llm.domain.model import ModelId
-from codebase_to_llm.domain.llm import ResponseGenerated
+from codebase_to_llm.domain.llm import ResponseGenerated, TokenUsage
 from codebase_to_llm.domain.result import Err, Ok, Result
 
 
+def _count(value: Any, name: str) -> int:
+    return int(getattr(value, name, None) or 0)
+
+
+def response_text_delta(event: Any) -> str | None:
+    """Text carried by one streamed event of either provider, if any."""
+    event_type = getattr(event, "type", None)
+    if event_type == "response.output_text.delta":
+        return event.delta
+    if event_type == "content_block_delta":
+        return getattr(event.delta, "text", None)
+    choices = getattr(event, "choices", None)
+    if choices:
+        return getattr(choices[0].delta, "content", None)
+    return None
+
+
+def response_usage(event: Any) -> TokenUsage | None:
+    """Token usage reported by one streamed event, if it carries any.
+
+    Anthropic reports the prompt side on ``message_start`` and the output on
+    ``message_delta``; merge them with :func:`merge_usage`.
+    """
+    event_type = getattr(event, "type", None)
+    if event_type == "response.completed":
+        usage = getattr(event.response, "usage", None)
+        if usage is None:
+            return None
+        details = getattr(usage, "input_tokens_details", None)
+        return TokenUsage(
+            input_tokens=_count(usage, "input_tokens"),
+            output_tokens=_count(usage, "output_tokens"),
+            cached_input_tokens=_count(details, "cached_tokens"),
+        )
+    if event_type == "message_start":
+        usage = event.message.usage
+        cache_read = _count(usage, "cache_read_input_tokens")
+        cache_creation = _count(usage, "cache_creation_input_tokens")
+        return TokenUsage(
+            input_tokens=_count(usage, "input_tokens") + cache_read + cache_creation,
+            output_tokens=_count(usage, "output_tokens"),
+            cached_input_tokens=cache_read,
+            cache_creation_input_tokens=cache_creation,
+        )
+    if event_type == "message_delta":
+        return TokenUsage(output_tokens=_count(event.usage, "output_tokens"))
+    return None
+
+
+def merge_usage(current: TokenUsage | None, update: TokenUsage) -> TokenUsage:
+    if current is None:
+        return update
+    return TokenUsage(
+        input_tokens=update.input_tokens or current.input_tokens,
+        output_tokens=update.output_tokens or current.output_tokens,
+        cached_input_tokens=update.cached_input_tokens or current.cached_input_tokens,
+        cache_creation_input_tokens=update.cache_creation_input_tokens
+        or current.cache_creation_input_tokens,
+    )
+
+
+def _collect_response(events: Iterable[Any]) -> tuple[str, TokenUsage | None]:
+    parts: list[str] = []
+    usage: TokenUsage | None = None
+    for event in events:
+        text = response_text_delta(event)
+        if text:
+            parts.append(text)
+        event_usage = response_usage(event)
+        if event_usage is not None:
+            usage = merge_usage(usage, event_usage)
+    return "".join(parts), usage
+
+
+def _assemble_prompt(
+    repo: DirectoryRepositoryPort,
+    prompt_repo: PromptRepositoryPort,
+    context_buffer: ContextBufferPort,
+    rules_repo: RulesRepositoryPort,
+    include_tree: bool,
+    root_directory_path: str | None,
+    token_budget: int | None,
+    layout: ContextLayout,
+) -> Result[tuple[str, str, ContextPackingReport | None], str]:
+    """Return ``(cacheable_prefix, prompt, packing_report)`` for the request.
+
+    The context is only packed when ``token_budget`` is given; otherwise it is
+    sent whole and there is no report.
+    """
+    if token_budget is None:
+        if layout == "cache_stable":
+            sections_result = full_context_sections(
+                repo,
+                prompt_repo,
+                context_buffer,
+                rules_repo,
+                include_tree,
+                root_directory_path,
+            )
+            if sections_result.is_err():
+                return Err(sections_result.err() or "Failed to get full context")
+            sections = sections_result.ok()
+            assert sections is not None
+            prefix, tail = sections
+            return Ok((prefix, tail, None))
+        full_result = iter_full_context(
+            repo,
+            prompt_repo,
+            context_buffer,
+            rules_repo,
+            include_tree,
+            root_directory_path,
+        )
+        if full_result.is_err():
+            return Err(full_result.err() or "Failed to get full context")
+        fragments = full_result.ok()
+        assert fragments is not None
+        return Ok(("", "".join(fragments), None))
+
+    if layout == "cache_stable":
+        packed_sections_result = packed_context_sections(
+            repo,
+            prompt_repo,
+            context_buffer,
+            rules_repo,
+            token_budget,
+            include_tree,
+            root_directory_path,
+        )
+        if packed_sections_result.is_err():
+            return Err(packed_sections_result.err() or "Failed to get full context")
+        packed_sections = packed_sections_result.ok()
+        assert packed_sections is not None
+        return Ok(packed_sections)
+    packed_result = iter_packed_context(
+        repo,
+        prompt_repo,
+        context_buffer,
+        rules_repo,
+        token_budget,
+        include_tree,
+        root_directory_path,
+    )
+    if packed_result.is_err():
+        return Err(packed_result.err() or "Failed to get full context")
+    packed = packed_result.ok()
+    assert packed is not None
+    packed_fragments, report = packed
+    return Ok(("", "".join(packed_fragments), report))
+
+
 class GenerateLLMResponseUseCase:
     def __init__(self):
         pass
@@ -29,20 +189,9 @@ class GenerateLLMResponseUseCase:
         rules_repo: RulesRepositoryPort,
         include_tree: bool = True,
         root_directory_path: str | None = None,
+        token_budget: int | None = None,
+        layout: ContextLayout = "default",
     ) -> Result[ResponseGenerated, str]:
-        full_contxt_result: Result[str, str] = get_full_context(
-            repo,
-            prompt_repo,
-            context_buffer,
-            rules_repo,
-            include_tree,
-            root_directory_path,
-        )
-
-        full_context = full_contxt_result.ok()
-        if full_context is None:
-            return Err("Failed to get full context")
-
         model_result = model_repo.find_model_by_id(model_id)
         if model_result.is_err():
             return Err(model_result.err() or "Error getting model")
@@ -59,8 +208,29 @@ class GenerateLLMResponseUseCase:
         if api_key is None:
             return Err("Failed to get API key")
 
+        prompt_result = _assemble_prompt(
+            repo,
+            prompt_repo,
+            context_buffer,
+            rules_repo,
+            include_tree,
+            root_directory_path,
+            token_budget,
+            layout,
+        )
+        if prompt_result.is_err():
+            return Err(prompt_result.err() or "Failed to get full context")
+        assembled = prompt_result.ok()
+        if assembled is None:
+            return Err("Failed to get full context")
+        cacheable_prefix, prompt, packing_report = assembled
+
         generate_response_result = llm_adapter.generate_response(
-            full_context, model.name().value(), api_key, None
+            prompt,
+            model.name().value(),
+            api_key,
+            None,
+            cacheable_prefix=cacheable_prefix,
         )
 
         if generate_response_result.is_err():
@@ -70,15 +240,9 @@ class GenerateLLMResponseUseCase:
         if response_stream is None:
             return Err("Failed to get response stream")
 
-        # Convert stream to string by collecting all chunks
         try:
-            response_text = ""
-            for chunk in response_stream:
-                if hasattr(chunk, "choices") and chunk.choices:
-                    delta = chunk.choices[0].delta
-                    if hasattr(delta, "content") and delta.content:
-                        response_text += delta.content
+            response_text, usage = _collect_response(response_stream)
         except Exception as e:
             return Err(f"Error processing response stream: {e}")
 
-        return Ok(ResponseGenerated(response_text))
+        return Ok(ResponseGenerated(response_text, packing_report, usage))
@@ -0,0 +1,17 @@
+"""Use case for bringing a repository index up to date."""
+
+from __future__ import annotations
+
+from codebase_to_llm.application.ports import RepositoryIndexPort
+from codebase_to_llm.domain.repository_index import IndexRefreshStats
+from codebase_to_llm.domain.result import Result
+
+
+class RefreshRepositoryIndexUseCase:
+    """Re-reads only the files whose stat fingerprint changed since last time."""
+
+    def __init__(self, index: RepositoryIndexPort):
+        self._index = index
+
+    def execute(self) -> Result[IndexRefreshStats, str]:
+        return self._index.refresh()
@@ -14,12 +14,12 @@ class RemoveElementsFromContextBufferUseCase:  # noqa: D101
     def execute(self, context_buffer_elmts: list[str]) -> Result[None, str]:
         for elmts in context_buffer_elmts:
             if elmts.startswith("file:"):
-                self._context_buffer_port.remove_file(Path(elmts.split(":")[1]))
+                self._context_buffer_port.remove_file(Path(elmts[len("file:") :]))
             elif elmts.startswith("snippet:"):
+                # The path itself may contain ":" so split from the right.
+                path, start, end = elmts[len("snippet:") :].rsplit(":", 2)
                 self._context_buffer_port.remove_snippet(
-                    Path(elmts.split(":")[1]),
-                    int(elmts.split(":")[2]),
-                    int(elmts.split(":")[3]),
+                    Path(path), int(start), int(end)
                 )
             elif elmts.startswith("external_source:"):
                 http_url = ":".join(elmts.split(":")[1:])
@@ -0,0 +1,81 @@
+from codebase_to_llm.application.ports import ContextBufferPort, PromptRepositoryPort
+from codebase_to_llm.application.uc_add_file_to_context_buffer import (
+    AddFileToContextBufferUseCase,
+)
+from codebase_to_llm.domain.content_search import ContentSearchIndex
+from codebase_to_llm.domain.context_buffer import Snippet
+from codebase_to_llm.domain.context_selection import SelectedContext, select_context
+from codebase_to_llm.domain.ingestion_policy import (
+    DEFAULT_INGESTION_POLICY,
+    IngestionPolicy,
+)
+from codebase_to_llm.domain.result import Err, Ok, Result
+
+
+class SelectRelevantContextUseCase:
+    """Pre-fill the context buffer with what the user request is about.
+
+    Files are ranked offline by BM25 against the request and taken whole,
+    or as their most relevant lines, while they fit the token budget.
+    """
+
+    __slots__ = ("_context_buffer", "_prompt_repo", "_add_files")
+
+    def __init__(
+        self,
+        context_buffer: ContextBufferPort,
+        prompt_repo: PromptRepositoryPort,
+        policy: IngestionPolicy = DEFAULT_INGESTION_POLICY,
+    ):
+        self._context_buffer = context_buffer
+        self._prompt_repo = prompt_repo
+        self._add_files = AddFileToContextBufferUseCase(context_buffer, policy)
+
+    def select(
+        self,
+        index: ContentSearchIndex,
+        token_budget: int,
+        max_items: int = 30,
+        query: str | None = None,
+    ) -> Result[list[SelectedContext], str]:
+        """What :meth:`execute` would add, without touching the buffer."""
+        if query is None:
+            prompt_result = self._prompt_repo.get_prompt()
+            prompt = prompt_result.ok()
+            if prompt is None:
+                return Err(prompt_result.err() or "No user request to select for.")
+            query = prompt.get_content()
+        # Rank a few spare files: some will not fit, even as snippets.
+        ranked = index.rank(query, limit=max_items * 2)
+        if ranked.is_err():
+            return Err(ranked.err() or "Unknown error")
+        return Ok(
+            select_context(index.root, ranked.ok() or [], token_budget, max_items)
+        )
+
+    def execute(
+        self,
+        index: ContentSearchIndex,
+        token_budget: int,
+        max_items: int = 30,
+        query: str | None = None,
+    ) -> Result[list[SelectedContext], str]:
+        """Rank against ``query``, or the current user request when omitted."""
+        selection = self.select(index, token_budget, max_items, query)
+        selected = selection.ok()
+        if selected is None:
+            return selection
+        files = [item.path for item in selected if not item.is_snippet]
+        added = self._add_files.execute_many(files)
+        if added.is_err():
+            return Err(added.err() or "Unknown error")
+        for item in selected:
+            if item.start is None or item.end is None:
+                continue
+            snippet = Snippet.try_create_from_path(
+                item.path, item.start, item.end, ""
+            ).ok()
+            if snippet is not None:
+                # Already buffered snippets are simply left as they are.
+                self._context_buffer.add_snippet(snippet)
+        return Ok(selected)
@@ -23,6 +23,9 @@ class AppConfig:
     deployment_url: str
     gcp_bucket_name: str
     redis_url: str
+    session_store: str
+    session_ttl_seconds: int
+    session_max_bytes: int
 
 
 def load_config() -> AppConfig:
@@ -37,6 +40,11 @@ def load_config() -> AppConfig:
         deployment_url=os.getenv("DEPLOYMENT_URL", "http://localhost:8000"),
         gcp_bucket_name=os.getenv("GCP_BUCKET_NAME", ""),
         redis_url=os.getenv("REDIS_URL", "redis://redis:6379/0"),
+        # "memory" keeps sessions in this process; "redis" shares them
+        # between API workers.
+        session_store=os.getenv("SESSION_STORE", "memory"),
+        session_ttl_seconds=int(os.getenv("SESSION_TTL_SECONDS", str(24 * 3600))),
+        session_max_bytes=int(os.getenv("SESSION_MAX_BYTES", str(32 * 1024 * 1024))),
     )
 
 
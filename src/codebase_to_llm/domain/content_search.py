@@ -0,0 +1,474 @@
+from __future__ import annotations
+
+import math
+import os
+import re
+import threading
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final
+from typing_extensions import final
+
+from .directory_tree import walk_files
+from .file_cache import StatFingerprint, decode_text, fingerprint
+from .result import Err, Ok, Result
+from .root_refresh import BackgroundRefresh, RootRegistry, is_racy
+
+# Larger files are left out of content search (paths still match).
+MAX_INDEXED_BYTES: Final[int] = 1024 * 1024
+
+# At most this many candidate files are read to confirm a query.
+_MAX_VERIFIED: Final[int] = 2_000
+
+# A segment matching more words than this does not narrow the candidates.
+_MAX_NARROWING_WORDS: Final[int] = 256
+
+_MAX_LINE_CHARS: Final[int] = 200
+
+_WORD_RE: Final = re.compile(r"\w{3,}")
+_SEGMENT_RE: Final = re.compile(r"\w+")
+
+# BM25 parameters: term frequency saturation and document length weight.
+_K1: Final[float] = 1.2
+_B: Final[float] = 0.75
+# A query term counts for at most this many indexed words containing it.
+_MAX_EXPANSIONS: Final[int] = 64
+# A query term found in a file's path adds this many times its idf.
+_PATH_WEIGHT: Final[float] = 2.0
+# A query term found in a name the file declares adds this many times its idf.
+_SYMBOL_WEIGHT: Final[float] = 2.0
+# Declarations in most languages: ``def``/``class`` (Python), ``function``
+# (JS/PHP), ``func`` (Go/Swift), ``fn``/``struct``/``trait`` (Rust), ...
+_SYMBOL_RE: Final = re.compile(
+    r"^[ \t]*(?:(?:export|pub|public|private|protected|static|async|abstract)\s+)*"
+    r"(?:def|class|function|func|fn|interface|struct|enum|trait|type|module)"
+    r"\s+(\w{3,})",
+    re.MULTILINE,
+)
+_MAX_QUERY_TERMS: Final[int] = 64
+_STOP_WORDS: Final[frozenset[str]] = frozenset(
+    """about after all also and any are because been but can could does each
+    for from get has have how into its just like make need not now only our
+    please should some than that the their then there these they this those
+    use using want was way were what when where which while who why will with
+    would you your""".split()
+)
+_SUFFIXES: Final[tuple[str, ...]] = ("ing", "ed", "es", "s")
+
+
+def trigrams(word: str) -> set[str]:
+    return {word[index : index + 3] for index in range(len(word) - 2)}
+
+
+def query_terms(text: str) -> list[str]:
+    """Distinct, crudely stemmed words of free text, stop words left out."""
+    terms: dict[str, None] = {}
+    for word in _WORD_RE.findall(text.lower()):
+        if word in _STOP_WORDS or word.isdigit():
+            continue
+        for suffix in _SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+                word = word[: -len(suffix)]
+                break
+        terms[word] = None
+    return list(terms)[:_MAX_QUERY_TERMS]
+
+
+@final
+@dataclass(frozen=True)
+class LineHit:
+    line_number: int
+    text: str
+
+
+@final
+@dataclass(frozen=True)
+class SearchHit:
+    """One ranked result; ``hit_count`` counts the matching lines."""
+
+    path: str
+    score: int
+    path_match: bool
+    hit_count: int
+    line_hits: tuple[LineHit, ...]
+
+
+@final
+@dataclass(frozen=True)
+class RankedFile:
+    """A file's BM25 relevance to a text, with the query terms it holds."""
+
+    path: str
+    score: float
+    terms: tuple[str, ...]
+
+
+@final
+@dataclass(frozen=True)
+class ContentIndexStats:
+    files: int
+    updated: int
+    removed: int
+    words: int
+
+
+# A file's stamp, word counts and the names it declares.
+_FileWords = tuple[StatFingerprint, Counter[str], frozenset[str]]
+
+
+def _read_words(path: str) -> _FileWords | None:
+    try:
+        with open(path, "rb") as handle:
+            stat_result = os.fstat(handle.fileno())
+            if stat_result.st_size > MAX_INDEXED_BYTES:
+                return fingerprint(stat_result), Counter(), frozenset()
+            data = handle.read()
+    except OSError:
+        return None
+    if b"\0" in data[:8192]:
+        return fingerprint(stat_result), Counter(), frozenset()
+    text = decode_text(data).lower()
+    words = Counter(_WORD_RE.findall(text))
+    return fingerprint(stat_result), words, frozenset(_SYMBOL_RE.findall(text))
+
+
+def _line_hits(text: str, needle: str, limit: int) -> tuple[int, tuple[LineHit, ...]]:
+    lowered = text.lower()
+    count = 0
+    hits: list[LineHit] = []
+    position = lowered.find(needle)
+    while position != -1:
+        count += 1
+        start = lowered.rfind("\n", 0, position) + 1
+        end = lowered.find("\n", position)
+        end = len(lowered) if end == -1 else end
+        if len(hits) < limit:
+            line_number = lowered.count("\n", 0, start) + 1
+            hits.append(LineHit(line_number, text[start:end].strip()[:_MAX_LINE_CHARS]))
+        position = lowered.find(needle, end)
+    return count, tuple(hits)
+
+
+@final
+class _Postings:
+    """Word -> document ids and counts, plus a trigram index over the words.
+
+    Postings are append-only: a changed or deleted file gets a new id and
+    its old id simply stops being live, which keeps updates cheap.
+    """
+
+    __slots__ = ("word_documents", "word_counts", "trigram_words")
+
+    def __init__(self) -> None:
+        self.word_documents: dict[str, array[int]] = {}
+        # Aligned with ``word_documents``: occurrences in each document.
+        self.word_counts: dict[str, array[int]] = {}
+        self.trigram_words: dict[str, set[str]] = {}
+
+    def add(self, doc_id: int, words: Counter[str]) -> None:
+        word_documents = self.word_documents
+        word_counts = self.word_counts
+        for word, count in words.items():
+            documents = word_documents.get(word)
+            if documents is None:
+                documents = word_documents[word] = array("i")
+                counts = word_counts[word] = array("i")
+                for trigram in trigrams(word):
+                    self.trigram_words.setdefault(trigram, set()).add(word)
+            else:
+                counts = word_counts[word]
+            documents.append(doc_id)
+            counts.append(count)
+
+    def words_containing(self, segment: str) -> list[str]:
+        grams = sorted(
+            (self.trigram_words.get(gram, set()) for gram in trigrams(segment)),
+            key=len,
+        )
+        words = grams[0].intersection(*grams[1:]) if grams else set()
+        return [word for word in words if segment in word]
+
+
+@final
+class ContentSearchIndex:
+    """Case-insensitive substring search over the text files of one root.
+
+    Each file is indexed by its distinct words (``\\w{3,}``); a trigram index
+    over that vocabulary finds the words containing a query segment. The
+    files holding such words are only candidates: each is read to confirm
+    the match and collect line hits. :meth:`rank` scores files against
+    free text with BM25 over the same postings, favouring files that declare
+    a matching name (``def``, ``class``, ``fn``...). :meth:`refresh` re-reads
+    only files whose stat fingerprint changed.
+    """
+
+    __slots__ = (
+        "_root",
+        "_lock",
+        "_refresh_lock",
+        "_stamps",
+        "_paths",
+        "_lengths",
+        "_symbols",
+        "_total_length",
+        "_postings",
+        "_next_id",
+        "_ready",
+        "_background",
+    )
+
+    def __init__(self, root: Path) -> None:
+        self._root = Path(os.path.abspath(root))
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        # path -> (live document id, stamp); a None stamp is read again.
+        self._stamps: dict[str, tuple[int, StatFingerprint | None]] = {}
+        self._paths: dict[int, str] = {}
+        # Live document id -> number of words, for BM25 length normalisation.
+        self._lengths: dict[int, int] = {}
+        # Live document id -> names it declares, when it declares any.
+        self._symbols: dict[int, frozenset[str]] = {}
+        self._total_length = 0
+        self._postings = _Postings()
+        self._next_id = 0
+        self._ready = False
+        self._background = BackgroundRefresh(self.refresh, "content-search-refresh")
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def ready(self) -> bool:
+        """Whether a first refresh completed, so searches see every file."""
+        return self._ready
+
+    def _needs_rebuild(self) -> bool:
+        # Once dead ids outnumber live ones the postings are rebuilt compact.
+        return not self._ready or self._next_id > 2 * len(self._paths) + 1_000
+
+    def refresh(self) -> ContentIndexStats:
+        with self._refresh_lock:
+            with self._lock:
+                rebuild = self._needs_rebuild()
+                known = {path: stamp for path, (_, stamp) in self._stamps.items()}
+            seen: set[str] = set()
+            read: list[
+                tuple[str, StatFingerprint | None, Counter[str], frozenset[str]]
+            ] = []
+            for relative, full_path, stat_result in walk_files(self._root):
+                if not rebuild and known.get(relative) == fingerprint(stat_result):
+                    seen.add(relative)
+                    continue
+                words = _read_words(full_path)
+                if words is None:
+                    continue
+                read_stamp, file_words, symbols = words
+                seen.add(relative)
+                stamp = None if is_racy(read_stamp[0]) else read_stamp
+                read.append((relative, stamp, file_words, symbols))
+            removed = [path for path in known if path not in seen]
+            updated = sum(1 for path, stamp, _, _ in read if known.get(path) != stamp)
+            if rebuild:
+                # Built aside and swapped in, so searches keep working meanwhile.
+                postings = _Postings()
+                stamps: dict[str, tuple[int, StatFingerprint | None]] = {}
+                paths: dict[int, str] = {}
+                lengths: dict[int, int] = {}
+                declared: dict[int, frozenset[str]] = {}
+                for doc_id, (relative, stamp, file_words, symbols) in enumerate(read):
+                    postings.add(doc_id, file_words)
+                    stamps[relative] = (doc_id, stamp)
+                    paths[doc_id] = relative
+                    lengths[doc_id] = sum(file_words.values())
+                    if symbols:
+                        declared[doc_id] = symbols
+                with self._lock:
+                    self._postings, self._stamps, self._paths = postings, stamps, paths
+                    self._lengths, self._symbols = lengths, declared
+                    self._total_length = sum(lengths.values())
+                    self._next_id = len(read)
+            else:
+                with self._lock:
+                    for path in removed:
+                        self._forget(self._stamps.pop(path)[0])
+                    for relative, stamp, file_words, symbols in read:
+                        previous = self._stamps.get(relative)
+                        if previous is not None:
+                            self._forget(previous[0])
+                        doc_id = self._next_id
+                        self._next_id += 1
+                        self._postings.add(doc_id, file_words)
+                        self._stamps[relative] = (doc_id, stamp)
+                        self._paths[doc_id] = relative
+                        self._lengths[doc_id] = sum(file_words.values())
+                        self._total_length += self._lengths[doc_id]
+                        if symbols:
+                            self._symbols[doc_id] = symbols
+            with self._lock:
+                self._ready = True
+                word_count = len(self._postings.word_documents)
+            self._background.mark_refreshed()
+            return ContentIndexStats(len(seen), updated, len(removed), word_count)
+
+    def _forget(self, doc_id: int) -> None:
+        del self._paths[doc_id]
+        self._total_length -= self._lengths.pop(doc_id)
+        self._symbols.pop(doc_id, None)
+
+    def refresh_in_background(self, min_interval: float = 5.0) -> None:
+        """Start a refresh thread unless one runs or the last one is recent."""
+        self._background.start(min_interval)
+
+    def _candidates(self, segments: list[str]) -> set[int]:
+        """Live documents that may contain every query segment.
+
+        The most selective segment always narrows the set; segments matching
+        many words are skipped after it, since every candidate is read and
+        checked against the whole query anyway. When even that segment is
+        that common, collection stops at as many files as a search reads.
+        """
+        postings = self._postings
+        by_selectivity = sorted(
+            (postings.words_containing(segment) for segment in segments), key=len
+        )
+        result: set[int] | None = None
+        for words in by_selectivity:
+            if result is not None and len(words) > _MAX_NARROWING_WORDS:
+                break
+            broad = result is None and len(words) > _MAX_NARROWING_WORDS
+            documents: set[int] = set()
+            for word in words:
+                documents.update(postings.word_documents[word])
+                if broad and len(documents) >= _MAX_VERIFIED:
+                    break
+            result = documents if result is None else result & documents
+            if not result:
+                return set()
+        return (result or set()) & self._paths.keys()
+
+    def search(
+        self, query: str, limit: int = 50, max_line_hits: int = 5
+    ) -> Result[list[SearchHit], str]:
+        """Files whose path or content contains ``query``, best first.
+
+        Name matches rank first, then path matches, then files with more
+        matching lines. Content is only searched when the query holds a
+        word of three or more characters.
+        """
+        needle = query.strip().lower()
+        if not needle:
+            return Err("Empty search query.")
+        if not self._ready:
+            return Err("The search index is still being built.")
+        segments = [s for s in _SEGMENT_RE.findall(needle) if len(s) >= 3]
+        with self._lock:
+            # Paths are relative, so the root's own name never matches.
+            path_matches = {p for p in self._stamps if needle in p.lower()}
+            candidates = {self._paths[doc_id] for doc_id in self._candidates(segments)}
+        ordered = sorted(path_matches, key=lambda p: (len(p), p))
+        ordered += sorted(candidates - path_matches, key=lambda p: (len(p), p))
+
+        hits: list[SearchHit] = []
+        verified = 0
+        for relative in ordered:
+            if len(hits) >= limit or verified >= _MAX_VERIFIED:
+                break
+            path_match = relative in path_matches
+            count = 0
+            lines: tuple[LineHit, ...] = ()
+            if relative in candidates:
+                verified += 1
+                text = self._read_text(relative)
+                if text is not None:
+                    count, lines = _line_hits(text, needle, max_line_hits)
+            if not path_match and not count:
+                continue
+            name_match = needle in relative.rpartition("/")[2].lower()
+            score = (20 if name_match else 10 if path_match else 0) + min(count, 10)
+            hits.append(SearchHit(relative, score, path_match, count, lines))
+        hits.sort(key=lambda hit: (-hit.score, len(hit.path), hit.path))
+        return Ok(hits)
+
+    def _expansions(self, term: str) -> list[str]:
+        """Indexed words containing ``term``, the closest matches first."""
+        words = self._postings.words_containing(term)
+        if len(words) > _MAX_EXPANSIONS:
+            words.sort(key=lambda word: (not word.startswith(term), len(word)))
+            del words[_MAX_EXPANSIONS:]
+        return words
+
+    def rank(self, text: str, limit: int = 30) -> Result[list[RankedFile], str]:
+        """Files most relevant to free ``text`` (a prompt, a bug report), by BM25.
+
+        A query term matches every indexed word containing it, so ``parse``
+        finds ``parse_header`` and ``parser``; terms found in a file's path
+        weigh extra, and more so in the names a file declares. Only the index
+        is consulted, no file is read.
+        """
+        terms = query_terms(text)
+        if not terms:
+            return Err("No searchable words in the text.")
+        if not self._ready:
+            return Err("The search index is still being built.")
+        scores: dict[int, float] = {}
+        matched: dict[int, list[str]] = {}
+        idfs: dict[str, float] = {}
+        with self._lock:
+            live = self._paths
+            lengths = self._lengths
+            if not live:
+                return Ok([])
+            average_length = max(self._total_length / len(live), 1.0)
+            postings = self._postings
+            for term in terms:
+                frequencies: dict[int, int] = {}
+                for word in self._expansions(term):
+                    documents = postings.word_documents[word]
+                    for doc_id, count in zip(documents, postings.word_counts[word]):
+                        frequencies[doc_id] = frequencies.get(doc_id, 0) + count
+                frequencies = {d: c for d, c in frequencies.items() if d in live}
+                if not frequencies:
+                    continue
+                df = len(frequencies)
+                idf = idfs[term] = math.log(1 + (len(live) - df + 0.5) / (df + 0.5))
+                for doc_id, count in frequencies.items():
+                    norm = count + _K1 * (
+                        1 - _B + _B * lengths[doc_id] / average_length
+                    )
+                    scores[doc_id] = (
+                        scores.get(doc_id, 0.0) + idf * count * (_K1 + 1) / norm
+                    )
+                    matched.setdefault(doc_id, []).append(term)
+            for doc_id in scores:
+                path = live[doc_id].lower()
+                scores[doc_id] += _PATH_WEIGHT * sum(
+                    idf for term, idf in idfs.items() if term in path
+                )
+                symbols = self._symbols.get(doc_id)
+                if symbols:
+                    scores[doc_id] += _SYMBOL_WEIGHT * sum(
+                        idf
+                        for term, idf in idfs.items()
+                        if any(term in symbol for symbol in symbols)
+                    )
+            best = sorted(scores, key=lambda d: (-scores[d], live[d]))[:limit]
+            return Ok([RankedFile(live[d], scores[d], tuple(matched[d])) for d in best])
+
+    def _read_text(self, relative: str) -> str | None:
+        try:
+            with open(self._root / relative, "rb") as handle:
+                return decode_text(handle.read(MAX_INDEXED_BYTES + 1))
+        except OSError:
+            return None
+
+
+_indexes: Final[RootRegistry[ContentSearchIndex]] = RootRegistry(
+    ContentSearchIndex, max_roots=4
+)
+
+
+def content_index_for(root: Path) -> ContentSearchIndex:
+    """Return the shared search index of ``root``, keeping the most recent roots."""
+    return _indexes.get(root)
@@ -1,25 +1,91 @@
-from typing import Callable, final
+import os
+import stat
+from typing import Callable, Iterable, final
 
 
 from dataclasses import dataclass
 from pathlib import Path
 
+from codebase_to_llm.domain.file_cache import (
+    StatFingerprint,
+    fingerprint,
+    read_text_file,
+)
+from codebase_to_llm.domain.line_index import read_line_range
 from codebase_to_llm.domain.result import Err, Ok, Result
 
 
-@dataclass
+@final
 class File:
-    path: Path
-    content: str
+    """A whole file in the context buffer.
+
+    Files taken from disk are references: only the path and the stat
+    fingerprint seen when they were added are kept, and the text is read when
+    the context is rendered. Passing ``content`` pins an in-memory text
+    instead (used for derived copies such as truncated files).
+    """
+
+    __slots__ = ("path", "_content", "_fingerprint")
+
+    def __init__(
+        self,
+        path: Path,
+        content: str | None = None,
+        fingerprint: StatFingerprint | None = None,
+    ) -> None:
+        self.path = path
+        self._content = content
+        self._fingerprint = fingerprint
 
     @classmethod
     def try_from_path(cls, path: Path) -> Result["File", str]:
         try:
-            with open(path, "r") as file:
-                content = file.read()
-            return Ok(File(path, content))
-        except Exception as e:
+            stat_result = os.stat(path)
+        except OSError as e:
             return Err(str(e))
+        if not stat.S_ISREG(stat_result.st_mode):
+            return Err(f"Not a regular file: {path}")
+        return Ok(File(path, None, fingerprint(stat_result)))
+
+    def is_reference(self) -> bool:
+        return self._content is None
+
+    def fingerprint(self) -> StatFingerprint | None:
+        return self._fingerprint
+
+    def read(self) -> Result[str, str]:
+        """Return the text, reading referenced files from disk right now."""
+        if self._content is not None:
+            return Ok(self._content)
+        return read_text_file(self.path)
+
+    @property
+    def content(self) -> str:
+        """The text, or the placeholder the context shows for an unreadable file.
+
+        Packing and compaction size files by this, so they count what is
+        actually emitted.
+        """
+        result = self.read()
+        if result.is_err():
+            return f"[could not read file: {result.err()}]"
+        return result.ok() or ""
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, File):
+            return NotImplemented
+        return (self.path, self._content, self._fingerprint) == (
+            other.path,
+            other._content,
+            other._fingerprint,
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.path, self._fingerprint))
+
+    def __repr__(self) -> str:
+        kind = "reference" if self._content is None else "inline"
+        return f"File(path={self.path!r}, {kind})"
 
 
 @dataclass
@@ -33,14 +99,11 @@ class Snippet:
     def try_create_from_path(
         cls, path: Path, start: int, end: int, content: str
     ) -> Result["Snippet", str]:
-        try:
-            with open(path, "r") as file:
-                lines = file.readlines()
-                # Only keep the lines between start and end
-                snippet_content = "".join(lines[start - 1 : end])
-            return Ok(Snippet(path, start, end, snippet_content))
-        except Exception as e:
-            return Err(str(e))
+        # Only the requested lines are read, through the cached line index.
+        snippet_result = read_line_range(path, start, end)
+        if snippet_result.is_err():
+            return Err(snippet_result.err() or "Unknown error")
+        return Ok(Snippet(path, start, end, snippet_result.ok() or ""))
 
 
 @dataclass
@@ -63,73 +126,104 @@ class ExternalSource:
         return Ok(ExternalSource(url, text, is_youtube_transcript))
 
 
+def path_key(path: Path) -> Path:
+    """Normalise ``path`` for buffer lookups without touching the file system."""
+    return Path(os.path.abspath(path))
+
+
+SnippetKey = tuple[Path, int, int]
+
+
 @final
 class ContextBuffer:
-    """Immutable value object representing a context buffer."""
+    """Insertion-ordered context buffer indexed for O(1) lookups.
+
+    Files are keyed by normalised path, snippets by ``(path, start, end)``
+    and external sources by URL; keys are normalised once on insertion.
+    """
 
     __slots__ = ("_files", "_snippets", "_external_sources")
 
     def __init__(
         self,
-        files: list[File],
-        snippets: list[Snippet],
-        external_sources: list[ExternalSource],
+        files: Iterable[File] = (),
+        snippets: Iterable[Snippet] = (),
+        external_sources: Iterable[ExternalSource] = (),
     ) -> None:
-        self._files = files
-        self._snippets = snippets
-        self._external_sources = external_sources
+        self._files: dict[Path, File] = {}
+        self._snippets: dict[SnippetKey, Snippet] = {}
+        self._external_sources: dict[str, ExternalSource] = {}
+        self.add_files(files)
+        for snippet in snippets:
+            self.add_snippet(snippet)
+        for external_source in external_sources:
+            self.add_external_source(external_source)
 
     def add_file(self, file: File) -> Result[None, str]:
-        list_of_file_path = [file_.path for file_ in self._files]
-        if file.path in list_of_file_path:
+        key = path_key(file.path)
+        if key in self._files:
             return Err("File already in the context buffer")
-        self._files.append(file)
+        self._files[key] = file
         return Ok(None)
 
-    def remove_file(self, file: File) -> Result[None, str]:
-        if file in self._files:
-            self._files.remove(file)
+    def add_files(self, files: Iterable[File]) -> int:
+        """Add every file not already present and return how many were added."""
+        added = 0
+        for file in files:
+            key = path_key(file.path)
+            if key not in self._files:
+                self._files[key] = file
+                added += 1
+        return added
+
+    def remove_file(self, path: Path) -> Result[None, str]:
+        self._files.pop(path_key(path), None)
         return Ok(None)
 
+    def has_file(self, path: Path) -> bool:
+        return path_key(path) in self._files
+
     def add_snippet(self, snippet: Snippet) -> Result[None, str]:
-        if snippet in self._snippets:
+        key = (path_key(snippet.path), snippet.start, snippet.end)
+        if key in self._snippets:
             return Err("Snippet already in the context buffer")
-        self._snippets.append(snippet)
+        self._snippets[key] = snippet
+        return Ok(None)
+
+    def remove_snippet(self, path: Path, start: int, end: int) -> Result[None, str]:
+        if self._snippets.pop((path_key(path), start, end), None) is None:
+            return Err("Snippet not found in the context buffer")
         return Ok(None)
 
-    def remove_snippet(
-        self, path: Path, start: int, end: int
-    ) -> Result["ContextBuffer", str]:
-        for snippet_ in self._snippets:
-            if (
-                snippet_.path.resolve() == path.resolve()
-                and snippet_.start == start
-                and snippet_.end == end
-            ):
-                new_snippets = self._snippets.copy()
-                new_snippets.remove(snippet_)
-                return Ok(
-                    ContextBuffer(self._files, new_snippets, self._external_sources)
-                )
-        return Err("Snippet not found in the context buffer")
+    def has_snippet(self, path: Path, start: int, end: int) -> bool:
+        return (path_key(path), start, end) in self._snippets
 
     def add_external_source(self, external_source: ExternalSource) -> Result[None, str]:
-        if external_source.url in [es.url for es in self._external_sources]:
+        if external_source.url in self._external_sources:
             return Err("External source already in the context buffer")
-        self._external_sources.append(external_source)
+        self._external_sources[external_source.url] = external_source
         return Ok(None)
 
     def remove_external_source(self, url: str) -> Result[None, str]:
-        self._external_sources = [
-            source for source in self._external_sources if source.url != url
-        ]
+        self._external_sources.pop(url, None)
         return Ok(None)
 
+    def has_external_source(self, url: str) -> bool:
+        return url in self._external_sources
+
     def get_files(self) -> list[File]:
-        return self._files
+        return list(self._files.values())
 
     def get_snippets(self) -> list[Snippet]:
-        return self._snippets
+        return list(self._snippets.values())
 
     def get_external_sources(self) -> list[ExternalSource]:
-        return self._external_sources
+        return list(self._external_sources.values())
+
+    def clear(self) -> None:
+        self._files.clear()
+        self._snippets.clear()
+        self._external_sources.clear()
+
+    def count_items(self) -> int:
+        return len(self._files) + len(self._snippets) + len(self._external_sources)
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Final, Iterable, Iterator
+from typing_extensions import final
+
+from pygments.lexers import get_lexer_for_filename  # type: ignore
+from pygments.token import Comment, String  # type: ignore
+from pygments.util import ClassNotFound  # type: ignore
+
+from .context_packing import DEFAULT_TOKEN_ESTIMATOR
+
+_LICENSE_RE: Final = re.compile(
+    r"licen[cs]e|copyright|spdx-license-identifier|\(c\)\s*\d{4}", re.IGNORECASE
+)
+_CODING_RE: Final = re.compile(r"^[ \t\f]*#.*?coding[:=]")
+
+# Comments that carry meaning for the code (#!, #include, #pragma).
+_KEPT_COMMENTS: Final = (Comment.Hashbang, Comment.Preproc, Comment.PreprocFile)
+_DROPPED: Final[str] = "\0"
+
+
+@final
+@dataclass(frozen=True)
+class CompactionOptions:
+    """Which compaction steps to apply to file bodies."""
+
+    strip_license_headers: bool = True
+    collapse_blank_lines: bool = True
+    drop_comments: bool = False
+    drop_docstrings: bool = False
+    deduplicate: bool = True
+
+
+@final
+@dataclass(frozen=True)
+class CompactionItem:
+    """Size of one file before and after compaction."""
+
+    label: str
+    original_chars: int
+    compacted_chars: int
+    original_tokens: int
+    compacted_tokens: int
+    duplicate_of: str | None = None
+
+
+@final
+@dataclass(frozen=True)
+class CompactionReport:
+    items: tuple[CompactionItem, ...]
+
+    def original_tokens(self) -> int:
+        return sum(item.original_tokens for item in self.items)
+
+    def compacted_tokens(self) -> int:
+        return sum(item.compacted_tokens for item in self.items)
+
+    def saved_tokens(self) -> int:
+        return self.original_tokens() - self.compacted_tokens()
+
+
+def strip_license_header(text: str) -> str:
+    """Remove a leading comment block that mentions a license or copyright."""
+    lines = text.splitlines(keepends=True)
+    kept: list[str] = []
+    index = 0
+    while index < len(lines) and (
+        lines[index].startswith("#!") or _CODING_RE.match(lines[index])
+    ):
+        kept.append(lines[index])
+        index += 1
+    while index < len(lines) and not lines[index].strip():
+        index += 1
+    if index == len(lines):
+        return text
+
+    first = lines[index].lstrip()
+    end = index
+    if first.startswith("/*"):
+        while end < len(lines) and not lines[end].rstrip().endswith("*/"):
+            end += 1
+        if end == len(lines):
+            return text
+        end += 1
+    else:
+        marker = (
+            "#" if first.startswith("#") else "//" if first.startswith("//") else ""
+        )
+        if not marker:
+            return text
+        while end < len(lines) and lines[end].lstrip().startswith(marker):
+            end += 1
+
+    if not _LICENSE_RE.search("".join(lines[index:end])):
+        return text
+    while end < len(lines) and not lines[end].strip():
+        end += 1
+    return "".join(kept + lines[end:])
+
+
+def drop_comments_and_docstrings(
+    text: str, filename: str, comments: bool, docstrings: bool
+) -> str:
+    """Drop comment and/or docstring tokens using the pygments lexer for ``filename``."""
+    try:
+        lexer = get_lexer_for_filename(filename, stripnl=False, ensurenl=False)
+    except ClassNotFound:
+        return text
+    kept: list[str] = []
+    for token_type, value in lexer.get_tokens(text):
+        if (
+            comments
+            and token_type in Comment
+            and not any(token_type in kept_type for kept_type in _KEPT_COMMENTS)
+        ) or (docstrings and token_type in String.Doc):
+            # Leave a mark so lines left empty by the removal can go too.
+            kept.append(_DROPPED)
+            continue
+        kept.append(value)
+    lines: list[str] = []
+    for line in "".join(kept).splitlines(keepends=True):
+        if _DROPPED in line:
+            line = line.replace(_DROPPED, "")
+            if not line.strip():
+                continue
+        lines.append(line)
+    return "".join(lines)
+
+
+def collapse_blank_lines(text: str) -> str:
+    """Strip trailing whitespace, squeeze blank runs and drop trailing blanks."""
+    kept: list[str] = []
+    previous_blank = False
+    for line in text.splitlines(keepends=True):
+        stripped = line.rstrip()
+        if not stripped:
+            if not previous_blank and kept:
+                kept.append("\n")
+            previous_blank = True
+            continue
+        previous_blank = False
+        kept.append(stripped + "\n" if line.endswith("\n") else stripped)
+    if previous_blank and kept and kept[-1] == "\n":
+        kept.pop()
+    return "".join(kept)
+
+
+def compact_text(text: str, filename: str, options: CompactionOptions) -> str:
+    if options.strip_license_headers:
+        text = strip_license_header(text)
+    if options.drop_comments or options.drop_docstrings:
+        text = drop_comments_and_docstrings(
+            text, filename, options.drop_comments, options.drop_docstrings
+        )
+    if options.collapse_blank_lines:
+        text = collapse_blank_lines(text)
+    return text
+
+
+@final
+class CompactionCache:
+    """Compacted texts memoised by content hash, filename and options.
+
+    Bounded by the characters it holds, like the file cache, and shared
+    across request threads.
+    """
+
+    __slots__ = ("_entries", "_max_chars", "_cached_chars", "_lock")
+
+    def __init__(self, max_chars: int = 16 * 1024 * 1024) -> None:
+        self._entries: OrderedDict[tuple[bytes, str, CompactionOptions], str] = (
+            OrderedDict()
+        )
+        self._max_chars = max_chars
+        self._cached_chars = 0
+        self._lock = threading.Lock()
+
+    def compact(self, text: str, filename: str, options: CompactionOptions) -> str:
+        digest = hashlib.blake2b(
+            text.encode("utf-8", errors="surrogatepass"), digest_size=16
+        ).digest()
+        key = (digest, filename, options)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached
+        compacted = compact_text(text, filename, options)
+        if len(compacted) > self._max_chars // 4:
+            return compacted
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = compacted
+                self._cached_chars += len(compacted)
+                while self._cached_chars > self._max_chars:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._cached_chars -= len(evicted)
+        return compacted
+
+
+DEFAULT_COMPACTION_CACHE: Final[CompactionCache] = CompactionCache()
+
+
+def duplicate_pointer(first_label: str) -> str:
+    """The body that stands in for a file identical to ``first_label``."""
+    return f"[identical to {first_label}]"
+
+
+def _iter_compacted(
+    items: Iterable[tuple[str, str]],
+    options: CompactionOptions,
+    cache: CompactionCache,
+) -> Iterator[tuple[str, CompactionItem]]:
+    estimator = DEFAULT_TOKEN_ESTIMATOR
+    # Bodies are remembered by digest so deduplication does not pin them all.
+    seen: dict[bytes, str] = {}
+    for label, text in items:
+        compacted = cache.compact(text, label, options)
+        duplicate_of: str | None = None
+        if options.deduplicate and compacted.strip():
+            digest = hashlib.blake2b(
+                compacted.encode("utf-8", errors="surrogatepass"), digest_size=16
+            ).digest()
+            first_label = seen.get(digest)
+            if first_label is None:
+                seen[digest] = label
+            elif len(pointer := duplicate_pointer(first_label)) < len(compacted):
+                duplicate_of = first_label
+                compacted = pointer
+        yield compacted, CompactionItem(
+            label=label,
+            original_chars=len(text),
+            compacted_chars=len(compacted),
+            original_tokens=estimator.estimate(text),
+            compacted_tokens=estimator.estimate(compacted),
+            duplicate_of=duplicate_of,
+        )
+
+
+def compact_items(
+    items: Iterable[tuple[str, str]],
+    options: CompactionOptions,
+    cache: CompactionCache = DEFAULT_COMPACTION_CACHE,
+) -> tuple[list[str], CompactionReport]:
+    """Compact ``(label, text)`` pairs; labels double as filenames for lexing.
+
+    With ``options.deduplicate`` a body identical to an earlier one (after
+    compaction) is replaced by a pointer to that item.
+    """
+    texts: list[str] = []
+    report_items: list[CompactionItem] = []
+    for compacted, item in _iter_compacted(items, options, cache):
+        texts.append(compacted)
+        report_items.append(item)
+    return texts, CompactionReport(tuple(report_items))
+
+
+def compaction_report(
+    items: Iterable[tuple[str, str]],
+    options: CompactionOptions,
+    cache: CompactionCache = DEFAULT_COMPACTION_CACHE,
+) -> CompactionReport:
+    """Like :func:`compact_items`, keeping only the report.
+
+    Each text can be dropped as soon as the next item is pulled, so a lazy
+    ``items`` is sized one file at a time.
+    """
+    return CompactionReport(
+        tuple(item for _, item in _iter_compacted(items, options, cache))
+    )
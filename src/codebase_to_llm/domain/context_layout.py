@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import os
+from typing import Literal
+
+from .context_buffer import File
+from .file_cache import fingerprint
+
+# "default" keeps buffer order; "cache_stable" puts content that rarely
+# changes first, in a fixed order, so providers can reuse the cached prefix.
+ContextLayout = Literal["default", "cache_stable"]
+
+
+def changed_since_added(file_: File) -> bool:
+    """Tell whether a referenced file was modified after it entered the buffer.
+
+    Inline files never change. A file that changed stays volatile until it is
+    added again, which keeps its position in the layout from flapping.
+    """
+    stamp = file_.fingerprint()
+    if stamp is None:
+        return False
+    try:
+        return fingerprint(os.stat(file_.path)) != stamp
+    except OSError:
+        return True
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+from typing_extensions import final
+
+from .context_buffer import Snippet, path_key
+
+
+@final
+@dataclass(frozen=True)
+class OverlapReport:
+    """What overlap removal did to the snippets of a context."""
+
+    contained_snippets: int
+    merged_snippets: int
+    saved_bytes: int
+
+
+def _line_count(snippet: Snippet) -> int:
+    return snippet.end - snippet.start + 1
+
+
+def _merge_pair(first: Snippet, second: Snippet) -> Snippet | None:
+    """Join two snippets of one file whose ranges touch, or ``None`` if unsafe."""
+    first_lines = first.content.splitlines(keepends=True)
+    second_lines = second.content.splitlines(keepends=True)
+    if len(first_lines) != _line_count(first) or len(second_lines) != _line_count(
+        second
+    ):
+        # Content does not line up with the range (file edited, short file).
+        return None
+    if second.end <= first.end:
+        return first
+    overlap = first.end - second.start + 1
+    content = "".join(first_lines + second_lines[max(overlap, 0) :])
+    return Snippet(first.path, first.start, second.end, content)
+
+
+def _snippet_bytes(snippet: Snippet) -> int:
+    # Content plus the opening and closing tags, roughly as rendered.
+    tag = f"{snippet.path}:{snippet.start}:{snippet.end}"
+    return len(snippet.content.encode("utf-8")) + 2 * len(tag.encode("utf-8")) + 5
+
+
+def remove_overlaps(
+    whole_files: Iterable[Path], snippets: list[Snippet]
+) -> tuple[list[Snippet], OverlapReport]:
+    """Drop snippets of files sent whole and merge touching snippet ranges.
+
+    Merged snippets take the place of the first snippet of their group, so
+    the result only depends on the buffer contents and order.
+    """
+    whole = {path_key(path) for path in whole_files}
+    contained = 0
+    groups: dict[Path, list[Snippet]] = {}
+    for snippet in snippets:
+        key = path_key(snippet.path)
+        if key in whole:
+            contained += 1
+            continue
+        groups.setdefault(key, []).append(snippet)
+
+    merged_by_file: dict[Path, list[Snippet]] = {}
+    merged_count = 0
+    for key, group in groups.items():
+        ordered = sorted(group, key=lambda s: (s.start, s.end))
+        merged: list[Snippet] = [ordered[0]]
+        for snippet in ordered[1:]:
+            current = merged[-1]
+            if snippet.start <= current.end + 1:
+                joined = _merge_pair(current, snippet)
+                if joined is not None:
+                    merged[-1] = joined
+                    merged_count += 1
+                    continue
+            merged.append(snippet)
+        merged_by_file[key] = merged
+
+    result: list[Snippet] = []
+    for snippet in snippets:
+        key = path_key(snippet.path)
+        pending = merged_by_file.pop(key, None)
+        if pending is not None:
+            result.extend(pending)
+
+    saved = sum(_snippet_bytes(s) for s in snippets) - sum(
+        _snippet_bytes(s) for s in result
+    )
+    return result, OverlapReport(contained, merged_count, saved)
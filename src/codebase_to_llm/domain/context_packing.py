@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Final, Iterable, Literal
+from typing_extensions import final
+
+from .result import Err, Ok, Result
+
+PackingKind = Literal["tree", "file", "snippet", "external_source"]
+PackingStatus = Literal["kept", "truncated", "dropped"]
+# Either the text itself or a callable that loads it when it is needed.
+PackingContent = str | Callable[[], str]
+
+# Lower rank is packed first: explicit selections beat whole files, which beat
+# web pages and transcripts; the tree is the first thing to go.
+_KIND_PRIORITY: Final[dict[str, int]] = {
+    "snippet": 0,
+    "file": 1,
+    "external_source": 2,
+    "tree": 3,
+}
+
+# Below this many free tokens a truncated item is mostly noise, so drop it.
+MIN_TRUNCATED_TOKENS: Final[int] = 128
+
+# Tokens kept free for the model's answer when the budget comes from a model.
+DEFAULT_RESPONSE_RESERVE: Final[int] = 8_192
+
+_CONTEXT_WINDOWS: Final[tuple[tuple[str, int], ...]] = (
+    ("gpt-4.1", 1_047_576),
+    ("gpt-5", 400_000),
+    ("gpt-4o", 128_000),
+    ("o1", 200_000),
+    ("o3", 200_000),
+    ("o4", 200_000),
+    ("claude", 200_000),
+    ("gemini", 1_048_576),
+)
+_DEFAULT_CONTEXT_WINDOW: Final[int] = 128_000
+
+_TOKEN_RE: Final = re.compile(r"\w+|[^\w\s]")
+
+
+def default_token_budget(model_name: str) -> int:
+    """Return the prompt budget for ``model_name`` (context window minus answer)."""
+    lowered = model_name.lower()
+    for prefix, window in _CONTEXT_WINDOWS:
+        if prefix in lowered:
+            return window - DEFAULT_RESPONSE_RESERVE
+    return _DEFAULT_CONTEXT_WINDOW - DEFAULT_RESPONSE_RESERVE
+
+
+def count_tokens(text: str) -> int:
+    """Uncached estimate; :class:`TokenEstimator` memoises it per content."""
+    # BPE vocabularies split long identifiers into ~4 character pieces and
+    # give most punctuation its own token; whitespace mostly merges away.
+    total = 0
+    for match in _TOKEN_RE.finditer(text):
+        length = match.end() - match.start()
+        total += 1 if length <= 4 else (length + 3) // 4
+    return total
+
+
+@final
+class TokenEstimator:
+    """Approximate token counter memoised by content hash (bounded LRU).
+
+    Shared across request and worker threads, so the LRU is locked; the
+    count itself runs outside the lock.
+    """
+
+    __slots__ = ("_cache", "_max_entries", "_hits", "_misses", "_lock")
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        self._cache: OrderedDict[bytes, int] = OrderedDict()
+        self._max_entries = max_entries
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def estimate(self, text: str) -> int:
+        if not text:
+            return 0
+        key = hashlib.blake2b(
+            text.encode("utf-8", errors="surrogatepass"), digest_size=16
+        ).digest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return cached
+            self._misses += 1
+        tokens = count_tokens(text)
+        with self._lock:
+            self._cache[key] = tokens
+            if len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def hits(self) -> int:
+        return self._hits
+
+    def misses(self) -> int:
+        return self._misses
+
+
+DEFAULT_TOKEN_ESTIMATOR: Final[TokenEstimator] = TokenEstimator()
+
+
+@final
+@dataclass(frozen=True)
+class PackingCandidate:
+    """One optional piece of the context competing for the token budget.
+
+    A lazy ``content`` with a precomputed ``tokens`` count is only loaded if
+    the item has to be truncated.
+    """
+
+    kind: PackingKind
+    label: str
+    content: PackingContent
+    tokens: int | None = None
+
+    def text(self) -> str:
+        return self.content if isinstance(self.content, str) else self.content()
+
+
+@final
+@dataclass(frozen=True)
+class PackingDecision:
+    """What the packer did with one candidate."""
+
+    kind: PackingKind
+    label: str
+    status: PackingStatus
+    original_tokens: int
+    packed_tokens: int
+
+
+@final
+@dataclass(frozen=True)
+class ContextPackingReport:
+    """Outcome of fitting the context buffer into a token budget."""
+
+    token_budget: int
+    reserved_tokens: int
+    estimated_tokens: int
+    decisions: tuple[PackingDecision, ...]
+
+    def dropped(self) -> tuple[PackingDecision, ...]:
+        return tuple(d for d in self.decisions if d.status == "dropped")
+
+    def truncated(self) -> tuple[PackingDecision, ...]:
+        return tuple(d for d in self.decisions if d.status == "truncated")
+
+
+def _wrapper_tokens(label: str, estimator: TokenEstimator) -> int:
+    # Opening and closing tag plus the separating line breaks.
+    return 2 * estimator.estimate(f"<{label}>") + 2
+
+
+def _head_within(content: str, lines: list[str], char_limit: int) -> tuple[str, int]:
+    kept = 0
+    used = 0
+    for line in lines:
+        if used + len(line) > char_limit:
+            break
+        kept += 1
+        used += len(line)
+    if kept == 0:
+        # A single overlong line (minified code, data): cut mid-line.
+        return content[:char_limit], 0
+    return content[:used], kept
+
+
+def truncate_to_tokens(content: str, max_tokens: int, estimator: TokenEstimator) -> str:
+    """Keep the head of ``content`` (whole lines) within roughly ``max_tokens``."""
+    total_tokens = estimator.estimate(content)
+    if total_tokens <= max_tokens:
+        return content
+    lines = content.splitlines(keepends=True)
+    marker_tokens = 12
+    target = max(0, max_tokens - marker_tokens)
+    char_limit = int(target * len(content) / max(1, total_tokens))
+    truncated = ""
+    for _ in range(3):
+        head, kept = _head_within(content, lines, char_limit)
+        if head and not head.endswith("\n"):
+            head += "\n"
+        truncated = (
+            f"{head}[... truncated {len(lines) - kept} of {len(lines)} lines ...]"
+        )
+        truncated_tokens = estimator.estimate(truncated)
+        if truncated_tokens <= max_tokens:
+            break
+        # The estimate is not linear in characters; shrink proportionally.
+        char_limit = int(char_limit * max_tokens / truncated_tokens * 0.95)
+    return truncated
+
+
+def pack_candidates(
+    candidates: Iterable[PackingCandidate],
+    token_budget: int,
+    reserved_tokens: int,
+    estimator: TokenEstimator = DEFAULT_TOKEN_ESTIMATOR,
+) -> Result[tuple[list[PackingContent | None], ContextPackingReport], str]:
+    """Choose, order and truncate ``candidates`` so the context fits the budget.
+
+    ``reserved_tokens`` covers the parts that are always sent (rules and the
+    user request). The returned list is aligned with ``candidates``: the
+    candidate's own ``content`` for kept items (still lazy if it was), the
+    truncated text for truncated ones and ``None`` for dropped ones.
+    Candidates are considered by kind priority, then in their original order,
+    so the outcome is deterministic for a given buffer.
+    """
+    if token_budget <= 0:
+        return Err("Token budget must be positive")
+    if reserved_tokens > token_budget:
+        return Err(
+            f"Prompt and rules alone exceed the token budget "
+            f"({reserved_tokens} > {token_budget})"
+        )
+
+    items = list(candidates)
+    packed: list[PackingContent | None] = [None] * len(items)
+    decisions: list[PackingDecision | None] = [None] * len(items)
+    remaining = token_budget - reserved_tokens
+
+    order = sorted(range(len(items)), key=lambda i: (_KIND_PRIORITY[items[i].kind], i))
+    for index in order:
+        item = items[index]
+        overhead = _wrapper_tokens(item.label, estimator)
+        content_tokens = (
+            item.tokens if item.tokens is not None else estimator.estimate(item.text())
+        )
+        if content_tokens + overhead <= remaining:
+            packed[index] = item.content
+            remaining -= content_tokens + overhead
+            decisions[index] = PackingDecision(
+                item.kind, item.label, "kept", content_tokens, content_tokens
+            )
+            continue
+        available = remaining - overhead
+        if available >= MIN_TRUNCATED_TOKENS:
+            truncated = truncate_to_tokens(item.text(), available, estimator)
+            truncated_tokens = estimator.estimate(truncated)
+            if truncated_tokens > available:
+                decisions[index] = PackingDecision(
+                    item.kind, item.label, "dropped", content_tokens, 0
+                )
+                continue
+            packed[index] = truncated
+            remaining -= truncated_tokens + overhead
+            decisions[index] = PackingDecision(
+                item.kind, item.label, "truncated", content_tokens, truncated_tokens
+            )
+        else:
+            decisions[index] = PackingDecision(
+                item.kind, item.label, "dropped", content_tokens, 0
+            )
+
+    final_decisions = tuple(d for d in decisions if d is not None)
+    report = ContextPackingReport(
+        token_budget=token_budget,
+        reserved_tokens=reserved_tokens,
+        estimated_tokens=token_budget - remaining,
+        decisions=final_decisions,
+    )
+    return Ok((packed, report))
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final, Iterable
+from typing_extensions import final
+
+from .content_search import MAX_INDEXED_BYTES, RankedFile
+from .context_packing import DEFAULT_TOKEN_ESTIMATOR, TokenEstimator
+from .file_cache import decode_text
+
+# A file too large for what is left of the budget contributes its densest
+# window of this many lines instead, if that fits.
+SNIPPET_LINES: Final[int] = 60
+# Below this many tokens left, nothing more is worth adding.
+_MIN_TOKENS: Final[int] = 64
+
+
+@final
+@dataclass(frozen=True)
+class SelectedContext:
+    """A ranked file picked for the context: whole, or lines ``start``-``end``."""
+
+    path: Path
+    score: float
+    tokens: int
+    start: int | None = None
+    end: int | None = None
+
+    @property
+    def is_snippet(self) -> bool:
+        return self.start is not None
+
+
+def best_window(
+    lines: list[str], terms: Iterable[str], max_lines: int
+) -> tuple[int, int]:
+    """1-based inclusive line range of at most ``max_lines`` holding most terms."""
+    needles = list(terms)
+    hits = [sum(needle in line.lower() for needle in needles) for line in lines]
+    size = min(max_lines, len(lines))
+    window = sum(hits[:size])
+    best, best_starts = window, [0]
+    for start in range(1, len(lines) - size + 1):
+        window += hits[start + size - 1] - hits[start - 1]
+        if window > best:
+            best, best_starts = window, [start]
+        elif window == best:
+            best_starts.append(start)
+    # Of equally good windows, the middle one centres the matching lines.
+    start = best_starts[len(best_starts) // 2]
+    return start + 1, start + size
+
+
+def select_context(
+    root: Path,
+    ranked: list[RankedFile],
+    token_budget: int,
+    max_items: int = 30,
+    snippet_lines: int = SNIPPET_LINES,
+    estimator: TokenEstimator = DEFAULT_TOKEN_ESTIMATOR,
+) -> list[SelectedContext]:
+    """Take ``ranked`` files in order while they fit ``token_budget``.
+
+    A file that does not fit is replaced by its most relevant window of
+    lines, halved until it fits or is too small to be useful.
+    """
+    selected: list[SelectedContext] = []
+    remaining = token_budget
+    for hit in ranked:
+        if len(selected) >= max_items or remaining < _MIN_TOKENS:
+            break
+        path = root / hit.path
+        try:
+            with open(path, "rb") as handle:
+                text = decode_text(handle.read(MAX_INDEXED_BYTES + 1))
+        except OSError:
+            continue
+        tokens = estimator.estimate(text)
+        if tokens <= remaining:
+            selected.append(SelectedContext(path, hit.score, tokens))
+            remaining -= tokens
+            continue
+        # Numbered like the line index snippets are read with: only "\n"
+        # ends a line, so form feeds and the like do not shift the window.
+        lines = [line.removesuffix("\r") for line in text.split("\n")]
+        size = snippet_lines
+        while size >= 4:
+            start, end = best_window(lines, hit.terms, size)
+            content = "\n".join(lines[start - 1 : end])
+            tokens = estimator.estimate(content)
+            if tokens <= remaining:
+                selected.append(SelectedContext(path, hit.score, tokens, start, end))
+                remaining -= tokens
+                break
+            size //= 2
+    return selected
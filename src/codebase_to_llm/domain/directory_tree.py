@@ -1,9 +1,25 @@
 from __future__ import annotations
 
+import io
+import json
 import os
 from pathlib import Path
-from typing import Final, List, Set
+from dataclasses import dataclass
+from typing import (
+    Callable,
+    Final,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Sequence,
+    Set,
+    cast,
+    get_args,
+)
+from typing_extensions import final
 
+from .gitignore import GitIgnoreMatcher
 from .result import Err, Ok, Result
 
 _DEFAULT_IGNORES: Final[Set[str]] = {
@@ -17,68 +33,334 @@ _DEFAULT_IGNORES: Final[Set[str]] = {
 DEFAULT_IGNORES: Final[Set[str]] = _DEFAULT_IGNORES
 
 
-def _gitignore_paths(root: Path) -> Set[str]:
-    gitignore_file = root / ".gitignore"
-    if not gitignore_file.exists():
-        return set()
+# Compiled cache and tooling output that is never worth showing or loading.
+DEFAULT_IGNORE_PATTERNS: Final[tuple[str, ...]] = (*sorted(DEFAULT_IGNORES), "*.pyc")
 
-    # Reading .gitignore without exceptions
-    # (Assume UTF‑8 and ignore undecodable bytes)
-    patterns: Set[str] = set()
-    for line in gitignore_file.read_text(
-        encoding="utf-8", errors="ignore"
-    ).splitlines():
-        stripped = line.strip()
-        if stripped and not stripped.startswith("#"):
-            patterns.add(stripped)
-    return patterns
 
+def ignore_matcher(root: Path) -> GitIgnoreMatcher:
+    """Return the matcher for ``root``: the defaults plus every .gitignore below it."""
+    return GitIgnoreMatcher(root, DEFAULT_IGNORE_PATTERNS)
 
-def get_ignore_tokens(root: Path) -> Set[str]:
-    """Return the set of ignore tokens for a given root directory (default + .gitignore)."""
-    return DEFAULT_IGNORES.union(_gitignore_paths(root))
 
+TreeEntry = tuple[str, bool, bool]  # name, is_dir, descend
 
-def should_ignore(path: Path, ignore_tokens: Set[str]) -> bool:
-    """Return True if the path should be ignored according to the ignore tokens."""
-    for token in ignore_tokens:
-        if token and token in path.parts:
-            return True
-    # Ignore .pyc files
-    if path.is_file() and path.name.endswith(".pyc"):
-        return True
-    return False
+# Lists one directory given its path and its path relative to the root.
+TreeLister = Callable[[str, str], List[TreeEntry]]
 
 
-def _ascii_tree(root: Path, ignore_tokens: Set[str]) -> str:
+def list_entries(
+    directory: str, relative: str, matcher: GitIgnoreMatcher
+) -> List[TreeEntry]:
+    """Sorted entries kept in ``directory`` (``relative`` to the tree root).
+
+    ``DirEntry`` carries the file type from the directory listing, so no
+    entry needs its own ``stat`` unless it is a symlink.
+    """
+    entries: List[TreeEntry] = []
+    try:
+        with os.scandir(directory) as iterator:
+            for entry in iterator:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                entry_relative = f"{relative}/{entry.name}" if relative else entry.name
+                # Ignored directories are dropped here, before anything descends.
+                if matcher.is_ignored_relative(entry_relative, is_dir):
+                    continue
+                # Symlinked directories are listed but not followed (no cycles).
+                entries.append((entry.name, is_dir, is_dir and not entry.is_symlink()))
+    except OSError:
+        # Unreadable directories show up empty instead of failing the tree.
+        return []
+    entries.sort()
+    return entries
+
+
+def walk_files(root: Path) -> Iterator[tuple[str, str, os.stat_result]]:
+    """Yield (relative path, path, stat) of every file below ``root`` that is kept.
+
+    Ignored directories are pruned and symlinked ones are not followed.
+    """
+    matcher = ignore_matcher(root)
+    stack = [("", str(root))]
+    while stack:
+        relative, directory = stack.pop()
+        try:
+            with os.scandir(directory) as iterator:
+                entries = list(iterator)
+        except OSError:
+            continue
+        for entry in entries:
+            entry_relative = f"{relative}/{entry.name}" if relative else entry.name
+            try:
+                is_dir = entry.is_dir()
+                if matcher.is_ignored_relative(entry_relative, is_dir):
+                    continue
+                if is_dir:
+                    if not entry.is_symlink():
+                        stack.append((entry_relative, entry.path))
+                    continue
+                yield entry_relative, entry.path, entry.stat()
+            except OSError:
+                continue
+
+
+@final
+@dataclass(frozen=True)
+class TreeBudget:
+    """Bounds on a rendered tree; ``None`` leaves that dimension unbounded.
+
+    ``max_depth`` is the deepest level listed (1 = the root's entries),
+    ``max_entries_per_directory`` caps each listing and ``max_lines`` the
+    whole output. What is left out is summarised on one line.
+    """
+
+    max_depth: int | None = None
+    max_entries_per_directory: int | None = None
+    max_lines: int | None = None
+
+
+UNBOUNDED_TREE: Final[TreeBudget] = TreeBudget()
+
+
+def _plural(count: int, noun: str) -> str:
+    return f"{count:,} {noun}" if count == 1 else f"{count:,} {noun}s"
+
+
+def _summary(entries: Sequence[TreeEntry]) -> str:
+    """One line standing for ``entries``, e.g. ``… 4,212 files (3 dirs)``."""
+    dirs = sum(1 for _, is_dir, _ in entries if is_dir)
+    files = len(entries) - dirs
+    if files and dirs:
+        return f"… {_plural(files, 'file')} ({_plural(dirs, 'dir')})"
+    if dirs:
+        return f"… {_plural(dirs, 'dir')}"
+    return f"… {_plural(files, 'file')}"
+
+
+# One line of a tree, independent of how it is drawn:
+# depth, kind, name, detail, last, parent (relative to the root).
+# ``kind`` is "file", "dir", "collapsed" (a directory shown only as a
+# summary) or "summary" (entries left out); ``detail`` holds the summary.
+TreeRecord = tuple[int, str, str, str, bool, str]
+
+# "ascii" draws `tree`-style connectors; "indented" uses two spaces per
+# level; "grouped" puts each directory's entries on one line; "json" nests
+# objects for API clients.
+TreeFormat = Literal["ascii", "indented", "grouped", "json"]
+TREE_FORMATS: Final[tuple[TreeFormat, ...]] = get_args(TreeFormat)
+
+
+@final
+class _Frame:
+    """A directory being walked: its entries and where the walk is in them."""
+
+    __slots__ = ("entries", "index", "shown", "directory", "relative", "depth")
+
+    def __init__(
+        self,
+        directory: str,
+        relative: str,
+        depth: int,
+        lister: TreeLister,
+        budget: TreeBudget,
+    ) -> None:
+        self.entries = lister(directory, relative)
+        self.index = 0
+        self.shown = len(self.entries)
+        if budget.max_depth is not None and depth >= budget.max_depth:
+            self.shown = 0
+        elif budget.max_entries_per_directory is not None:
+            self.shown = min(self.shown, budget.max_entries_per_directory)
+        self.directory = directory
+        self.relative = relative
+        self.depth = depth
+
+
+def _walk(
+    root: Path, lister: TreeLister, budget: TreeBudget = UNBOUNDED_TREE
+) -> Iterator[TreeRecord]:
+    """Yield the records below ``root`` in display order.
+
+    The walk is iterative, so depth is only bounded by memory. Once
+    ``budget.max_lines`` is spent (the root counts as one line) the walk
+    stops; each directory still open gets one summary record.
+    """
+    lines = 1
+    stack = [_Frame(str(root), "", 0, lister, budget)]
+    while stack:
+        frame = stack[-1]
+        if frame.index == frame.shown:
+            hidden = frame.entries[frame.shown :]
+            if hidden:
+                yield (
+                    frame.depth + 1,
+                    "summary",
+                    "",
+                    _summary(hidden),
+                    True,
+                    frame.relative,
+                )
+                lines += 1
+            stack.pop()
+            continue
+        if budget.max_lines is not None and lines >= budget.max_lines:
+            for open_frame in reversed(stack):
+                rest = open_frame.entries[open_frame.index :]
+                if rest:
+                    yield (
+                        open_frame.depth + 1,
+                        "summary",
+                        "",
+                        _summary(rest),
+                        True,
+                        open_frame.relative,
+                    )
+            return
+        name, is_dir, descend = frame.entries[frame.index]
+        frame.index += 1
+        # Not last when a summary of hidden entries follows.
+        last = frame.index == len(frame.entries)
+        child_depth = frame.depth + 1
+        lines += 1
+        if descend and budget.max_depth is not None and child_depth >= budget.max_depth:
+            # Collapsed: one listing to count the contents, no descent.
+            relative = f"{frame.relative}/{name}" if frame.relative else name
+            contents = lister(os.path.join(frame.directory, name), relative)
+            detail = _summary(contents) if contents else ""
+            yield (child_depth, "collapsed", name, detail, last, frame.relative)
+            continue
+        yield (child_depth, "dir" if is_dir else "file", name, "", last, frame.relative)
+        if descend:
+            relative = f"{frame.relative}/{name}" if frame.relative else name
+            stack.append(
+                _Frame(
+                    os.path.join(frame.directory, name),
+                    relative,
+                    child_depth,
+                    lister,
+                    budget,
+                )
+            )
+
+
+def _record_text(kind: str, name: str, detail: str) -> str:
+    if kind == "summary":
+        return detail
+    if kind == "collapsed" and detail:
+        return f"{name} {detail}"
+    return name
+
+
+def _render_ascii(root_name: str, records: Iterable[TreeRecord]) -> str:
     """Return an ASCII‑art directory tree similar to the `tree` command."""
+    buffer = io.StringIO()
+    buffer.write(root_name)
+    # prefixes[depth - 1] is the indentation of lines at ``depth``.
+    prefixes = [""]
+    for depth, kind, name, detail, last, _ in records:
+        del prefixes[depth:]
+        prefix = prefixes[depth - 1]
+        buffer.write(os.linesep)
+        buffer.write(prefix)
+        buffer.write("└── " if last else "├── ")
+        buffer.write(_record_text(kind, name, detail))
+        if kind == "dir":
+            prefixes.append(prefix + ("    " if last else "│   "))
+    return buffer.getvalue()
+
+
+def _render_indented(root_name: str, records: Iterable[TreeRecord]) -> str:
+    """Two spaces per level, directories marked by a trailing ``/``."""
+    buffer = io.StringIO()
+    buffer.write(f"{root_name}/")
+    for depth, kind, name, detail, _, _ in records:
+        buffer.write(os.linesep)
+        buffer.write("  " * (depth - 1))
+        if kind == "summary":
+            buffer.write(detail)
+        elif kind == "file":
+            buffer.write(name)
+        else:
+            buffer.write(f"{name}/ {detail}" if detail else f"{name}/")
+    return buffer.getvalue()
 
-    lines: List[str] = []
-    prefix_stack: List[str] = []
 
-    def _walk(current: Path, level: int) -> None:  # noqa: ANN001
-        entries: List[Path] = sorted(
-            p for p in current.iterdir() if not should_ignore(p, ignore_tokens)
-        )
-        for index, entry in enumerate(entries):
-            connector = "└── " if index == len(entries) - 1 else "├── "
-            lines.append("".join(prefix_stack) + connector + entry.name)
-            if entry.is_dir():
-                prefix_stack.append("    " if index == len(entries) - 1 else "│   ")
-                _walk(entry, level + 1)
-                prefix_stack.pop()
+def _render_grouped(root_name: str, records: Iterable[TreeRecord]) -> str:
+    """One ``dir/: a.py b.py sub/`` line per directory, parents first."""
+    groups: dict[str, list[str]] = {"": []}
+    for _, kind, name, detail, _, parent in records:
+        tokens = groups.get(parent)
+        if tokens is None:
+            tokens = groups[parent] = []
+        if kind == "file":
+            tokens.append(name)
+        elif kind == "summary":
+            tokens.append(f"[{detail}]")
+        else:
+            tokens.append(f"{name}/[{detail}]" if detail else f"{name}/")
+    return os.linesep.join(
+        f"{parent or root_name}/:" + "".join(f" {token}" for token in tokens)
+        for parent, tokens in groups.items()
+    )
 
-    lines.append(root.name)
-    _walk(root, 0)
-    return os.linesep.join(lines)
+
+def _render_json(root_name: str, records: Iterable[TreeRecord]) -> str:
+    """Nested objects: files are strings, directories ``{"name", "children"}``."""
+    root: dict[str, object] = {"name": root_name, "children": []}
+    # containers[depth - 1] receives the entries at ``depth``.
+    containers: list[list[object]] = [cast(list, root["children"])]
+    for depth, kind, name, detail, _, _ in records:
+        del containers[depth:]
+        container = containers[depth - 1]
+        if kind == "file":
+            container.append(name)
+        elif kind == "dir":
+            children: list[object] = []
+            container.append({"name": name, "children": children})
+            containers.append(children)
+        elif kind == "collapsed":
+            container.append({"name": name, "summary": detail})
+        else:
+            container.append({"summary": detail})
+    return json.dumps(root, ensure_ascii=False, separators=(",", ":"))
+
+
+_RENDERERS: Final[dict[str, Callable[[str, Iterable[TreeRecord]], str]]] = {
+    "ascii": _render_ascii,
+    "indented": _render_indented,
+    "grouped": _render_grouped,
+    "json": _render_json,
+}
+
+
+def _file_system_lister(root: Path) -> TreeLister:
+    matcher = ignore_matcher(root)
+    return lambda directory, relative: list_entries(directory, relative, matcher)
 
 
 # The port‑friendly façade
 
 
-def build_tree(root: Path) -> Result[str, str]:
+def build_tree(
+    root: Path,
+    budget: TreeBudget = UNBOUNDED_TREE,
+    tree_format: TreeFormat = "ascii",
+) -> Result[str, str]:
+    if not root.exists():
+        return Err(f"Directory not found: {root}")
+    renderer = _RENDERERS.get(tree_format)
+    if renderer is None:
+        return Err(f"Unknown tree format: {tree_format}")
+    return Ok(renderer(root.name, _walk(root, _file_system_lister(root), budget)))
+
+
+def build_tree_formats(
+    root: Path, budget: TreeBudget = UNBOUNDED_TREE
+) -> Result[dict[TreeFormat, str], str]:
+    """Render every format from a single walk, e.g. to compare their sizes."""
     if not root.exists():
         return Err(f"Directory not found: {root}")
-    ignore_tokens = get_ignore_tokens(root)
-    tree_repr = _ascii_tree(root, ignore_tokens)
-    return Ok(tree_repr)
+    records = list(_walk(root, _file_system_lister(root), budget))
+    return Ok({fmt: _RENDERERS[fmt](root.name, records) for fmt in TREE_FORMATS})
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final
+from typing_extensions import final
+
+from .result import Err, Ok, Result
+
+# (mtime_ns, size, inode): any write, truncate or replace changes one of them.
+StatFingerprint = tuple[int, int, int]
+
+
+def fingerprint(stat_result: os.stat_result) -> StatFingerprint:
+    return (stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+
+
+# Below this size a plain read() beats setting up a mapping.
+MMAP_THRESHOLD: Final[int] = 256 * 1024
+
+
+def decode_text(data: bytes | memoryview) -> str:
+    """Decode file bytes the one way the whole application reads text files.
+
+    UTF-8 first, undecodable bytes replaced, and newlines normalised to ``\\n``
+    exactly like text-mode ``open`` does.
+    """
+    try:
+        text = str(data, "utf-8")
+    except UnicodeDecodeError:
+        text = str(data, "utf-8", errors="replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _read_and_decode(path: str) -> tuple[StatFingerprint, str]:
+    with open(path, "rb") as handle:
+        # Key on the descriptor we actually read from, not the earlier stat.
+        stat_result = os.fstat(handle.fileno())
+        if stat_result.st_size < MMAP_THRESHOLD:
+            return fingerprint(stat_result), decode_text(handle.read())
+        # Decode straight from the page cache instead of copying into bytes.
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                return fingerprint(stat_result), decode_text(view)
+
+
+@final
+@dataclass(frozen=True)
+class FileCacheStats:
+    hits: int
+    misses: int
+    entries: int
+    cached_chars: int
+
+
+@final
+class FileContentCache:
+    """Process-wide LRU of decoded file contents, validated against ``stat``.
+
+    An entry is served only while the file's (mtime_ns, size, inode) is
+    unchanged, so callers always get the current content without re-reading
+    and re-decoding files nobody touched.
+    """
+
+    __slots__ = (
+        "_entries",
+        "_max_chars",
+        "_max_entry_chars",
+        "_cached_chars",
+        "_hits",
+        "_misses",
+        "_lock",
+    )
+
+    def __init__(
+        self, max_chars: int = 64 * 1024 * 1024, max_entry_chars: int | None = None
+    ) -> None:
+        self._entries: OrderedDict[str, tuple[StatFingerprint, str]] = OrderedDict()
+        self._max_chars = max_chars
+        self._max_entry_chars = (
+            max_entry_chars if max_entry_chars is not None else max_chars // 4
+        )
+        self._cached_chars = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def read_text(self, path: Path) -> Result[str, str]:
+        key = os.path.abspath(path)
+        try:
+            current = fingerprint(os.stat(key))
+        except OSError as exc:
+            return Err(str(exc))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == current:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return Ok(entry[1])
+            self._misses += 1
+
+        try:
+            read_fingerprint, text = _read_and_decode(key)
+        except (OSError, ValueError) as exc:
+            return Err(str(exc))
+        self._store(key, read_fingerprint, text)
+        return Ok(text)
+
+    def _store(self, key: str, stamp: StatFingerprint, text: str) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._cached_chars -= len(previous[1])
+            if len(text) > self._max_entry_chars:
+                return
+            self._entries[key] = (stamp, text)
+            self._cached_chars += len(text)
+            while self._cached_chars > self._max_chars and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._cached_chars -= len(evicted)
+
+    def invalidate(self, path: Path | None = None) -> None:
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._cached_chars = 0
+                return
+            previous = self._entries.pop(os.path.abspath(path), None)
+            if previous is not None:
+                self._cached_chars -= len(previous[1])
+
+    def stats(self) -> FileCacheStats:
+        with self._lock:
+            return FileCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                entries=len(self._entries),
+                cached_chars=self._cached_chars,
+            )
+
+
+FILE_CONTENT_CACHE: Final[FileContentCache] = FileContentCache()
+
+
+def read_text_file(path: Path) -> Result[str, str]:
+    """Read ``path`` through the shared :data:`FILE_CONTENT_CACHE`."""
+    return FILE_CONTENT_CACHE.read_text(path)
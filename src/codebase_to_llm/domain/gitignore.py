@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Final, Iterable, Iterator
+from typing_extensions import final
+
+from .file_cache import StatFingerprint, fingerprint
+
+GITIGNORE_NAME: Final[str] = ".gitignore"
+
+
+@final
+@dataclass(frozen=True)
+class IgnoreRule:
+    """One compiled .gitignore line, matched against paths relative to its file."""
+
+    pattern: str
+    regex: re.Pattern[str]
+    negated: bool
+    directory_only: bool
+
+    def matches(self, relative_path: str, is_dir: bool) -> bool:
+        if self.directory_only and not is_dir:
+            return False
+        return self.regex.match(relative_path) is not None
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob into a regex body (``/`` separated paths)."""
+    parts: list[str] = []
+    index, length = 0, len(pattern)
+    while index < length:
+        char = pattern[index]
+        if char == "*":
+            segment_start = index == 0 or pattern[index - 1] == "/"
+            if segment_start and pattern.startswith("**/", index):
+                parts.append("(?:.*/)?")
+                index += 3
+                continue
+            if (
+                segment_start
+                and pattern.startswith("**", index)
+                and index + 2 == length
+            ):
+                parts.append(".*")
+                index += 2
+                continue
+            while index < length and pattern[index] == "*":
+                index += 1
+            parts.append("[^/]*")
+            continue
+        if char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            close = pattern.find("]", index + 2)
+            if close == -1:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[index + 1 : close]
+                if body[:1] in ("!", "^"):
+                    body = "^" + body[1:]
+                parts.append("[" + body.replace("\\", "\\\\") + "]")
+                index = close
+        elif char == "\\" and index + 1 < length:
+            index += 1
+            parts.append(re.escape(pattern[index]))
+        else:
+            parts.append(re.escape(char))
+        index += 1
+    return "".join(parts)
+
+
+def compile_rule(line: str) -> IgnoreRule | None:
+    """Compile one .gitignore line; ``None`` for blanks and comments."""
+    line = line.rstrip("\n\r")
+    if not line.strip() or line.startswith("#"):
+        return None
+    # Trailing spaces are ignored unless escaped.
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    pattern = stripped
+    negated = pattern.startswith("!")
+    if negated:
+        pattern = pattern[1:]
+    elif pattern.startswith("\\!") or pattern.startswith("\\#"):
+        pattern = pattern[1:]
+    directory_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    if not pattern:
+        return None
+    # A slash anywhere but the end anchors the pattern to the file's directory.
+    anchored = "/" in pattern
+    body = _translate(pattern.lstrip("/"))
+    prefix = "" if anchored else "(?:.*/)?"
+    return IgnoreRule(
+        pattern=stripped,
+        regex=re.compile(f"{prefix}{body}\\Z", re.DOTALL),
+        negated=negated,
+        directory_only=directory_only,
+    )
+
+
+def parse_gitignore(text: str) -> tuple[IgnoreRule, ...]:
+    rules = (compile_rule(line) for line in text.splitlines())
+    return tuple(rule for rule in rules if rule is not None)
+
+
+def _combine(rules: Iterable[IgnoreRule]) -> re.Pattern[str] | None:
+    patterns = [f"(?:{rule.regex.pattern})" for rule in rules]
+    return re.compile("|".join(patterns), re.DOTALL) if patterns else None
+
+
+@final
+class IgnoreRules:
+    """The rules of one ignore file, with a combined regex for the no-match case.
+
+    Most paths match no rule at all; that answer costs one regex call instead
+    of one per rule.
+    """
+
+    __slots__ = ("rules", "_any_for_dirs", "_any_for_files", "_has_negation")
+
+    def __init__(self, rules: tuple[IgnoreRule, ...]) -> None:
+        self.rules = rules
+        self._any_for_dirs = _combine(rules)
+        self._any_for_files = _combine(r for r in rules if not r.directory_only)
+        self._has_negation = any(rule.negated for rule in rules)
+
+    def decide(self, relative_path: str, is_dir: bool) -> bool | None:
+        """Outcome of the last matching rule, or ``None`` when none matches."""
+        combined = self._any_for_dirs if is_dir else self._any_for_files
+        if combined is None or combined.match(relative_path) is None:
+            return None
+        if not self._has_negation:
+            return True
+        for rule in reversed(self.rules):
+            if rule.matches(relative_path, is_dir):
+                return not rule.negated
+        return None
+
+
+_NO_RULES: Final[IgnoreRules] = IgnoreRules(())
+
+
+@lru_cache(maxsize=1024)
+def _load_gitignore(path: str, stamp: StatFingerprint) -> IgnoreRules:
+    # The stamp is only part of the cache key: edited files get recompiled.
+    try:
+        with open(path, encoding="utf-8", errors="ignore") as handle:
+            return IgnoreRules(parse_gitignore(handle.read()))
+    except OSError:
+        return _NO_RULES
+
+
+def _rules_in(directory: Path) -> IgnoreRules:
+    path = os.path.join(directory, GITIGNORE_NAME)
+    try:
+        stamp = fingerprint(os.stat(path))
+    except OSError:
+        return _NO_RULES
+    return _load_gitignore(path, stamp)
+
+
+# Ignore files in effect for a directory, with the offset at which paths
+# below it become relative to each file's own directory.
+_Scopes = tuple[tuple[int, IgnoreRules], ...]
+
+
+@final
+class GitIgnoreMatcher:
+    """Decide which paths under ``root`` are ignored, the way git does.
+
+    Built-in ``default_patterns`` come first, then every .gitignore from
+    ``root`` down to the entry's directory; the last matching rule wins and
+    ``!`` rules re-include. Rules are compiled once per .gitignore file.
+    """
+
+    __slots__ = ("_root", "_defaults", "_scopes")
+
+    def __init__(self, root: Path, default_patterns: Iterable[str] = ()) -> None:
+        self._root = Path(os.path.abspath(root))
+        self._defaults = IgnoreRules(parse_gitignore("\n".join(default_patterns)))
+        self._scopes: dict[str, _Scopes] = {}
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def _scopes_for(self, directory: str) -> _Scopes:
+        scopes = self._scopes.get(directory)
+        if scopes is not None:
+            return scopes
+        missing = [directory]
+        parent = directory
+        while parent:
+            parent = parent.rpartition("/")[0]
+            if parent in self._scopes:
+                break
+            missing.append(parent)
+        for current in reversed(missing):
+            inherited = self._scopes[current.rpartition("/")[0]] if current else ()
+            rules = _rules_in(self._root / current)
+            offset = len(current) + 1 if current else 0
+            self._scopes[current] = (
+                inherited + ((offset, rules),) if rules.rules else inherited
+            )
+        return self._scopes[directory]
+
+    def _relative(self, path: Path) -> str | None:
+        relative = os.path.relpath(os.path.abspath(path), self._root)
+        if relative in (".", "..") or relative.startswith(".." + os.sep):
+            return None
+        return relative.replace(os.sep, "/")
+
+    def _matches(self, relative_path: str, is_dir: bool) -> bool:
+        ignored = bool(self._defaults.decide(relative_path, is_dir))
+        for offset, rules in self._scopes_for(relative_path.rpartition("/")[0]):
+            decision = rules.decide(relative_path[offset:], is_dir)
+            if decision is not None:
+                ignored = decision
+        return ignored
+
+    def is_ignored_relative(self, relative_path: str, is_dir: bool) -> bool:
+        """Like :meth:`is_ignored` for a ``/``-separated path relative to ``root``."""
+        return self._matches(relative_path, is_dir)
+
+    def is_ignored(self, path: Path, is_dir: bool) -> bool:
+        """Tell whether the entry ``path`` itself is ignored.
+
+        Parent directories are not checked: walkers prune ignored directories
+        before descending, so their children are never asked about.
+        """
+        relative = self._relative(path)
+        if relative is None:
+            return False
+        return self._matches(relative, is_dir)
+
+    def is_ignored_path(self, path: Path) -> bool:
+        """Like :meth:`is_ignored`, but also true inside an ignored directory."""
+        relative = self._relative(path)
+        if relative is None:
+            return False
+        parts = relative.split("/")
+        for depth in range(1, len(parts)):
+            if self._matches("/".join(parts[:depth]), True):
+                return True
+        return self._matches(relative, os.path.isdir(path))
+
+    def iter_files(self, directory: Path) -> Iterator[Path]:
+        """Yield the files below ``directory`` that are not ignored, pruning as it goes."""
+        for current, dirs, files in os.walk(directory):
+            current_path = Path(current)
+            dirs[:] = [
+                name
+                for name in dirs
+                if not self.is_ignored(current_path / name, is_dir=True)
+            ]
+            for name in files:
+                file_path = current_path / name
+                if not self.is_ignored(file_path, is_dir=False):
+                    yield file_path
@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import ast
+import hashlib
+import os
+import posixpath
+import re
+import threading
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Final
+from typing_extensions import final
+
+from .context_packing import count_tokens
+from .directory_tree import walk_files
+from .file_cache import StatFingerprint, decode_text, fingerprint
+from .result import Err, Ok, Result
+from .root_refresh import BackgroundRefresh, RootRegistry, is_racy
+
+_PYTHON_SUFFIXES: Final[frozenset[str]] = frozenset({".py", ".pyi"})
+_SCRIPT_SUFFIXES: Final[tuple[str, ...]] = (
+    ".ts",
+    ".tsx",
+    ".js",
+    ".jsx",
+    ".mjs",
+    ".cjs",
+)
+_MAX_PARSED_BYTES: Final[int] = 1024 * 1024
+
+# import x from "./a"; export * from "./b"; import("./c"); require("./d")
+_SCRIPT_IMPORT_RE: Final = re.compile(
+    r"""(?:\bfrom\s*|\bimport\s*\(?\s*|\brequire\s*\(\s*)["']([^"'\n]+)["']"""
+)
+
+# module, level (leading dots), imported names; scripts use (specifier, 0, ()).
+Import = tuple[str, int, tuple[str, ...]]
+
+# Parsed imports and token estimate per content hash: renamed, copied or
+# reverted files are not parsed again.
+_PARSE_CACHE_SIZE: Final[int] = 16_384
+_parse_cache: OrderedDict[bytes, tuple[tuple[Import, ...], int]] = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+
+def python_imports(text: str) -> tuple[Import, ...]:
+    """Imports of a Python module; empty when it does not parse."""
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return ()
+    imports: list[Import] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend((alias.name, 0, ()) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            names = tuple(alias.name for alias in node.names if alias.name != "*")
+            imports.append((node.module or "", node.level, names))
+    return tuple(imports)
+
+
+def script_imports(text: str) -> tuple[Import, ...]:
+    """Module specifiers imported or required by a JS/TS file."""
+    return tuple(
+        (specifier, 0, ())
+        for specifier in dict.fromkeys(_SCRIPT_IMPORT_RE.findall(text))
+    )
+
+
+def _parse(relative: str, data: bytes) -> tuple[tuple[Import, ...], int]:
+    key = hashlib.blake2b(data, digest_size=16).digest()
+    with _parse_cache_lock:
+        cached = _parse_cache.get(key)
+        if cached is not None:
+            _parse_cache.move_to_end(key)
+            return cached
+    text = decode_text(data)
+    is_python = posixpath.splitext(relative)[1] in _PYTHON_SUFFIXES
+    parsed = (
+        python_imports(text) if is_python else script_imports(text),
+        count_tokens(text),
+    )
+    with _parse_cache_lock:
+        _parse_cache[key] = parsed
+        if len(_parse_cache) > _PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+    return parsed
+
+
+def _is_source(relative: str) -> bool:
+    suffix = posixpath.splitext(relative)[1]
+    return suffix in _PYTHON_SUFFIXES or suffix in _SCRIPT_SUFFIXES
+
+
+@final
+class _Source:
+    __slots__ = ("stamp", "imports", "tokens")
+
+    def __init__(
+        self, stamp: StatFingerprint | None, imports: tuple[Import, ...], tokens: int
+    ) -> None:
+        self.stamp = stamp
+        self.imports = imports
+        self.tokens = tokens
+
+
+def _module_names(paths: list[str]) -> dict[str, list[str]]:
+    """Dotted module name -> files, following ``__init__.py`` package chains."""
+    packages = {
+        posixpath.dirname(path)
+        for path in paths
+        if posixpath.basename(path) == "__init__.py"
+    }
+    modules: dict[str, list[str]] = {}
+    for path in paths:
+        directory, name = posixpath.split(path)
+        stem = posixpath.splitext(name)[0]
+        parts = [] if stem == "__init__" else [stem]
+        while directory in packages:
+            directory, package = posixpath.split(directory)
+            parts.append(package)
+        if parts:
+            modules.setdefault(".".join(reversed(parts)), []).append(path)
+    return modules
+
+
+def _add_path_suffixes(modules: dict[str, list[str]], paths: list[str]) -> None:
+    """Also name files by the dotted tails of their paths.
+
+    This resolves namespace packages (no ``__init__.py``) and ``src``
+    layouts. Single-part tails are left out: they would match any file of
+    that name anywhere in the tree.
+    """
+    suffixes: dict[str, list[str]] = {}
+    for path in paths:
+        parts = posixpath.splitext(path)[0].split("/")
+        if parts[-1] == "__init__":
+            parts.pop()
+        for start in range(len(parts) - 1):
+            suffixes.setdefault(".".join(parts[start:]), []).append(path)
+    for name, files in suffixes.items():
+        modules.setdefault(name, files)
+
+
+def _closest(candidates: list[str], importer: str) -> str:
+    """The candidate sharing the longest directory prefix with ``importer``."""
+    if len(candidates) == 1:
+        return candidates[0]
+    return max(
+        candidates,
+        key=lambda path: (
+            len(posixpath.commonprefix([posixpath.dirname(path), importer])),
+            -len(path),
+        ),
+    )
+
+
+@final
+class ImportGraph:
+    """Local import edges between the Python and JS/TS files of one root.
+
+    :meth:`refresh` re-reads only files whose stat fingerprint changed, and
+    parses only contents not seen before; edges are then resolved from the
+    cached imports, so :meth:`dependencies` answers without reading files.
+    """
+
+    __slots__ = (
+        "_root",
+        "_lock",
+        "_refresh_lock",
+        "_sources",
+        "_edges",
+        "_ready",
+        "_background",
+    )
+
+    def __init__(self, root: Path) -> None:
+        self._root = Path(os.path.abspath(root))
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._sources: dict[str, _Source] = {}
+        self._edges: dict[str, tuple[str, ...]] = {}
+        self._ready = False
+        self._background = BackgroundRefresh(self.refresh, "import-graph-refresh")
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def ready(self) -> bool:
+        return self._ready
+
+    def refresh(self) -> None:
+        with self._refresh_lock:
+            with self._lock:
+                known = {path: source.stamp for path, source in self._sources.items()}
+            sources: dict[str, _Source] = {}
+            changed = False
+            for relative, full_path, stat_result in walk_files(self._root):
+                if not _is_source(relative):
+                    continue
+                stamp = fingerprint(stat_result)
+                if relative in known and known[relative] == stamp:
+                    sources[relative] = self._sources[relative]
+                    continue
+                source = self._read(full_path)
+                if source is not None:
+                    sources[relative] = source
+                    changed = True
+            changed = changed or len(sources) != len(known)
+            edges = self._resolve(sources) if changed or not self._ready else None
+            with self._lock:
+                self._sources = sources
+                if edges is not None:
+                    self._edges = edges
+                self._ready = True
+            self._background.mark_refreshed()
+
+    def refresh_in_background(self, min_interval: float = 5.0) -> None:
+        """Start a refresh thread unless one runs or the last one is recent."""
+        self._background.start(min_interval)
+
+    @staticmethod
+    def _read(full_path: str) -> _Source | None:
+        try:
+            with open(full_path, "rb") as handle:
+                stat_result = os.fstat(handle.fileno())
+                data = handle.read(_MAX_PARSED_BYTES + 1)
+        except OSError:
+            return None
+        stamp: StatFingerprint | None = fingerprint(stat_result)
+        if is_racy(stat_result.st_mtime_ns):
+            stamp = None
+        if len(data) > _MAX_PARSED_BYTES:
+            return _Source(stamp, (), stat_result.st_size // 4)
+        imports, tokens = _parse(full_path, data)
+        return _Source(stamp, imports, tokens)
+
+    def _resolve(self, sources: dict[str, _Source]) -> dict[str, tuple[str, ...]]:
+        paths = sorted(sources)
+        python_paths = [
+            p for p in paths if posixpath.splitext(p)[1] in _PYTHON_SUFFIXES
+        ]
+        modules = _module_names(python_paths)
+        module_of = {
+            path: module for module, files in modules.items() for path in files
+        }
+        _add_path_suffixes(modules, python_paths)
+        known = set(paths)
+        edges: dict[str, tuple[str, ...]] = {}
+        for path in paths:
+            is_python = posixpath.splitext(path)[1] in _PYTHON_SUFFIXES
+            targets: dict[str, None] = {}
+            for imported in sources[path].imports:
+                if is_python:
+                    resolved = self._resolve_python(
+                        path, imported, modules, module_of.get(path)
+                    )
+                else:
+                    resolved = self._resolve_script(path, imported[0], known)
+                for target in resolved:
+                    if target != path:
+                        targets[target] = None
+            edges[path] = tuple(targets)
+        return edges
+
+    @staticmethod
+    def _resolve_python(
+        importer: str,
+        imported: Import,
+        modules: dict[str, list[str]],
+        importer_module: str | None,
+    ) -> list[str]:
+        module, level, names = imported
+        if level:
+            package = importer_module
+            if package is None:
+                return []
+            if posixpath.basename(importer) != "__init__.py":
+                package = package.rpartition(".")[0]
+            for _ in range(level - 1):
+                package = package.rpartition(".")[0]
+            module = f"{package}.{module}" if package and module else package or module
+        resolved: list[str] = []
+        # ``from pkg import name`` may name a submodule rather than an attribute.
+        submodules = [
+            modules[f"{module}.{name}"]
+            for name in names
+            if module and f"{module}.{name}" in modules
+        ]
+        for candidates in submodules:
+            resolved.append(_closest(candidates, importer))
+        if len(submodules) < len(names) or not names:
+            target = module
+            while target and target not in modules:
+                target = target.rpartition(".")[0]
+            if target:
+                resolved.append(_closest(modules[target], importer))
+        return resolved
+
+    @staticmethod
+    def _resolve_script(importer: str, specifier: str, known: set[str]) -> list[str]:
+        if not specifier.startswith("."):
+            return []  # packages and path aliases are not local files
+        base = posixpath.normpath(
+            posixpath.join(posixpath.dirname(importer), specifier)
+        )
+        candidates = [base]
+        candidates += [base + suffix for suffix in _SCRIPT_SUFFIXES]
+        candidates += [f"{base}/index{suffix}" for suffix in _SCRIPT_SUFFIXES]
+        for candidate in candidates:
+            if candidate in known:
+                return [candidate]
+        return []
+
+    def dependencies(
+        self,
+        path: Path,
+        max_depth: int | None = 2,
+        token_budget: int | None = None,
+    ) -> Result[list[Path], str]:
+        """Local files ``path`` imports, transitively, nearest first.
+
+        ``max_depth`` bounds the import hops (1 = direct imports only). With
+        ``token_budget``, files that would push the total (``path`` itself
+        included) over it are left out, along with what only they import.
+        """
+        relative = os.path.relpath(os.path.abspath(path), self._root)
+        if relative == ".." or relative.startswith(".." + os.sep):
+            return Err(f"{path} is outside {self._root}")
+        relative = relative.replace(os.sep, "/")
+        if not self._ready:
+            self.refresh()
+        with self._lock:
+            edges = self._edges
+            sources = self._sources
+        if relative not in sources:
+            return Err(f"Not a Python or JS/TS source file: {path}")
+        used = sources[relative].tokens
+        seen = {relative}
+        ordered: list[Path] = []
+        queue: deque[tuple[str, int]] = deque([(relative, 0)])
+        while queue:
+            current, depth = queue.popleft()
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for target in edges.get(current, ()):
+                if target in seen:
+                    continue
+                seen.add(target)
+                tokens = sources[target].tokens
+                if token_budget is not None and used + tokens > token_budget:
+                    continue
+                used += tokens
+                ordered.append(self._root / target)
+                queue.append((target, depth + 1))
+        return Ok(ordered)
+
+
+_graphs: Final[RootRegistry[ImportGraph]] = RootRegistry(ImportGraph, max_roots=4)
+
+
+def import_graph_for(root: Path) -> ImportGraph:
+    """Return the shared import graph of ``root``, keeping the most recent roots."""
+    return _graphs.get(root)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import os
+import stat
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final, Literal
+from typing_extensions import final
+
+from .context_buffer import File
+from .file_cache import decode_text
+from .result import Err, Ok, Result
+
+IngestionAction = Literal["include", "stub", "truncate", "skip"]
+
+_SNIFF_BYTES: Final[int] = 8 * 1024
+
+LOCKFILE_NAMES: Final[frozenset[str]] = frozenset(
+    {
+        "package-lock.json",
+        "npm-shrinkwrap.json",
+        "yarn.lock",
+        "pnpm-lock.yaml",
+        "poetry.lock",
+        "Pipfile.lock",
+        "uv.lock",
+        "pdm.lock",
+        "Cargo.lock",
+        "Gemfile.lock",
+        "composer.lock",
+        "go.sum",
+        "mix.lock",
+        "pubspec.lock",
+        "packages.lock.json",
+    }
+)
+
+_MINIFIED_SUFFIXES: Final[tuple[str, ...]] = (
+    ".min.js",
+    ".min.css",
+    ".js.map",
+    ".css.map",
+)
+
+
+def human_size(size: int) -> str:
+    if size < 1024:
+        return f"{size} B"
+    value = size / 1024
+    for unit in ("KB", "MB"):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
+
+
+@final
+@dataclass(frozen=True)
+class IngestionDecision:
+    """What ingestion does with one file, and why."""
+
+    path: Path
+    action: IngestionAction
+    reason: str
+    size: int
+
+
+@final
+@dataclass(frozen=True)
+class IngestionPolicy:
+    """Thresholds for deciding how a file enters the context buffer.
+
+    Decisions only look at ``stat`` and the first few KiB of the file, so
+    whole directories can be triaged without reading them.
+    """
+
+    max_file_bytes: int = 512 * 1024
+    max_average_line_length: int = 1000
+    skip_lockfiles: bool = True
+    skip_minified: bool = True
+
+    def triage(self, path: Path) -> Result[IngestionDecision, str]:
+        try:
+            # Stat first: opening a FIFO or device could block or never end.
+            stat_result = os.stat(path)
+            if not stat.S_ISREG(stat_result.st_mode):
+                return Err(f"Not a regular file: {path}")
+            with open(path, "rb") as handle:
+                head = handle.read(_SNIFF_BYTES)
+        except OSError as exc:
+            return Err(str(exc))
+        return Ok(self._decide(path, stat_result.st_size, head))
+
+    def _decide(self, path: Path, size: int, head: bytes) -> IngestionDecision:
+        name = path.name
+        if b"\0" in head:
+            return IngestionDecision(path, "stub", f"binary, {human_size(size)}", size)
+        if self.skip_lockfiles and name in LOCKFILE_NAMES:
+            return IngestionDecision(path, "skip", "lockfile", size)
+        if self.skip_minified and _looks_minified(
+            name, head, self.max_average_line_length
+        ):
+            return IngestionDecision(path, "skip", "minified", size)
+        if size > self.max_file_bytes:
+            return IngestionDecision(
+                path,
+                "truncate",
+                f"first {human_size(self.max_file_bytes)} of {human_size(size)}",
+                size,
+            )
+        return IngestionDecision(path, "include", "", size)
+
+    def ingest(self, path: Path) -> Result[tuple[IngestionDecision, File | None], str]:
+        """Triage ``path`` and build the buffer entry; ``None`` when skipped."""
+        decision_result = self.triage(path)
+        if decision_result.is_err():
+            return Err(decision_result.err() or "Unknown error")
+        decision = decision_result.ok()
+        assert decision is not None
+        if decision.action == "skip":
+            return Ok((decision, None))
+        if decision.action == "stub":
+            return Ok((decision, File(path, f"[{decision.reason}]")))
+        if decision.action == "truncate":
+            head_result = _read_head(path, self.max_file_bytes)
+            if head_result.is_err():
+                return Err(head_result.err() or "Unknown error")
+            head = head_result.ok() or ""
+            return Ok((decision, File(path, f"{head}[... {decision.reason} ...]")))
+        file_result = File.try_from_path(path)
+        if file_result.is_err():
+            return Err(file_result.err() or "Unknown error")
+        return Ok((decision, file_result.ok()))
+
+
+def _looks_minified(name: str, head: bytes, max_average_line_length: int) -> bool:
+    if name.endswith(_MINIFIED_SUFFIXES):
+        return True
+    if len(head) < _SNIFF_BYTES:
+        # Small files are cheap whatever their shape.
+        return False
+    return len(head) / (head.count(b"\n") + 1) > max_average_line_length
+
+
+def _read_head(path: Path, max_bytes: int) -> Result[str, str]:
+    try:
+        with open(path, "rb") as handle:
+            data = handle.read(max_bytes)
+    except OSError as exc:
+        return Err(str(exc))
+    # Cut at the last full line so no character or line is split.
+    cut = data.rfind(b"\n")
+    if cut != -1:
+        data = data[: cut + 1]
+    return Ok(decode_text(data))
+
+
+DEFAULT_INGESTION_POLICY: Final[IngestionPolicy] = IngestionPolicy()
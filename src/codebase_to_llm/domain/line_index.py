@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import BinaryIO, Final
+from typing_extensions import final
+
+from .file_cache import MMAP_THRESHOLD, StatFingerprint, decode_text, fingerprint
+from .result import Err, Ok, Result
+
+
+def _scan_line_offsets(handle: BinaryIO, size: int) -> array[int]:
+    """Byte offset of every line start, plus ``size`` as the final sentinel."""
+    offsets = array("Q", [0])
+    if size == 0:
+        return offsets
+    if size < MMAP_THRESHOLD:
+        data: bytes | mmap.mmap = handle.read()
+    else:
+        data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        position = data.find(b"\n")
+        while position != -1:
+            offsets.append(position + 1)
+            position = data.find(b"\n", position + 1)
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+    if offsets[-1] != size:
+        # Last line without a trailing newline.
+        offsets.append(size)
+    return offsets
+
+
+@final
+class LineIndexCache:
+    """Per-file line-offset indexes, validated against ``stat`` like file contents.
+
+    With the index a line range is one ``seek`` and one ``read`` of exactly
+    the bytes needed, however large the file is.
+    """
+
+    __slots__ = ("_entries", "_max_offsets", "_cached_offsets", "_lock")
+
+    def __init__(self, max_offsets: int = 4 * 1024 * 1024) -> None:
+        self._entries: OrderedDict[str, tuple[StatFingerprint, array[int]]] = (
+            OrderedDict()
+        )
+        self._max_offsets = max_offsets
+        self._cached_offsets = 0
+        self._lock = threading.Lock()
+
+    def _offsets(
+        self, key: str, handle: BinaryIO, stamp: StatFingerprint, size: int
+    ) -> array[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        offsets = _scan_line_offsets(handle, size)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._cached_offsets -= len(previous[1])
+            self._entries[key] = (stamp, offsets)
+            self._cached_offsets += len(offsets)
+            while self._cached_offsets > self._max_offsets and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._cached_offsets -= len(evicted)
+        return offsets
+
+    def read_lines(self, path: Path, start: int, end: int) -> Result[str, str]:
+        """Return lines ``start`` to ``end`` (1-based, inclusive) of ``path``."""
+        key = os.path.abspath(path)
+        try:
+            with open(key, "rb") as handle:
+                # Index and read from the same descriptor so they always agree.
+                stat_result = os.fstat(handle.fileno())
+                offsets = self._offsets(
+                    key, handle, fingerprint(stat_result), stat_result.st_size
+                )
+                line_count = len(offsets) - 1
+                first = max(start, 1) - 1
+                last = min(end, line_count)
+                if first >= last:
+                    return Ok("")
+                handle.seek(offsets[first])
+                data = handle.read(offsets[last] - offsets[first])
+        except (OSError, ValueError) as exc:
+            return Err(str(exc))
+        return Ok(decode_text(data))
+
+    def invalidate(self, path: Path | None = None) -> None:
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._cached_offsets = 0
+                return
+            previous = self._entries.pop(os.path.abspath(path), None)
+            if previous is not None:
+                self._cached_offsets -= len(previous[1])
+
+
+LINE_INDEX_CACHE: Final[LineIndexCache] = LineIndexCache()
+
+
+def read_line_range(path: Path, start: int, end: int) -> Result[str, str]:
+    """Read a line range of ``path`` through the shared :data:`LINE_INDEX_CACHE`."""
+    return LINE_INDEX_CACHE.read_lines(path, start, end)
+
+
+# Line starts of a paged file are found this many bytes at a time, so
+# showing its first lines never waits for the rest to be indexed.
+PAGE_INDEX_CHUNK: Final[int] = 1024 * 1024
+
+
+@final
+class PagedTextFile:
+    """A read-only, memory-mapped text file read a page of lines at a time.
+
+    Opening maps the file without reading it. Line starts are indexed a
+    chunk at a time, only as far as the lines asked for or, with
+    :meth:`index_in_background`, on a daemon thread, so even files of
+    hundreds of MB open at once. Line numbers are absolute and 1-based.
+    """
+
+    __slots__ = ("_path", "_handle", "_map", "_size", "_offsets", "_scanned", "_lock")
+
+    def __init__(self, path: Path, handle: BinaryIO, size: int) -> None:
+        self._path = path
+        self._handle: BinaryIO | None = handle
+        self._map: mmap.mmap | None = (
+            mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        )
+        self._size = size
+        self._offsets = array("Q", [0])
+        self._scanned = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def try_open(cls, path: Path) -> Result[PagedTextFile, str]:
+        try:
+            handle = open(path, "rb")
+        except OSError as exc:
+            return Err(str(exc))
+        try:
+            return Ok(cls(path, handle, os.fstat(handle.fileno()).st_size))
+        except (OSError, ValueError) as exc:
+            handle.close()
+            return Err(str(exc))
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def is_indexed(self) -> bool:
+        return self._scanned >= self._size
+
+    def line_count(self) -> int:
+        """Number of lines; estimated from the part indexed so far until all is."""
+        with self._lock:
+            known = len(self._offsets) - 1
+            if self._scanned >= self._size:
+                return known
+            if known == 0:
+                return 1
+            return max(known + 1, round(known * self._size / self._scanned))
+
+    def has_line(self, line: int) -> bool:
+        """Whether line ``line`` exists, indexing as far as needed to tell."""
+        while True:
+            with self._lock:
+                if len(self._offsets) - 1 >= line:
+                    return True
+                if not self._index_chunk():
+                    return False
+
+    def _index_chunk(self) -> bool:
+        """Index the next chunk, under the lock; False once all is indexed."""
+        data = self._map
+        if data is None or self._scanned >= self._size:
+            return False
+        end = min(self._scanned + PAGE_INDEX_CHUNK, self._size)
+        offsets = self._offsets
+        position = data.find(b"\n", self._scanned, end)
+        while position != -1:
+            offsets.append(position + 1)
+            position = data.find(b"\n", position + 1, end)
+        self._scanned = end
+        if end == self._size and offsets[-1] != end:
+            # Last line without a trailing newline.
+            offsets.append(end)
+        return True
+
+    def index_in_background(self) -> None:
+        """Index the whole file on a daemon thread, e.g. for exact line counts."""
+
+        def index() -> None:
+            while True:
+                with self._lock:
+                    if not self._index_chunk():
+                        return
+
+        threading.Thread(target=index, daemon=True).start()
+
+    def read_page(self, first: int, max_lines: int, max_bytes: int) -> tuple[str, int]:
+        """Text of up to ``max_lines`` lines from line ``first`` on, and their count.
+
+        The page stops before the line that would take it past
+        ``max_bytes``; a first line longer than that is cut short.
+        """
+        first = max(first, 1)
+        self.has_line(first + max_lines - 1)
+        with self._lock:
+            data, offsets = self._map, self._offsets
+            last = min(first + max_lines - 1, len(offsets) - 1)
+            if data is None or first > last:
+                return "", 0
+            start = offsets[first - 1]
+            while last > first and offsets[last] - start > max_bytes:
+                last -= 1
+            end = min(offsets[last], start + max_bytes)
+            return decode_text(data[start:end]), last - first + 1
+
+    def close(self) -> None:
+        """Unmap the file; a background indexing thread stops at its next chunk."""
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+            self._scanned = self._size
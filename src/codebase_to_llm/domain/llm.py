@@ -1,6 +1,42 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing_extensions import final
+
+from codebase_to_llm.domain.context_packing import ContextPackingReport
+
+
+@final
+@dataclass(frozen=True)
+class TokenUsage:
+    """Token counts of one response, including provider prompt-cache hits.
+
+    ``input_tokens`` is the whole prompt; the cached and cache-creation counts
+    are the parts of it read from or written to the provider cache.
+    """
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_input_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+
+    def cache_hit_rate(self) -> float:
+        """Share of the prompt served from the provider cache."""
+        if not self.input_tokens:
+            return 0.0
+        return self.cached_input_tokens / self.input_tokens
+
+
 class ResponseGenerated:
-    def __init__(self, response: str):
+    def __init__(
+        self,
+        response: str,
+        packing: ContextPackingReport | None = None,
+        usage: TokenUsage | None = None,
+    ) -> None:
         self.response = response
+        self.packing = packing
+        self.usage = usage
 
     def __str__(self):
         return f"ResponseGenerated(response={self.response})"
@@ -1,10 +1,9 @@
 from __future__ import annotations
 
-from copy import deepcopy
 from dataclasses import dataclass
 from typing_extensions import final
-import re
 
+from .prompt_template import PromptTemplate, compile_template
 from .value_object import ValueObject
 from .result import Result, Ok, Err
 
@@ -56,24 +55,24 @@ class Prompt(ValueObject):
         if not content or not content.strip():
             return Err("Prompt cannot be empty")
 
-        keys = sorted(list(set(re.findall(r"\{\{(.*?)\}\}", content))))
-        new_variables = []
-        for key_from_prompt in keys:
-            for variable in variables:
-                if variable.key == key_from_prompt:
-                    # Use Previous Variable
-                    new_variables.append(variable)
-                    break
-            else:
-                # runs only if no break occurred in the for loop above,
-                # i.e., no variable with a matching key was found.
-                # Create a new variable with empty content
-                new_variables.append(PromptVariable(key_from_prompt, ""))
+        previous: dict[str, PromptVariable] = {}
+        for variable in variables:
+            # The first variable given for a key wins.
+            previous.setdefault(variable.key, variable)
+        new_variables = [
+            previous.get(key) or PromptVariable(key, "")
+            for key in compile_template(content).keys
+        ]
 
         return Ok(Prompt(content, new_variables))
 
     def get_variables(self) -> list[PromptVariable]:
-        return deepcopy(self._variables)
+        # Variables are frozen, so a shallow copy is enough; their (possibly
+        # file-sized) contents are shared, not copied.
+        return list(self._variables)
+
+    def template(self) -> PromptTemplate:
+        return compile_template(self._content)
 
     def get_content(self) -> str:
         return self._content
@@ -88,9 +87,5 @@ class Prompt(ValueObject):
                 f"Prompt contains varable not set {variables_keys_with_empty_content}"
             )
 
-        content = self._content
-        # Replace variable within {{}} with the variable content
-        for variable in self._variables:
-            content = content.replace(f"{{{{{variable.key}}}}}", variable.content)
-
-        return Ok(content)
+        values = {variable.key: variable.content for variable in self._variables}
+        return Ok(self.template().render(values))
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Final, Iterator, Mapping
+from typing_extensions import final
+
+_VARIABLE_RE: Final = re.compile(r"\{\{(.*?)\}\}")
+
+
+@final
+@dataclass(frozen=True)
+class PromptTemplate:
+    """Prompt content split once into literal text and ``{{key}}`` slots.
+
+    ``literals`` has one more element than ``slots``: rendering alternates
+    them, so each variable is copied exactly once into the output.
+    """
+
+    literals: tuple[str, ...]
+    slots: tuple[str, ...]
+    keys: tuple[str, ...]
+
+    def render_chunks(self, values: Mapping[str, str]) -> Iterator[str]:
+        """Yield the rendered text piece by piece; unknown keys stay as written."""
+        for literal, key in zip(self.literals, self.slots):
+            if literal:
+                yield literal
+            value = values.get(key)
+            yield f"{{{{{key}}}}}" if value is None else value
+        if self.literals[-1]:
+            yield self.literals[-1]
+
+    def render(self, values: Mapping[str, str]) -> str:
+        return "".join(self.render_chunks(values))
+
+
+@lru_cache(maxsize=256)
+def compile_template(content: str) -> PromptTemplate:
+    """Parse ``content`` once; the result is cached per content."""
+    literals: list[str] = []
+    slots: list[str] = []
+    position = 0
+    for match in _VARIABLE_RE.finditer(content):
+        literals.append(content[position : match.start()])
+        slots.append(match.group(1))
+        position = match.end()
+    literals.append(content[position:])
+    return PromptTemplate(tuple(literals), tuple(slots), tuple(sorted(set(slots))))
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import BinaryIO, Final
+from typing_extensions import final
+
+from .context_packing import count_tokens
+from .file_cache import StatFingerprint, decode_text
+
+# Larger files are hashed and counted but not tokenised.
+MAX_TOKENIZED_BYTES: Final[int] = 1024 * 1024
+_CHUNK_BYTES: Final[int] = 256 * 1024
+
+
+@final
+@dataclass(frozen=True)
+class IndexedFile:
+    """What the index remembers about one file, ``path`` relative to the root."""
+
+    path: str
+    stamp: StatFingerprint
+    content_hash: str
+    line_count: int
+    token_estimate: int
+
+
+@final
+@dataclass(frozen=True)
+class IndexSummary:
+    """How many files the index holds and their estimated tokens in total."""
+
+    files: int
+    tokens: int
+
+
+@final
+@dataclass(frozen=True)
+class IndexRefreshStats:
+    """Outcome of one refresh: files indexed, read again and dropped."""
+
+    files: int
+    updated: int
+    removed: int
+
+
+def summarize_content(handle: BinaryIO) -> tuple[str, int, int]:
+    """Hash, line count and token estimate of an open file, read in chunks.
+
+    Binary files (a NUL byte in the first chunk) are estimated at 0 tokens.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    chunks: list[bytes] = []
+    lines = 0
+    size = 0
+    last = b""
+    while chunk := handle.read(_CHUNK_BYTES):
+        digest.update(chunk)
+        lines += chunk.count(b"\n")
+        size += len(chunk)
+        last = chunk[-1:]
+        if size <= MAX_TOKENIZED_BYTES:
+            chunks.append(chunk)
+    if last and last != b"\n":
+        lines += 1
+    tokens = 0
+    if size <= MAX_TOKENIZED_BYTES and chunks and b"\0" not in chunks[0]:
+        tokens = count_tokens(decode_text(b"".join(chunks)))
+    return digest.hexdigest(), lines, tokens
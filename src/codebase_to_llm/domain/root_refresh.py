@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Final, Generic, TypeVar
+from typing_extensions import final
+
+T = TypeVar("T")
+
+# A path modified this recently may change again within the same mtime tick,
+# so its stamp is not trusted and it is read again on the next refresh.
+RACY_WINDOW_NS: Final[int] = 2_000_000_000
+
+
+def is_racy(mtime_ns: int, racy_window_ns: int = RACY_WINDOW_NS) -> bool:
+    """Whether a stamp with this mtime cannot be trusted yet."""
+    return time.time_ns() - mtime_ns < racy_window_ns
+
+
+@final
+class BackgroundRefresh:
+    """Runs a refresh on a daemon thread, one at a time and not too often.
+
+    The owner calls :meth:`mark_refreshed` at the end of every refresh, on
+    whichever thread ran it.
+    """
+
+    __slots__ = ("_refresh", "_name", "_lock", "_thread", "_refreshed_at")
+
+    def __init__(self, refresh: Callable[[], object], name: str) -> None:
+        self._refresh = refresh
+        self._name = name
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._refreshed_at: float | None = None
+
+    def mark_refreshed(self) -> None:
+        with self._lock:
+            self._refreshed_at = time.monotonic()
+
+    def start(self, min_interval: float) -> None:
+        """Start a refresh thread unless one runs or the last one is recent."""
+        with self._lock:
+            running = self._thread is not None and self._thread.is_alive()
+            recent = (
+                self._refreshed_at is not None
+                and time.monotonic() - self._refreshed_at < min_interval
+            )
+            if running or recent:
+                return
+            self._thread = threading.Thread(
+                target=self._refresh, name=self._name, daemon=True
+            )
+            self._thread.start()
+
+
+@final
+class RootRegistry(Generic[T]):
+    """One shared instance per root directory, keeping the most recent roots."""
+
+    __slots__ = ("_factory", "_max_roots", "_instances", "_lock")
+
+    def __init__(self, factory: Callable[[Path], T], max_roots: int) -> None:
+        self._factory = factory
+        self._max_roots = max_roots
+        self._instances: OrderedDict[str, T] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, root: Path) -> T:
+        key = os.path.abspath(root)
+        with self._lock:
+            instance = self._instances.get(key)
+            if instance is None:
+                instance = self._instances[key] = self._factory(Path(key))
+                if len(self._instances) > self._max_roots:
+                    self._instances.popitem(last=False)
+            else:
+                self._instances.move_to_end(key)
+            return instance
+
+    def values(self) -> list[T]:
+        with self._lock:
+            return list(self._instances.values())
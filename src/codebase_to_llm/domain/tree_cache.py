@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final
+from typing_extensions import final
+
+from .directory_tree import TreeEntry, ignore_matcher, list_entries
+from .file_cache import StatFingerprint, fingerprint
+from .gitignore import GITIGNORE_NAME, GitIgnoreMatcher
+from .result import Err, Ok, Result
+from .root_refresh import RACY_WINDOW_NS, RootRegistry, is_racy
+
+
+def _stamp(path: str) -> StatFingerprint | None:
+    try:
+        return fingerprint(os.stat(path))
+    except OSError:
+        return None
+
+
+def _indent(body: str, prefix: str) -> str:
+    return prefix + body.replace(os.linesep, os.linesep + prefix)
+
+
+@final
+class _DirectorySnapshot:
+    """What one directory looked like when it was last listed and rendered."""
+
+    __slots__ = ("stamp", "gitignore_stamp", "entries", "body")
+
+    def __init__(
+        self,
+        stamp: StatFingerprint | None,
+        gitignore_stamp: StatFingerprint | None,
+        entries: list[TreeEntry],
+    ) -> None:
+        self.stamp = stamp
+        self.gitignore_stamp = gitignore_stamp
+        self.entries = entries
+        # Lines below the directory, relative to its own indentation.
+        self.body = ""
+
+
+@final
+@dataclass(frozen=True)
+class TreeRefreshStats:
+    """How much work the last :meth:`DirectoryTreeCache.render` did."""
+
+    directories: int
+    rescanned: int
+    rerendered: int
+
+
+@final
+class DirectoryTreeCache:
+    """The ASCII tree of one root, kept up to date directory by directory.
+
+    Each render stats every known directory, lists again only those whose
+    stamp changed (or whose .gitignore changed), and re-renders only those
+    directories and their ancestors. Output equals :func:`build_tree`.
+    """
+
+    __slots__ = ("_root", "_snapshots", "_lock", "_racy_window_ns", "_stats")
+
+    def __init__(self, root: Path, racy_window_ns: int = RACY_WINDOW_NS) -> None:
+        self._root = root
+        self._snapshots: dict[str, _DirectorySnapshot] = {}
+        self._lock = threading.Lock()
+        self._racy_window_ns = racy_window_ns
+        self._stats = TreeRefreshStats(0, 0, 0)
+
+    def _forget_below(self, relative: str) -> None:
+        prefix = f"{relative}/" if relative else ""
+        for key in [k for k in self._snapshots if k.startswith(prefix)]:
+            if key != relative:
+                del self._snapshots[key]
+
+    def _scan(
+        self, relative: str, path: str, matcher: GitIgnoreMatcher
+    ) -> _DirectorySnapshot:
+        stamp = _stamp(path)
+        if stamp is not None and is_racy(stamp[0], self._racy_window_ns):
+            stamp = None
+        gitignore_stamp = _stamp(os.path.join(path, GITIGNORE_NAME))
+        return _DirectorySnapshot(
+            stamp, gitignore_stamp, list_entries(path, relative, matcher)
+        )
+
+    def _refresh(self) -> list[str]:
+        """Bring the snapshots up to date; return the directories to re-render."""
+        matcher = ignore_matcher(self._root)
+        root = str(self._root)
+        visited: list[str] = []
+        changed: set[str] = set()
+        stack = [""]
+        while stack:
+            relative = stack.pop()
+            visited.append(relative)
+            path = os.path.join(root, relative) if relative else root
+            snapshot = self._snapshots.get(relative)
+            if snapshot is not None and snapshot.gitignore_stamp is not None:
+                if _stamp(os.path.join(path, GITIGNORE_NAME)) != (
+                    snapshot.gitignore_stamp
+                ):
+                    # New rules can hide or show anything below.
+                    self._forget_below(relative)
+                    snapshot = None
+            if (
+                snapshot is None
+                or snapshot.stamp is None
+                or (_stamp(path) != snapshot.stamp)
+            ):
+                fresh = self._scan(relative, path, matcher)
+                if snapshot is not None and (
+                    fresh.gitignore_stamp != snapshot.gitignore_stamp
+                ):
+                    self._forget_below(relative)
+                self._snapshots[relative] = snapshot = fresh
+                changed.add(relative)
+            for name, _, descend in snapshot.entries:
+                if descend:
+                    stack.append(f"{relative}/{name}" if relative else name)
+
+        live = set(visited)
+        for key in [k for k in self._snapshots if k not in live]:
+            del self._snapshots[key]
+
+        # Children are visited after their parent, so walking the visit
+        # order backwards renders every child before its parent.
+        rerender: list[str] = []
+        dirty = set(changed)
+        for relative in reversed(visited):
+            if relative in dirty:
+                rerender.append(relative)
+                dirty.add(relative.rpartition("/")[0] if relative else "")
+        self._stats = TreeRefreshStats(len(visited), len(changed), len(rerender))
+        return rerender
+
+    def _render_body(self, relative: str) -> None:
+        snapshot = self._snapshots[relative]
+        lines: list[str] = []
+        count = len(snapshot.entries)
+        for index, (name, _, descend) in enumerate(snapshot.entries):
+            last = index == count - 1
+            lines.append(("└── " if last else "├── ") + name)
+            if descend:
+                child = self._snapshots[f"{relative}/{name}" if relative else name]
+                if child.body:
+                    lines.append(_indent(child.body, "    " if last else "│   "))
+        snapshot.body = os.linesep.join(lines)
+
+    def render(self) -> Result[str, str]:
+        if not self._root.exists():
+            return Err(f"Directory not found: {self._root}")
+        with self._lock:
+            for relative in self._refresh():
+                self._render_body(relative)
+            body = self._snapshots[""].body
+        name = self._root.name
+        return Ok(f"{name}{os.linesep}{body}" if body else name)
+
+    def invalidate(self, path: Path | None = None) -> None:
+        """Force ``path`` (and its parent directory) to be listed again.
+
+        Call it after changing the file system yourself: directory mtimes can
+        be too coarse to notice a change made right after the last render.
+        """
+        with self._lock:
+            if path is None:
+                self._snapshots.clear()
+                return
+            relative = os.path.relpath(os.path.abspath(path), self._root)
+            if relative == ".." or relative.startswith(".." + os.sep):
+                return
+            relative = "" if relative == "." else relative.replace(os.sep, "/")
+            for key in (relative, relative.rpartition("/")[0]):
+                snapshot = self._snapshots.get(key)
+                if snapshot is not None:
+                    snapshot.stamp = None
+
+    def stats(self) -> TreeRefreshStats:
+        return self._stats
+
+
+_caches: Final[RootRegistry[DirectoryTreeCache]] = RootRegistry(
+    DirectoryTreeCache, max_roots=8
+)
+
+
+def tree_cache_for(root: Path) -> DirectoryTreeCache:
+    """Return the shared cache of ``root``, keeping the most recent roots."""
+    return _caches.get(root)
+
+
+def invalidate_tree(path: Path) -> None:
+    """Tell every cached tree containing ``path`` that it changed."""
+    for cache in _caches.values():
+        cache.invalidate(path)
@@ -3,8 +3,17 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Final
 
-from codebase_to_llm.domain.result import Err, Ok, Result
+from codebase_to_llm.domain.context_packing import DEFAULT_TOKEN_ESTIMATOR
+from codebase_to_llm.domain.directory_tree import (
+    TreeBudget,
+    TreeFormat,
+    UNBOUNDED_TREE,
+    build_tree_formats,
+)
 from codebase_to_llm.domain.directory_tree import build_tree as domain_build_tree
+from codebase_to_llm.domain.result import Err, Ok, Result
+from codebase_to_llm.domain.file_cache import read_text_file
+from codebase_to_llm.domain.tree_cache import tree_cache_for
 
 from codebase_to_llm.application.ports import DirectoryRepositoryPort
 
@@ -12,25 +21,57 @@ from codebase_to_llm.application.ports import DirectoryRepositoryPort
 class FileSystemDirectoryRepository(DirectoryRepositoryPort):
     """Pure‐query adapter over the local file‑system (read‑only)."""
 
-    __slots__ = ("_root",)
+    __slots__ = ("_root", "_tree_budget", "_tree_format")
 
-    def __init__(self, root: Path):
+    def __init__(
+        self,
+        root: Path,
+        tree_budget: TreeBudget | None = None,
+        tree_format: TreeFormat = "ascii",
+    ):
         self._root: Final = root
+        self._tree_budget: Final = tree_budget
+        self._tree_format: Final = tree_format
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def with_tree_options(
+        self, tree_budget: TreeBudget | None, tree_format: TreeFormat = "ascii"
+    ) -> FileSystemDirectoryRepository:
+        return FileSystemDirectoryRepository(self._root, tree_budget, tree_format)
 
     def build_tree(self) -> Result[str, str]:  # noqa: D401 (simple verb)
-        return domain_build_tree(self._root)
+        if self._tree_budget is not None or self._tree_format != "ascii":
+            # A budgeted walk stops early, so it is cheap without the cache;
+            # the cache only keeps the ASCII rendering.
+            return domain_build_tree(
+                self._root, self._tree_budget or UNBOUNDED_TREE, self._tree_format
+            )
+        # Only directories that changed since the last copy are listed again.
+        return tree_cache_for(self._root).render()
+
+    def tree_token_sizes(self) -> Result[dict[TreeFormat, int], str]:
+        """Estimated tokens of the tree in every format, from a single walk."""
+        formats = build_tree_formats(self._root, self._tree_budget or UNBOUNDED_TREE)
+        if formats.is_err():
+            return Err(formats.err() or "")
+        rendered = formats.ok() or {}
+        return Ok(
+            {
+                tree_format: DEFAULT_TOKEN_ESTIMATOR.estimate(text)
+                for tree_format, text in rendered.items()
+            }
+        )
 
     def read_file(
         self, relative_path: Path
     ) -> Result[str, str]:  # noqa: D401 (simple verb)
         full_path = (self._root / relative_path).resolve()
 
-        if not full_path.exists() or not full_path.is_file():
+        if not full_path.is_file():
             return Err(f"File not found: {relative_path}")
-        try:
-            content = full_path.read_text(encoding="utf-8", errors="ignore")
-            return Ok(content)
-        except Exception as exc:  # noqa: BLE001 (broad exc) – external edge
-            # NOTE: This `try` is inside infrastructure, which may legitimately deal
-            #       with unpredictable I/O. Domain & application layers remain pure.
-            return Err(str(exc))
+        # Shared with File.try_from_path, so previews, prompt variables and
+        # buffer adds of the same file cost a single read and decode.
+        return read_text_file(full_path)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Hashable
 from typing_extensions import final
 
 from codebase_to_llm.application.ports import ContextBufferPort
@@ -9,87 +10,122 @@ from codebase_to_llm.domain.context_buffer import (
     ExternalSource,
     File,
     Snippet,
+    path_key,
 )
 from codebase_to_llm.domain.result import Err, Result, Ok
 
 
+def _item_chars(item: File | Snippet | ExternalSource) -> int:
+    """Characters an item keeps in memory; file references hold only a path."""
+    if isinstance(item, File):
+        inline = 0 if item.is_reference() else len(item.read().unwrap_or(""))
+        return len(str(item.path)) + inline
+    if isinstance(item, Snippet):
+        return len(str(item.path)) + len(item.content)
+    return len(item.url) + len(item.content)
+
+
 @final
 class InMemoryContextBufferRepository(ContextBufferPort):
-    """In-memory repository for managing context buffer state."""
+    """In-memory repository for managing context buffer state.
+
+    With ``max_chars`` set, additions that would make the buffer hold more
+    than that many characters are rejected. The characters held are kept
+    as a running total, so checking an addition costs only its own size.
+    """
+
+    __slots__ = ("_context_buffer", "_max_chars", "_held_chars", "_item_chars")
+
+    def __init__(self, max_chars: int | None = None) -> None:
+        self._context_buffer = ContextBuffer()
+        self._max_chars = max_chars
+        self._held_chars = 0
+        # Size of each held item, by the key the buffer dedupes it on.
+        self._item_chars: dict[Hashable, int] = {}
+
+    def _check_room(self, added_chars: int) -> Result[None, str]:
+        if self._max_chars is None:
+            return Ok(None)
+        if self._held_chars + added_chars > self._max_chars:
+            return Err(
+                f"Context buffer is full ({self._max_chars} characters per session)"
+            )
+        return Ok(None)
 
-    __slots__ = ("_files", "_snippets", "_external_sources")
+    def _hold(self, key: Hashable, chars: int) -> None:
+        self._item_chars[key] = chars
+        self._held_chars += chars
 
-    def __init__(self) -> None:
-        self._context_buffer = ContextBuffer(
-            files=[],
-            snippets=[],
-            external_sources=[],
-        )
+    def _release(self, key: Hashable) -> None:
+        self._held_chars -= self._item_chars.pop(key, 0)
 
     def add_file(self, file: File) -> Result[None, str]:
         """Add a file to the context buffer if not already present."""
-        new_list_of_files = [file for file in self._context_buffer.get_files()]
-        if file.path not in [file_.path for file_ in new_list_of_files]:
-            new_list_of_files.append(file)
-        self._context_buffer = ContextBuffer(
-            files=new_list_of_files,
-            snippets=self._context_buffer.get_snippets(),
-            external_sources=self._context_buffer.get_external_sources(),
-        )
+        if self._context_buffer.has_file(file.path):
+            return Ok(None)
+        chars = _item_chars(file)
+        room = self._check_room(chars)
+        if room.is_err():
+            return room
+        self._context_buffer.add_file(file)
+        self._hold(("file", path_key(file.path)), chars)
         return Ok(None)
 
+    def add_files(self, files: list[File]) -> Result[int, str]:
+        """Add several files at once, skipping those already present."""
+        new_files: dict[Path, File] = {}
+        for file in files:
+            key = path_key(file.path)
+            if key not in new_files and not self._context_buffer.has_file(file.path):
+                new_files[key] = file
+        sizes = {key: _item_chars(file) for key, file in new_files.items()}
+        room = self._check_room(sum(sizes.values()))
+        if room.is_err():
+            return Err(room.err() or "Unknown error")
+        added = self._context_buffer.add_files(new_files.values())
+        for key, chars in sizes.items():
+            self._hold(("file", key), chars)
+        return Ok(added)
+
     def remove_file(self, path: Path) -> Result[None, str]:
         """Remove a file from the context buffer."""
-        new_list_offiles = [
-            file for file in self._context_buffer.get_files() if file.path != path
-        ]
-        self._context_buffer = ContextBuffer(
-            files=new_list_offiles,
-            snippets=self._context_buffer.get_snippets(),
-            external_sources=self._context_buffer.get_external_sources(),
-        )
-        return Ok(None)
+        self._release(("file", path_key(path)))
+        return self._context_buffer.remove_file(path)
 
     def add_snippet(self, snippet: Snippet) -> Result[None, str]:
-        """Add a text snippet to the context buffer."""
-        new_list_of_snippets = self._context_buffer.get_snippets()
-        new_list_of_snippets.append(snippet)
-        self._context_buffer = ContextBuffer(
-            files=self._context_buffer.get_files(),
-            snippets=new_list_of_snippets,
-            external_sources=self._context_buffer.get_external_sources(),
-        )
+        """Add a text snippet to the context buffer if not already present."""
+        if self._context_buffer.has_snippet(snippet.path, snippet.start, snippet.end):
+            return Ok(None)
+        chars = _item_chars(snippet)
+        room = self._check_room(chars)
+        if room.is_err():
+            return room
+        self._context_buffer.add_snippet(snippet)
+        key = ("snippet", path_key(snippet.path), snippet.start, snippet.end)
+        self._hold(key, chars)
         return Ok(None)
 
     def remove_snippet(self, path: Path, start: int, end: int) -> Result[None, str]:
         """Remove a text snippet from the context buffer."""
-        removed_snippet_result = self._context_buffer.remove_snippet(path, start, end)
-        if removed_snippet_result.is_err():
-            return Err(removed_snippet_result.err() or "Unknown error")
-        new_buffer = removed_snippet_result.ok()
-        if new_buffer is None:
-            return Err("Failed to remove snippet")
-        self._context_buffer = new_buffer
-        return Ok(None)
+        self._release(("snippet", path_key(path), start, end))
+        return self._context_buffer.remove_snippet(path, start, end)
 
     def add_external_source(self, external_source: ExternalSource) -> Result[None, str]:
         """Add an external source to the context buffer."""
+        if self._context_buffer.has_external_source(external_source.url):
+            return Ok(None)
+        chars = _item_chars(external_source)
+        room = self._check_room(chars)
+        if room.is_err():
+            return room
         self._context_buffer.add_external_source(external_source)
+        self._hold(("external_source", external_source.url), chars)
         return Ok(None)
 
     def remove_external_source(self, url: str) -> Result[None, str]:
         """Remove an external source by URL from the context buffer."""
-        new_list_of_external_sources = [
-            external_source
-            for external_source in self._context_buffer.get_external_sources()
-            if external_source.url != url
-        ]
-        self._context_buffer = ContextBuffer(
-            files=self._context_buffer.get_files(),
-            snippets=self._context_buffer.get_snippets(),
-            external_sources=new_list_of_external_sources,
-        )
-        return Ok(None)
+        self._release(("external_source", url))
+        return self._context_buffer.remove_external_source(url)
 
     def get_files(self) -> list[File]:
         """Get all files in the context buffer."""
@@ -105,31 +141,19 @@ class InMemoryContextBufferRepository(ContextBufferPort):
 
     def get_context_buffer(self) -> ContextBuffer:
         """Get the current context buffer as a domain object."""
-        # Note: ContextBuffer expects File, Snippet, ExternalSource types
-        # Based on usage patterns, these appear to map to Path, Snippet, ExternalSource
         return self._context_buffer
 
     def clear(self) -> Result[None, str]:
         """Clear all items from the context buffer."""
-        self._context_buffer = ContextBuffer(
-            files=[],
-            snippets=[],
-            external_sources=[],
-        )
+        self._context_buffer.clear()
+        self._item_chars.clear()
+        self._held_chars = 0
         return Ok(None)
 
     def is_empty(self) -> bool:
         """Check if the context buffer is empty."""
-        return not (
-            self._context_buffer.get_files()
-            or self._context_buffer.get_snippets()
-            or self._context_buffer.get_external_sources()
-        )
+        return self._context_buffer.count_items() == 0
 
     def count_items(self) -> int:
         """Get the total number of items in the context buffer."""
-        return (
-            len(self._context_buffer.get_files())
-            + len(self._context_buffer.get_snippets())
-            + len(self._context_buffer.get_external_sources())
-        )
+        return self._context_buffer.count_items()
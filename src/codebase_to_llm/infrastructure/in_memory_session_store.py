@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing_extensions import final
+
+from codebase_to_llm.infrastructure.in_memory_context_buffer_repository import (
+    InMemoryContextBufferRepository,
+)
+from codebase_to_llm.infrastructure.in_memory_prompt_repository import (
+    InMemoryPromptRepository,
+)
+
+_Session = tuple[InMemoryContextBufferRepository, InMemoryPromptRepository]
+
+
+@final
+class InMemorySessionStore:
+    """Per-session context buffers and prompts held in this process.
+
+    Mirrors the Redis store for a single worker: sessions idle for
+    ``ttl_seconds`` expire, each buffer is capped at ``max_chars``, and past
+    ``max_sessions`` the least recently used session is dropped.
+    """
+
+    __slots__ = ("_sessions", "_ttl_seconds", "_max_chars", "_max_sessions", "_lock")
+
+    def __init__(
+        self, ttl_seconds: int, max_chars: int, max_sessions: int = 10_000
+    ) -> None:
+        # Least recently used first, with the time of last use.
+        self._sessions: OrderedDict[str, tuple[float, _Session]] = OrderedDict()
+        self._ttl_seconds = ttl_seconds
+        self._max_chars = max_chars
+        self._max_sessions = max_sessions
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> _Session:
+        """The session's repositories, created if missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            while self._sessions:
+                oldest_id, (last_used, _) = next(iter(self._sessions.items()))
+                if now - last_used < self._ttl_seconds:
+                    break
+                del self._sessions[oldest_id]
+            entry = self._sessions.pop(session_id, None)
+            session = (
+                entry[1]
+                if entry is not None
+                else (
+                    InMemoryContextBufferRepository(self._max_chars),
+                    InMemoryPromptRepository(),
+                )
+            )
+            self._sessions[session_id] = (now, session)
+            while len(self._sessions) > self._max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Final, Iterable
 from codebase_to_llm.application.ports import LLMAdapterPort
 from openai import OpenAI, Stream
 from anthropic import Anthropic
@@ -7,6 +7,8 @@ from pydantic import BaseModel
 from codebase_to_llm.domain.api_key import ApiKey
 from codebase_to_llm.domain.result import Err, Ok, Result
 
+_ANTHROPIC_MAX_TOKENS: Final[int] = 8192
+
 
 class OpenAILLMAdapter(LLMAdapterPort):
     def _is_anthropic_model(self, model: str) -> bool:
@@ -27,22 +29,22 @@ class OpenAILLMAdapter(LLMAdapterPort):
         model: str,
         api_key: ApiKey,
         previous_response_id: str | None = None,
-    ) -> Result[Stream[Any], str]:
-        print(f"Generating response for {model} with API key {api_key}")
-        print(f"Prompt: {prompt}")
-        print(f"Model: {model}")
-
+        cacheable_prefix: str = "",
+    ) -> Result[Iterable[Any], str]:
         api_key_value = api_key.api_key_value().value()
-        print("--------------------------------")
 
         if self._is_anthropic_model(model):
-            return Err("Streaming not implemented for Anthropic models")
+            return self._anthropic_stream(
+                prompt, model, api_key_value, cacheable_prefix
+            )
 
         client = OpenAI(api_key=api_key_value)
         try:
+            # OpenAI caches identical prompt prefixes on its own; sending the
+            # stable part first is all it takes.
             response: Stream = client.responses.create(
                 model=model,
-                input=prompt,
+                input=cacheable_prefix + prompt,
                 stream=True,
                 previous_response_id=previous_response_id,
             )
@@ -52,6 +54,40 @@ class OpenAILLMAdapter(LLMAdapterPort):
             print(f"Error generating response: {e}")
             return Err(f"Error generating response: {e}")
 
+    def _anthropic_stream(
+        self,
+        prompt: str,
+        model: str,
+        api_key_value: str,
+        cacheable_prefix: str,
+    ) -> Result[Iterable[Any], str]:
+        from anthropic.types import TextBlockParam
+
+        content: list[TextBlockParam] = []
+        if cacheable_prefix:
+            # Cache breakpoint: everything up to here is reused while unchanged.
+            content.append(
+                {
+                    "type": "text",
+                    "text": cacheable_prefix,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            )
+        if prompt:
+            content.append({"type": "text", "text": prompt})
+
+        client = Anthropic(api_key=api_key_value)
+        try:
+            stream = client.messages.create(
+                model=model,
+                max_tokens=_ANTHROPIC_MAX_TOKENS,
+                messages=[{"role": "user", "content": content}],
+                stream=True,
+            )
+            return Ok(stream)
+        except Exception as e:
+            return Err(f"Error generating response with Anthropic: {e}")
+
     def structured_output(
         self,
         prompt: str,
@@ -133,7 +169,7 @@ class OpenAILLMAdapter(LLMAdapterPort):
         try:
             response = client.messages.create(
                 model=model,
-                max_tokens=8192,
+                max_tokens=_ANTHROPIC_MAX_TOKENS,
                 tools=[tool_definition],
                 tool_choice=tool_choice,
                 messages=[message],
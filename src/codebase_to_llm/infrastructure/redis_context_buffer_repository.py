@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import json
+import os
+import zlib
+from pathlib import Path
+from typing import Any, Final
+from typing_extensions import final
+
+import redis
+
+from codebase_to_llm.application.ports import ContextBufferPort
+from codebase_to_llm.domain.context_buffer import (
+    ContextBuffer,
+    ExternalSource,
+    File,
+    Snippet,
+)
+from codebase_to_llm.domain.result import Err, Ok, Result
+
+# Payloads above this size are zlib-compressed; source text shrinks 3-5x.
+_COMPRESS_THRESHOLD: Final[int] = 1024
+_SEQ_FIELD: Final[str] = "#seq"
+_BYTES_FIELD: Final[str] = "#bytes"
+
+
+def encode_item(payload: dict[str, Any]) -> bytes:
+    """Serialize ``payload`` as compact JSON, compressed when it is large."""
+    data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+    if len(data) > _COMPRESS_THRESHOLD:
+        return b"z" + zlib.compress(data)
+    return b"j" + data
+
+
+def decode_item(data: bytes | str) -> dict[str, Any]:
+    if isinstance(data, str):
+        data = data.encode()
+    body = zlib.decompress(data[1:]) if data[:1] == b"z" else data[1:]
+    return json.loads(body)
+
+
+def _file_field(path: Path) -> str:
+    return f"f:{os.path.abspath(path)}"
+
+
+def _snippet_field(path: Path, start: int, end: int) -> str:
+    return f"s:{start}:{end}:{os.path.abspath(path)}"
+
+
+def _external_field(url: str) -> str:
+    return f"e:{url}"
+
+
+class _SessionFull(Exception):
+    """Raised inside a write transaction to abort it without writing."""
+
+
+@final
+class RedisContextBufferRepository(ContextBufferPort):
+    """Context buffer of one session, stored in a single Redis hash.
+
+    Each item is one hash field holding a compact payload; files are kept as
+    references (path and stat fingerprint), not content. Writes are single
+    optimistic transactions (``WATCH``/``MULTI``) that also renew the
+    session TTL, and writes that would push the session past ``max_bytes``
+    are rejected. The hash is fetched at most once per instance, i.e. per
+    request, and reading it renews the TTL too.
+    """
+
+    __slots__ = ("_client", "_key", "_ttl_seconds", "_max_bytes", "_buffer")
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        session_id: str,
+        ttl_seconds: int,
+        max_bytes: int,
+    ) -> None:
+        self._client = client
+        self._key = f"context-buffer:{session_id}"
+        self._ttl_seconds = ttl_seconds
+        self._max_bytes = max_bytes
+        self._buffer: ContextBuffer | None = None
+
+    def _put_many(self, items: list[tuple[str, dict[str, Any]]]) -> Result[int, str]:
+        """Store each payload whose field is new, all or none; count those added."""
+        fields = list(dict.fromkeys(field for field, _ in items))
+        added = 0
+
+        def put(pipe: Any) -> None:
+            nonlocal added
+            current = pipe.hmget(self._key, _SEQ_FIELD, _BYTES_FIELD, *fields)
+            seq, used = int(current[0] or 0), int(current[1] or 0)
+            present = {
+                field for field, value in zip(fields, current[2:]) if value is not None
+            }
+            new: dict[str, bytes] = {}
+            for field, payload in items:
+                if field in present or field in new:
+                    continue
+                seq += 1
+                data = encode_item({**payload, "n": seq})
+                new[field] = data
+                used += len(data)
+            if used > self._max_bytes:
+                raise _SessionFull()
+            pipe.multi()
+            if new:
+                pipe.hset(
+                    self._key, mapping={**new, _SEQ_FIELD: seq, _BYTES_FIELD: used}
+                )
+            pipe.expire(self._key, self._ttl_seconds)
+            added = len(new)
+
+        try:
+            # Re-run from the start if another request changes the hash first.
+            self._client.transaction(put, self._key)
+        except _SessionFull:
+            return Err(f"Context buffer is full ({self._max_bytes} bytes per session)")
+        except redis.RedisError as exc:
+            return Err(str(exc))
+        self._buffer = None
+        return Ok(added)
+
+    def _put_item(self, field: str, payload: dict[str, Any]) -> Result[None, str]:
+        result = self._put_many([(field, payload)])
+        if result.is_err():
+            return Err(result.err() or "Unknown error")
+        return Ok(None)
+
+    def _delete(self, field: str) -> Result[bool, str]:
+        deleted = False
+
+        def delete(pipe: Any) -> None:
+            nonlocal deleted
+            data = pipe.hget(self._key, field)
+            pipe.multi()
+            if data is not None:
+                pipe.hdel(self._key, field)
+                pipe.hincrby(self._key, _BYTES_FIELD, -len(data))
+            pipe.expire(self._key, self._ttl_seconds)
+            deleted = data is not None
+
+        try:
+            self._client.transaction(delete, self._key)
+        except redis.RedisError as exc:
+            return Err(str(exc))
+        self._buffer = None
+        return Ok(deleted)
+
+    def _load(self) -> ContextBuffer:
+        if self._buffer is None:
+            pipe = self._client.pipeline(transaction=False)
+            pipe.hgetall(self._key)
+            pipe.expire(self._key, self._ttl_seconds)
+            raw, _ = pipe.execute()
+            self._buffer = self._decode(raw)
+        return self._buffer
+
+    @staticmethod
+    def _decode(raw: dict[Any, Any]) -> ContextBuffer:
+        items: list[tuple[int, str, dict[str, Any]]] = []
+        for field, data in raw.items():
+            kind = field[:1].decode() if isinstance(field, bytes) else field[:1]
+            if kind in ("f", "s", "e"):
+                payload = decode_item(data)
+                items.append((payload["n"], kind, payload))
+        items.sort(key=lambda item: item[0])
+
+        files: list[File] = []
+        snippets: list[Snippet] = []
+        external_sources: list[ExternalSource] = []
+        for _, kind, payload in items:
+            if kind == "f":
+                stamp = payload.get("fp")
+                files.append(
+                    File(
+                        Path(payload["p"]),
+                        payload.get("c"),
+                        (stamp[0], stamp[1], stamp[2]) if stamp else None,
+                    )
+                )
+            elif kind == "s":
+                snippets.append(
+                    Snippet(
+                        Path(payload["p"]), payload["a"], payload["b"], payload["c"]
+                    )
+                )
+            else:
+                external_sources.append(
+                    ExternalSource(payload["u"], payload["c"], payload["y"])
+                )
+        return ContextBuffer(files, snippets, external_sources)
+
+    @staticmethod
+    def _file_payload(file: File) -> dict[str, Any]:
+        payload: dict[str, Any] = {"p": str(file.path)}
+        if file.is_reference():
+            payload["fp"] = file.fingerprint()
+        else:
+            payload["c"] = file.content
+        return payload
+
+    def add_file(self, file: File) -> Result[None, str]:
+        return self._put_item(_file_field(file.path), self._file_payload(file))
+
+    def add_files(self, files: list[File]) -> Result[int, str]:
+        return self._put_many(
+            [(_file_field(file.path), self._file_payload(file)) for file in files]
+        )
+
+    def remove_file(self, path: Path) -> Result[None, str]:
+        result = self._delete(_file_field(path))
+        if result.is_err():
+            return Err(result.err() or "Unknown error")
+        return Ok(None)
+
+    def add_snippet(self, snippet: Snippet) -> Result[None, str]:
+        payload = {
+            "p": str(snippet.path),
+            "a": snippet.start,
+            "b": snippet.end,
+            "c": snippet.content,
+        }
+        return self._put_item(
+            _snippet_field(snippet.path, snippet.start, snippet.end), payload
+        )
+
+    def remove_snippet(self, path: Path, start: int, end: int) -> Result[None, str]:
+        result = self._delete(_snippet_field(path, start, end))
+        if result.is_err():
+            return Err(result.err() or "Unknown error")
+        if not result.ok():
+            return Err("Snippet not found in the context buffer")
+        return Ok(None)
+
+    def add_external_source(self, external_source: ExternalSource) -> Result[None, str]:
+        payload = {
+            "u": external_source.url,
+            "c": external_source.content,
+            "y": external_source.is_youtube_transcript,
+        }
+        return self._put_item(_external_field(external_source.url), payload)
+
+    def remove_external_source(self, url: str) -> Result[None, str]:
+        result = self._delete(_external_field(url))
+        if result.is_err():
+            return Err(result.err() or "Unknown error")
+        return Ok(None)
+
+    def get_files(self) -> list[File]:
+        return self._load().get_files()
+
+    def get_snippets(self) -> list[Snippet]:
+        return self._load().get_snippets()
+
+    def get_external_sources(self) -> list[ExternalSource]:
+        return self._load().get_external_sources()
+
+    def get_context_buffer(self) -> ContextBuffer:
+        return self._load()
+
+    def clear(self) -> Result[None, str]:
+        try:
+            self._client.delete(self._key)
+        except redis.RedisError as exc:
+            return Err(str(exc))
+        self._buffer = None
+        return Ok(None)
+
+    def is_empty(self) -> bool:
+        return self.count_items() == 0
+
+    def count_items(self) -> int:
+        if self._buffer is not None:
+            return self._buffer.count_items()
+        fields = int(self._client.hlen(self._key))
+        meta = sum(
+            1
+            for value in self._client.hmget(self._key, _SEQ_FIELD, _BYTES_FIELD)
+            if value
+        )
+        return fields - meta
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from typing_extensions import final
+
+import redis
+
+from codebase_to_llm.application.ports import PromptRepositoryPort
+from codebase_to_llm.domain.prompt import (
+    Prompt,
+    PromptVariable,
+    set_prompt_variable as domain_set_prompt_variable,
+)
+from codebase_to_llm.domain.result import Err, Ok, Result
+from codebase_to_llm.infrastructure.redis_context_buffer_repository import (
+    decode_item,
+    encode_item,
+)
+
+
+@final
+class RedisPromptRepository(PromptRepositoryPort):
+    """Prompt of one session, stored as a single expiring Redis key."""
+
+    __slots__ = ("_client", "_key", "_ttl_seconds", "_max_bytes")
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        session_id: str,
+        ttl_seconds: int,
+        max_bytes: int,
+    ) -> None:
+        self._client = client
+        self._key = f"prompt:{session_id}"
+        self._ttl_seconds = ttl_seconds
+        self._max_bytes = max_bytes
+
+    def set_prompt(self, prompt: Prompt) -> Result[None, str]:
+        data = encode_item(
+            {
+                "c": prompt.get_content(),
+                "v": [[var.key, var.content] for var in prompt.get_variables()],
+            }
+        )
+        if len(data) > self._max_bytes:
+            return Err(f"Prompt is too large ({self._max_bytes} bytes per session)")
+        try:
+            self._client.set(self._key, data, ex=self._ttl_seconds)
+        except redis.RedisError as exc:
+            return Err(str(exc))
+        return Ok(None)
+
+    def get_prompt(self) -> Result[Prompt | None, str]:
+        try:
+            # Reading the prompt keeps the session alive, like writing it.
+            data = self._client.getex(self._key, ex=self._ttl_seconds)
+        except redis.RedisError as exc:
+            return Err(str(exc))
+        if data is None:
+            return Ok(None)
+        payload = decode_item(data)
+        variables = [PromptVariable(key, content) for key, content in payload["v"]]
+        return Ok(Prompt(payload["c"], variables))
+
+    def set_prompt_variable(self, variable_key: str, content: str) -> Result[None, str]:
+        prompt_result = self.get_prompt()
+        if prompt_result.is_err():
+            return Err(prompt_result.err() or "Unknown error")
+        prompt = prompt_result.ok()
+        if prompt is None:
+            return Err("No prompt set to add variables to")
+        return self.set_prompt(
+            domain_set_prompt_variable(prompt, variable_key, content)
+        )
+
+    def get_variables_in_prompt(self) -> Result[list[PromptVariable], str]:
+        prompt_result = self.get_prompt()
+        if prompt_result.is_err():
+            return Err(prompt_result.err() or "Unknown error")
+        prompt = prompt_result.ok()
+        if prompt is None:
+            return Ok([])
+        return Ok(prompt.get_variables())
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Final, Iterable
+
+from codebase_to_llm.application.ports import RepositoryIndexPort
+from codebase_to_llm.domain.directory_tree import walk_files
+from codebase_to_llm.domain.file_cache import fingerprint
+from codebase_to_llm.domain.repository_index import (
+    IndexedFile,
+    IndexRefreshStats,
+    IndexSummary,
+    summarize_content,
+)
+from codebase_to_llm.domain.result import Err, Ok, Result
+from codebase_to_llm.domain.root_refresh import is_racy
+
+_SCHEMA_VERSION: Final[int] = 1
+_SCHEMA: Final[str] = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    line_count INTEGER NOT NULL,
+    token_estimate INTEGER NOT NULL
+) WITHOUT ROWID
+"""
+
+_Row = tuple[str, int, int, int, str, int, int]
+
+
+def default_index_path(root: Path) -> Path:
+    """One database per repository, under the user's config directory."""
+    key = hashlib.blake2b(
+        os.path.abspath(root).encode("utf-8", errors="surrogateescape"),
+        digest_size=8,
+    ).hexdigest()
+    return Path.home() / ".copy_to_llm" / "index" / f"{key}.sqlite3"
+
+
+def _escape_like(query: str) -> str:
+    return query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class SqliteRepositoryIndex(RepositoryIndexPort):
+    """Paths, stat fingerprints, content hashes and line/token counts on disk.
+
+    Reads are served straight from SQLite, so a repository reopened in a new
+    session is usable before anything is walked; :meth:`refresh` then reads
+    again only the files whose fingerprint changed. It may run on a
+    background thread while other threads query, and :meth:`close` stops it.
+    """
+
+    __slots__ = ("_root", "_connection", "_lock", "_refresh_lock", "_closed")
+
+    def __init__(self, root: Path, path: Path | None = None) -> None:
+        self._root: Final = Path(os.path.abspath(root))
+        database = path or default_index_path(self._root)
+        database.parent.mkdir(parents=True, exist_ok=True)
+        self._connection: Final = sqlite3.connect(
+            str(database), check_same_thread=False
+        )
+        self._lock: Final = threading.Lock()
+        self._refresh_lock: Final = threading.Lock()
+        self._closed: Final = threading.Event()
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != _SCHEMA_VERSION:
+                self._connection.execute("DROP TABLE IF EXISTS files")
+                self._connection.execute(f"PRAGMA user_version={_SCHEMA_VERSION}")
+            self._connection.execute(_SCHEMA)
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def close(self) -> None:
+        """Close the database; a refresh in progress stops without writing."""
+        self._closed.set()
+        with self._lock:
+            self._connection.close()
+
+    def _read(self, relative: str, full_path: str) -> _Row | None:
+        try:
+            with open(full_path, "rb") as handle:
+                # Key on the descriptor we actually read from.
+                stat_result = os.fstat(handle.fileno())
+                content_hash, lines, tokens = summarize_content(handle)
+        except OSError:
+            return None
+        mtime_ns, size, inode = fingerprint(stat_result)
+        # Stored as unknown, so the file is read again on the next refresh.
+        if is_racy(mtime_ns):
+            mtime_ns = 0
+        return (relative, mtime_ns, size, inode, content_hash, lines, tokens)
+
+    def refresh(self) -> Result[IndexRefreshStats, str]:
+        try:
+            with self._refresh_lock:
+                with self._lock:
+                    known = {
+                        row[0]: (row[1], row[2], row[3])
+                        for row in self._connection.execute(
+                            "SELECT path, mtime_ns, size, inode FROM files"
+                        )
+                    }
+                seen: set[str] = set()
+                updates: list[_Row] = []
+                for relative, full_path, stat_result in walk_files(self._root):
+                    if self._closed.is_set():
+                        return Err(f"The index of {self._root} was closed")
+                    if known.get(relative) == fingerprint(stat_result):
+                        seen.add(relative)
+                        continue
+                    row = self._read(relative, full_path)
+                    if row is not None:
+                        seen.add(relative)
+                        updates.append(row)
+                removed = [(path,) for path in known if path not in seen]
+                with self._lock, self._connection:
+                    self._connection.executemany(
+                        "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        updates,
+                    )
+                    self._connection.executemany(
+                        "DELETE FROM files WHERE path = ?", removed
+                    )
+        except (OSError, sqlite3.Error) as exc:
+            return Err(f"Failed to refresh the index of {self._root}: {exc}")
+        return Ok(IndexRefreshStats(len(seen), len(updates), len(removed)))
+
+    def _query(self, sql: str, parameters: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def files(self) -> Result[list[IndexedFile], str]:
+        try:
+            rows = self._query("SELECT * FROM files ORDER BY path")
+        except sqlite3.Error as exc:
+            return Err(str(exc))
+        return Ok(
+            [
+                IndexedFile(path, (mtime_ns, size, inode), content_hash, lines, tokens)
+                for path, mtime_ns, size, inode, content_hash, lines, tokens in rows
+            ]
+        )
+
+    def summary(self) -> Result[IndexSummary, str]:
+        """File count and token total, aggregated by SQLite."""
+        try:
+            ((count, tokens),) = self._query(
+                "SELECT COUNT(*), COALESCE(SUM(token_estimate), 0) FROM files"
+            )
+        except sqlite3.Error as exc:
+            return Err(str(exc))
+        return Ok(IndexSummary(count, tokens))
+
+    def search_paths(self, query: str, limit: int = 50) -> Result[list[str], str]:
+        """Indexed paths containing ``query`` (ASCII case-insensitive)."""
+        try:
+            rows = self._query(
+                "SELECT path FROM files WHERE path LIKE ? ESCAPE '\\' "
+                "ORDER BY path LIMIT ?",
+                (f"%{_escape_like(query)}%", limit),
+            )
+        except sqlite3.Error as exc:
+            return Err(str(exc))
+        return Ok([row[0] for row in rows])
+
+    def token_estimates(self, paths: Iterable[str]) -> Result[dict[str, int], str]:
+        """Estimated tokens of the given paths; unknown paths are left out."""
+        wanted = list(dict.fromkeys(paths))
+        estimates: dict[str, int] = {}
+        try:
+            # Stay well below SQLite's limit on bound parameters.
+            for start in range(0, len(wanted), 500):
+                batch = wanted[start : start + 500]
+                placeholders = ", ".join("?" * len(batch))
+                estimates.update(
+                    self._query(
+                        "SELECT path, token_estimate FROM files "
+                        f"WHERE path IN ({placeholders})",
+                        tuple(batch),
+                    )
+                )
+        except sqlite3.Error as exc:
+            return Err(str(exc))
+        return Ok(estimates)
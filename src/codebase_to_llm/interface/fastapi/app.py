@@ -36,6 +36,7 @@ from .burn_ass import router as burn_ass_router
 from .key_insights import router as key_insights_router
 from .video_summary import router as video_summary_router
 from .stream import router as stream_router
+from .search import router as search_router
 
 load_dotenv(".env-development")
 
@@ -85,6 +86,7 @@ app.include_router(burn_ass_router)
 app.include_router(key_insights_router)
 app.include_router(video_summary_router)
 app.include_router(stream_router)
+app.include_router(search_router)
 
 
 @app.on_event("startup")
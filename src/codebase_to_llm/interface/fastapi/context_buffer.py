@@ -4,10 +4,17 @@ from pathlib import Path
 from typing import Annotated, Any
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 
 from codebase_to_llm.application.uc_add_file_to_context_buffer import (
     AddFileToContextBufferUseCase,
 )
+from codebase_to_llm.application.uc_add_file_with_dependencies import (
+    AddFileWithDependenciesUseCase,
+)
+from codebase_to_llm.application.uc_select_relevant_context import (
+    SelectRelevantContextUseCase,
+)
 from codebase_to_llm.application.uc_add_code_snippet_to_context_buffer import (
     AddCodeSnippetToContextBufferUseCase,
 )
@@ -29,25 +36,46 @@ from codebase_to_llm.application.uc_clear_context_buffer import (
 from codebase_to_llm.application.uc_remove_elmts_from_context_buffer import (
     RemoveElementsFromContextBufferUseCase,
 )
-from codebase_to_llm.application.uc_copy_context import CopyContextUseCase
+from codebase_to_llm.application.uc_copy_context import (
+    CopyContextUseCase,
+    context_overlap_report,
+)
+from codebase_to_llm.domain.content_search import content_index_for
+from codebase_to_llm.domain.context_compaction import CompactionOptions
+from codebase_to_llm.domain.directory_tree import TreeBudget
+from codebase_to_llm.domain.import_graph import import_graph_for
+from codebase_to_llm.domain.context_packing import (
+    ContextPackingReport,
+    PackingDecision,
+)
 from codebase_to_llm.domain.user import User
+from codebase_to_llm.infrastructure.filesystem_directory_repository import (
+    FileSystemDirectoryRepository,
+)
 
 from .dependencies import (
     _clipboard,
-    _context_buffer,
     _directory_repo,
     _external_repo,
-    _prompt_repo,
     get_current_user,
+    get_session_repositories,
     get_user_repositories,
 )
 from .schemas import (
     AddExternalSourceRequest,
     AddFileRequest,
+    AddFileWithDependenciesRequest,
     AddSnippetRequest,
+    CompactionItemResponse,
+    ContextCompactionResponse,
+    ContextPackingResponse,
     CopyContextRequest,
+    GenerateResponseRequest,
+    PackingDecisionResponse,
     RemoveElementsRequest,
     RemoveExternalSourceRequest,
+    SelectRelevantContextRequest,
+    TreeFormatsResponse,
 )
 
 router = APIRouter(prefix="/context-buffer", tags=["Context Buffer"])
@@ -56,23 +84,118 @@ router = APIRouter(prefix="/context-buffer", tags=["Context Buffer"])
 @router.post("/file", summary="Add file to context buffer")
 def add_file_to_context_buffer(
     request: AddFileRequest,
-    _current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[User, Depends(get_current_user)],
 ) -> dict[str, str]:
-    """Add a complete file to the context buffer."""
-    use_case = AddFileToContextBufferUseCase(_context_buffer)
+    """Add a complete file to the context buffer.
+
+    Binary files are stubbed, oversized ones truncated, and lockfiles or
+    minified bundles skipped; ``action`` and ``reason`` say which.
+    """
+    context_buffer, _ = get_session_repositories(current_user)
+    use_case = AddFileToContextBufferUseCase(context_buffer)
     result = use_case.execute(Path(request.path))
     if result.is_err():
         raise HTTPException(status_code=400, detail=result.err())
-    return {"path": request.path}
+    decision = result.ok()
+    assert decision is not None
+    return {
+        "path": request.path,
+        "action": decision.action,
+        "reason": decision.reason,
+    }
+
+
+@router.post(
+    "/file-with-dependencies",
+    summary="Add a file and its local imports to context buffer",
+)
+def add_file_with_dependencies(
+    request: AddFileWithDependenciesRequest,
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> dict[str, Any]:
+    """Add a Python or JS/TS file with the local files it imports.
+
+    Imports are followed up to ``max_depth`` hops, nearest first, leaving
+    out files that would exceed ``token_budget``. They come from an import
+    graph built in the background on first use; until it is ready the
+    route answers 503.
+    """
+    graph = import_graph_for(_directory_repo.root)
+    graph.refresh_in_background()
+    if not graph.ready():
+        raise HTTPException(
+            status_code=503,
+            detail="The import graph is still being built.",
+            headers={"Retry-After": "1"},
+        )
+    context_buffer, _ = get_session_repositories(current_user)
+    use_case = AddFileWithDependenciesUseCase(context_buffer)
+    result = use_case.execute(
+        graph, Path(request.path), request.max_depth, request.token_budget
+    )
+    if result.is_err():
+        raise HTTPException(status_code=400, detail=result.err())
+    return {
+        "path": request.path,
+        "files": [
+            {
+                "path": str(decision.path),
+                "action": decision.action,
+                "reason": decision.reason,
+            }
+            for decision in result.ok() or []
+        ],
+    }
+
+
+@router.post("/relevant", summary="Pre-fill context buffer with relevant files")
+def select_relevant_context(
+    request: SelectRelevantContextRequest,
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> dict[str, Any]:
+    """Add the files most relevant to ``query`` (default: the user request).
+
+    Files are ranked by BM25 over the local search index, with no network
+    involved, and added whole or as their most relevant lines while they
+    fit ``token_budget``. Answers 503 until the index is first built.
+    """
+    index = content_index_for(_directory_repo.root)
+    index.refresh_in_background()
+    if not index.ready():
+        raise HTTPException(
+            status_code=503,
+            detail="The search index is still being built.",
+            headers={"Retry-After": "1"},
+        )
+    context_buffer, prompt_repo = get_session_repositories(current_user)
+    use_case = SelectRelevantContextUseCase(context_buffer, prompt_repo)
+    result = use_case.execute(
+        index, request.token_budget, request.max_files, request.query
+    )
+    if result.is_err():
+        raise HTTPException(status_code=400, detail=result.err())
+    return {
+        "files": [
+            {
+                "path": str(item.path),
+                "score": round(item.score, 3),
+                "tokens": item.tokens,
+                "start": item.start,
+                "end": item.end,
+            }
+            for item in result.ok() or []
+        ],
+    }
 
 
 @router.post("/snippet", summary="Add code snippet to context buffer")
 def add_snippet_to_context_buffer(
     request: AddSnippetRequest,
-    _current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[User, Depends(get_current_user)],
 ) -> dict[str, Any]:
     """Add a specific code snippet to the context buffer."""
-    use_case = AddCodeSnippetToContextBufferUseCase(_context_buffer)
+    context_buffer, _ = get_session_repositories(current_user)
+    use_case = AddCodeSnippetToContextBufferUseCase(context_buffer)
     result = use_case.execute(
         Path(request.path), request.start, request.end, request.text
     )
@@ -90,10 +213,11 @@ def add_snippet_to_context_buffer(
 @router.post("/external", summary="Add external source to context buffer")
 def add_external_source(
     request: AddExternalSourceRequest,
-    _current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[User, Depends(get_current_user)],
 ) -> dict[str, str]:
     """Add an external URL source to the context buffer."""
-    use_case = AddExternalSourceToContextBufferUseCase(_context_buffer, _external_repo)
+    context_buffer, _ = get_session_repositories(current_user)
+    use_case = AddExternalSourceToContextBufferUseCase(context_buffer, _external_repo)
     result = use_case.execute(request.url, request.include_timestamps)
     if result.is_err():
         raise HTTPException(status_code=400, detail=result.err())
@@ -104,10 +228,11 @@ def add_external_source(
 
 @router.get("/external", summary="Get external sources")
 def get_external_sources(
-    _current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[User, Depends(get_current_user)],
 ) -> dict[str, list[str]]:
     """Get all external sources in the context buffer."""
-    use_case = GetExternalSourcesUseCase(_context_buffer)
+    context_buffer, _ = get_session_repositories(current_user)
+    use_case = GetExternalSourcesUseCase(context_buffer)
     result = use_case.execute()
     if result.is_err():
         raise HTTPException(status_code=400, detail=result.err())
@@ -118,10 +243,11 @@ def get_external_sources(
 @router.delete("/external", summary="Remove external source")
 def remove_external_source(
     request: RemoveExternalSourceRequest,
-    _current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[User, Depends(get_current_user)],
 ) -> dict[str, str]:
     """Remove a specific external source from the context buffer."""
-    use_case = RemoveExternalSourceUseCase(_context_buffer)
+    context_buffer, _ = get_session_repositories(current_user)
+    use_case = RemoveExternalSourceUseCase(context_buffer)
     result = use_case.execute(request.url)
     if result.is_err():
         raise HTTPException(status_code=400, detail=result.err())
@@ -130,10 +256,11 @@ def remove_external_source(
 
 @router.delete("/external/all", summary="Remove all external sources")
 def remove_all_external_sources(
-    _current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[User, Depends(get_current_user)],
 ) -> dict[str, str]:
     """Remove all external sources from the context buffer."""
-    use_case = RemoveAllExternalSourcesUseCase(_context_buffer)
+    context_buffer, _ = get_session_repositories(current_user)
+    use_case = RemoveAllExternalSourcesUseCase(context_buffer)
     result = use_case.execute()
     if result.is_err():
         raise HTTPException(status_code=400, detail=result.err())
@@ -142,10 +269,11 @@ def remove_all_external_sources(
 
 @router.delete("/all", summary="Clear entire context buffer")
 def clear_context_buffer(
-    _current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[User, Depends(get_current_user)],
 ) -> dict[str, str]:
     """Clear all content from the context buffer."""
-    use_case = ClearContextBufferUseCase(_context_buffer)
+    context_buffer, _ = get_session_repositories(current_user)
+    use_case = ClearContextBufferUseCase(context_buffer)
     result = use_case.execute()
     if result.is_err():
         raise HTTPException(status_code=400, detail=result.err())
@@ -155,27 +283,239 @@ def clear_context_buffer(
 @router.delete("/", summary="Remove specific elements from context buffer")
 def remove_elements_from_context_buffer(
     request: RemoveElementsRequest,
-    _current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[User, Depends(get_current_user)],
 ) -> dict[str, list[str]]:
     """Remove specific elements from the context buffer."""
-    use_case = RemoveElementsFromContextBufferUseCase(_context_buffer)
+    context_buffer, _ = get_session_repositories(current_user)
+    use_case = RemoveElementsFromContextBufferUseCase(context_buffer)
     result = use_case.execute(request.elements)
     if result.is_err():
         raise HTTPException(status_code=400, detail=result.err())
     return {"removed": request.elements}
 
 
+def _compaction_options(request: CopyContextRequest) -> CompactionOptions | None:
+    if not (request.compact or request.drop_comments or request.drop_docstrings):
+        return None
+    return CompactionOptions(
+        drop_comments=request.drop_comments,
+        drop_docstrings=request.drop_docstrings,
+    )
+
+
+def tree_directory_repo(
+    request: CopyContextRequest | GenerateResponseRequest,
+) -> FileSystemDirectoryRepository:
+    """The shared directory repository, with the request's tree budget and format."""
+    unbounded = (
+        request.tree_max_depth is None
+        and request.tree_max_entries is None
+        and request.tree_max_lines is None
+    )
+    if unbounded and request.tree_format == "ascii":
+        return _directory_repo
+    budget = None
+    if not unbounded:
+        budget = TreeBudget(
+            max_depth=request.tree_max_depth,
+            max_entries_per_directory=request.tree_max_entries,
+            max_lines=request.tree_max_lines,
+        )
+    return _directory_repo.with_tree_options(budget, request.tree_format)
+
+
+def _decision_response(decision: PackingDecision) -> PackingDecisionResponse:
+    return PackingDecisionResponse(
+        kind=decision.kind,
+        label=decision.label,
+        status=decision.status,
+        original_tokens=decision.original_tokens,
+        packed_tokens=decision.packed_tokens,
+    )
+
+
+def packing_response(report: ContextPackingReport) -> ContextPackingResponse:
+    return ContextPackingResponse(
+        token_budget=report.token_budget,
+        reserved_tokens=report.reserved_tokens,
+        estimated_tokens=report.estimated_tokens,
+        dropped=[_decision_response(d) for d in report.dropped()],
+        truncated=[_decision_response(d) for d in report.truncated()],
+    )
+
+
 @router.post("/copy", summary="Copy context to clipboard")
 def copy_context(
     request: CopyContextRequest,
     current_user: Annotated[User, Depends(get_current_user)],
-) -> dict[str, str]:
-    """Copy the current context to clipboard."""
+) -> StreamingResponse:
+    """Stream the current context as chunked plain text.
+
+    With ``token_budget`` set, the context is packed to fit and the packing
+    outcome is summarised in ``X-Context-*`` headers; ``POST /packing`` gives
+    the per-item details. ``compact`` (or a ``drop_*`` flag) compacts file
+    bodies first; ``POST /compaction`` reports the savings per file.
+    ``layout="cache_stable"`` orders stable content first for prompt caching,
+    the ``tree_max_*`` fields bound the size of the tree and ``tree_format``
+    picks how it is drawn; ``POST /tree-formats`` compares every format.
+    """
+    context_buffer, prompt_repo = get_session_repositories(current_user)
     _, _, rules_repo, _, _ = get_user_repositories(current_user)
-    use_case = CopyContextUseCase(_context_buffer, rules_repo, _clipboard)
-    result = use_case.execute(
-        _directory_repo, _prompt_repo, request.include_tree, request.root_directory_path
+    directory_repo = tree_directory_repo(request)
+    use_case = CopyContextUseCase(context_buffer, rules_repo, _clipboard)
+    compaction = _compaction_options(request)
+    common_headers = {
+        # Snippets already covered by a whole file, or merged with a neighbour.
+        "X-Context-Overlap-Saved-Bytes": str(
+            context_overlap_report(context_buffer).saved_bytes
+        ),
+    }
+    if request.token_budget is None and compaction is not None:
+        compacted_result = use_case.stream_compacted(
+            directory_repo,
+            prompt_repo,
+            compaction,
+            request.include_tree,
+            request.root_directory_path,
+            request.layout,
+        )
+        if compacted_result.is_err():
+            raise HTTPException(status_code=400, detail=compacted_result.err())
+        compacted = compacted_result.ok()
+        assert compacted is not None
+        compacted_fragments, compaction_report = compacted
+        headers = {
+            **common_headers,
+            "X-Context-Original-Tokens": str(compaction_report.original_tokens()),
+            "X-Context-Compacted-Tokens": str(compaction_report.compacted_tokens()),
+        }
+        return StreamingResponse(
+            compacted_fragments, media_type="text/plain", headers=headers
+        )
+    if request.token_budget is None:
+        result = use_case.stream(
+            directory_repo,
+            prompt_repo,
+            request.include_tree,
+            request.root_directory_path,
+            request.layout,
+        )
+        if result.is_err():
+            raise HTTPException(status_code=400, detail=result.err())
+        fragments = result.ok()
+        assert fragments is not None
+        return StreamingResponse(
+            fragments, media_type="text/plain", headers=common_headers
+        )
+
+    packed_result = use_case.stream_within_budget(
+        directory_repo,
+        prompt_repo,
+        request.token_budget,
+        request.include_tree,
+        request.root_directory_path,
+        compaction,
+        request.layout,
+    )
+    if packed_result.is_err():
+        raise HTTPException(status_code=400, detail=packed_result.err())
+    packed = packed_result.ok()
+    assert packed is not None
+    packed_fragments, report = packed
+    headers = {
+        **common_headers,
+        "X-Context-Token-Budget": str(report.token_budget),
+        "X-Context-Estimated-Tokens": str(report.estimated_tokens),
+        "X-Context-Dropped": str(len(report.dropped())),
+        "X-Context-Truncated": str(len(report.truncated())),
+    }
+    return StreamingResponse(packed_fragments, media_type="text/plain", headers=headers)
+
+
+@router.post("/packing", summary="Preview how the context fits a token budget")
+def preview_context_packing(
+    request: CopyContextRequest,
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> ContextPackingResponse:
+    """Report which items would be kept, truncated or dropped for the budget.
+
+    The packing is the one ``POST /copy`` runs for the same request, layout
+    and compaction included.
+    """
+    context_buffer, prompt_repo = get_session_repositories(current_user)
+    if request.token_budget is None:
+        raise HTTPException(status_code=400, detail="token_budget is required")
+    _, _, rules_repo, _, _ = get_user_repositories(current_user)
+    directory_repo = tree_directory_repo(request)
+    use_case = CopyContextUseCase(context_buffer, rules_repo, _clipboard)
+    packed_result = use_case.stream_within_budget(
+        directory_repo,
+        prompt_repo,
+        request.token_budget,
+        request.include_tree,
+        request.root_directory_path,
+        _compaction_options(request),
+        request.layout,
     )
+    if packed_result.is_err():
+        raise HTTPException(status_code=400, detail=packed_result.err())
+    packed = packed_result.ok()
+    assert packed is not None
+    _, report = packed
+    return packing_response(report)
+
+
+@router.post("/tree-formats", summary="Compare the tree's size in every format")
+def compare_tree_formats(
+    request: CopyContextRequest,
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> TreeFormatsResponse:
+    """Estimated tokens of the tree, within the request's bounds, per format."""
+    result = tree_directory_repo(request).tree_token_sizes()
     if result.is_err():
         raise HTTPException(status_code=400, detail=result.err())
-    return {"content": _clipboard.text()}
+    sizes = result.ok() or {}
+    return TreeFormatsResponse(
+        tokens={tree_format: tokens for tree_format, tokens in sizes.items()}
+    )
+
+
+@router.post("/compaction", summary="Measure what compaction saves per file")
+def preview_context_compaction(
+    request: CopyContextRequest,
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> ContextCompactionResponse:
+    """Report each file's size before and after compaction."""
+    context_buffer, prompt_repo = get_session_repositories(current_user)
+    _, _, rules_repo, _, _ = get_user_repositories(current_user)
+    directory_repo = tree_directory_repo(request)
+    use_case = CopyContextUseCase(context_buffer, rules_repo, _clipboard)
+    compacted_result = use_case.stream_compacted(
+        directory_repo,
+        prompt_repo,
+        _compaction_options(request) or CompactionOptions(),
+        request.include_tree,
+        request.root_directory_path,
+        request.layout,
+    )
+    if compacted_result.is_err():
+        raise HTTPException(status_code=400, detail=compacted_result.err())
+    compacted = compacted_result.ok()
+    assert compacted is not None
+    _, report = compacted
+    return ContextCompactionResponse(
+        original_tokens=report.original_tokens(),
+        compacted_tokens=report.compacted_tokens(),
+        saved_tokens=report.saved_tokens(),
+        items=[
+            CompactionItemResponse(
+                label=item.label,
+                original_chars=item.original_chars,
+                compacted_chars=item.compacted_chars,
+                original_tokens=item.original_tokens,
+                compacted_tokens=item.compacted_tokens,
+                duplicate_of=item.duplicate_of,
+            )
+            for item in report.items
+        ],
+    )
@@ -5,10 +5,16 @@ from pathlib import Path
 from typing import Annotated, final
 
 import jwt
+import redis
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 
+from codebase_to_llm.application.ports import (
+    ContextBufferPort,
+    PromptRepositoryPort,
+)
+from codebase_to_llm.config import CONFIG
 from codebase_to_llm.domain.user import User, UserName
 from codebase_to_llm.infrastructure.sqlalchemy_api_key_repository import (
     SqlAlchemyApiKeyRepository,
@@ -28,13 +34,16 @@ from codebase_to_llm.infrastructure.sqlalchemy_rules_repository import (
 from codebase_to_llm.infrastructure.sqlalchemy_favorite_prompts_repository import (
     SqlAlchemyFavoritePromptsRepository,
 )
-from codebase_to_llm.infrastructure.in_memory_context_buffer_repository import (
-    InMemoryContextBufferRepository,
-)
-from codebase_to_llm.infrastructure.in_memory_prompt_repository import (
-    InMemoryPromptRepository,
+from codebase_to_llm.infrastructure.in_memory_session_store import (
+    InMemorySessionStore,
 )
 from codebase_to_llm.infrastructure.llm_adapter import OpenAILLMAdapter
+from codebase_to_llm.infrastructure.redis_context_buffer_repository import (
+    RedisContextBufferRepository,
+)
+from codebase_to_llm.infrastructure.redis_prompt_repository import (
+    RedisPromptRepository,
+)
 from codebase_to_llm.infrastructure.url_external_source_repository import (
     UrlExternalSourceRepository,
 )
@@ -101,8 +110,6 @@ class InMemoryClipboardService:
 
 
 # Shared repositories and services
-_context_buffer = InMemoryContextBufferRepository()
-_prompt_repo = InMemoryPromptRepository()
 _external_repo = UrlExternalSourceRepository()
 _clipboard = InMemoryClipboardService()
 _directory_repo = FileSystemDirectoryRepository(Path.cwd())
@@ -121,6 +128,44 @@ _video_subtitle_repo = SqlAlchemyVideoSubtitleRepository()
 _burn_ass_task_queue = CeleryBurnAssTaskQueue()
 
 
+# Per-session state when SESSION_STORE=memory (single worker only).
+_memory_sessions = InMemorySessionStore(
+    CONFIG.session_ttl_seconds, CONFIG.session_max_bytes
+)
+_redis_client: redis.Redis | None = None
+
+
+def _get_redis_client() -> redis.Redis:
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(CONFIG.redis_url)
+    return _redis_client
+
+
+def get_session_repositories(
+    user: User,
+) -> tuple[ContextBufferPort, PromptRepositoryPort]:
+    """Return the context buffer and prompt of ``user``'s session."""
+    session_id = str(user.id().value())
+    if CONFIG.session_store == "redis":
+        client = _get_redis_client()
+        return (
+            RedisContextBufferRepository(
+                client,
+                session_id,
+                CONFIG.session_ttl_seconds,
+                CONFIG.session_max_bytes,
+            ),
+            RedisPromptRepository(
+                client,
+                session_id,
+                CONFIG.session_ttl_seconds,
+                CONFIG.session_max_bytes,
+            ),
+        )
+    return _memory_sessions.get(session_id)
+
+
 def get_user_repositories(user: User) -> tuple[
     SqlAlchemyApiKeyRepository,
     SqlAlchemyModelRepository,
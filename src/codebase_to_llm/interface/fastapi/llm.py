@@ -1,43 +1,56 @@
 from __future__ import annotations
 
 import json
-from typing import Annotated, Any
+from typing import Annotated, Any, Iterable
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
-from openai import Stream
-from openai.types.responses import ResponseTextDeltaEvent, ResponseCompletedEvent
 
 from codebase_to_llm.application.uc_generate_llm_response import (
     GenerateLLMResponseUseCase,
+    merge_usage,
+    response_text_delta,
+    response_usage,
 )
 from codebase_to_llm.application.uc_get_model_api_key import GetModelApiKeyUseCase
+from codebase_to_llm.domain.llm import TokenUsage
 from codebase_to_llm.domain.model import ModelId
 from codebase_to_llm.domain.result import Result
 from codebase_to_llm.domain.user import User
 
+from .context_buffer import packing_response, tree_directory_repo
 from .dependencies import (
-    _context_buffer,
-    _directory_repo,
     _llm_adapter,
-    _prompt_repo,
     get_current_user,
+    get_session_repositories,
     get_user_repositories,
 )
 from .schemas import (
     GenerateResponseRequest,
     TestMessageRequest,
+    TokenUsageResponse,
 )
 
 router = APIRouter(prefix="/llm", tags=["LLM Operations"])
 
 
+def usage_response(usage: TokenUsage) -> TokenUsageResponse:
+    return TokenUsageResponse(
+        input_tokens=usage.input_tokens,
+        output_tokens=usage.output_tokens,
+        cached_input_tokens=usage.cached_input_tokens,
+        cache_creation_input_tokens=usage.cache_creation_input_tokens,
+        cache_hit_rate=usage.cache_hit_rate(),
+    )
+
+
 @router.post("/response", summary="Generate LLM response")
 def generate_llm_response(
     request: GenerateResponseRequest,
     current_user: Annotated[User, Depends(get_current_user)],
-) -> dict[str, str]:
+) -> dict[str, Any]:
     """Generate a response from the LLM using the current context."""
+    context_buffer, prompt_repo = get_session_repositories(current_user)
     api_key_repo, model_repo, rules_repo, _, _ = get_user_repositories(current_user)
     model_id_result = ModelId.try_create(request.model_id)
     if model_id_result.is_err():
@@ -50,18 +63,22 @@ def generate_llm_response(
         _llm_adapter,
         model_repo,
         api_key_repo,
-        _directory_repo,
-        _prompt_repo,
-        _context_buffer,
+        tree_directory_repo(request),
+        prompt_repo,
+        context_buffer,
         rules_repo,
         request.include_tree,
         request.root_directory_path,
+        request.token_budget,
+        request.layout,
     )
     if result.is_err():
         raise HTTPException(status_code=400, detail=result.err())
     event = result.ok()
     assert event is not None
-    return {"response": event.response}
+    packing = packing_response(event.packing).model_dump() if event.packing else None
+    usage = usage_response(event.usage).model_dump() if event.usage else None
+    return {"response": event.response, "packing": packing, "usage": usage}
 
 
 @router.post("/test-message", summary="Test message generation with a model")
@@ -89,60 +106,61 @@ def test_message_generation(
     model_name, api_key = details
 
     try:
-        response_stream: Result[Stream, str] = _llm_adapter.generate_response(
+        response_stream: Result[Iterable[Any], str] = _llm_adapter.generate_response(
             request.message,
             model_name,
             api_key,
             previous_response_id=getattr(request, "previous_response_id", None),
         )
 
+        def completed(response_id: str, status: str, usage: TokenUsage | None) -> bytes:
+            payload: dict[str, Any] = {
+                "type": "response.completed",
+                "response": {
+                    "id": response_id,
+                    "status": status,
+                    "usage": usage_response(usage).model_dump() if usage else None,
+                },
+            }
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode(
+                "utf-8"
+            )
+
         def gen() -> Any:
             yield b": stream-start\n\n"
             stream = response_stream.ok()
             if stream is not None:
+                # Anthropic streams have no id on the final event.
+                response_id = ""
+                usage: TokenUsage | None = None
                 for event in stream:
-                    match event:
-                        case ResponseTextDeltaEvent(delta=delta):
-                            delta_payload = {
-                                "type": "response.output_text.delta",
-                                "delta": delta,
-                            }
-                            yield (
-                                f"data: {json.dumps(delta_payload, ensure_ascii=False)}\n\n".encode(
-                                    "utf-8"
-                                )
-                            )
-                        case ResponseCompletedEvent(response=resp):
-                            usage = getattr(resp, "usage", None)
-                            usage_dict = None
-                            if usage is not None:
-                                usage_dict = {
-                                    "completion_tokens": getattr(
-                                        usage, "completion_tokens", None
-                                    ),
-                                    "prompt_tokens": getattr(
-                                        usage, "prompt_tokens", None
-                                    ),
-                                    "total_tokens": getattr(
-                                        usage, "total_tokens", None
-                                    ),
-                                }
-                            payload: dict[str, Any] = {
-                                "type": "response.completed",
-                                "response": {
-                                    "id": resp.id,
-                                    "status": getattr(resp, "status", "completed"),
-                                    "usage": usage_dict,
-                                },
-                            }
-                            yield (
-                                f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode(
-                                    "utf-8"
-                                )
+                    delta = response_text_delta(event)
+                    if delta:
+                        delta_payload = {
+                            "type": "response.output_text.delta",
+                            "delta": delta,
+                        }
+                        yield (
+                            f"data: {json.dumps(delta_payload, ensure_ascii=False)}\n\n".encode(
+                                "utf-8"
                             )
-                            yield b": stream-end\n\n"
-                        case _:
-                            pass
+                        )
+                        continue
+                    event_usage = response_usage(event)
+                    if event_usage is not None:
+                        usage = merge_usage(usage, event_usage)
+                    event_type = getattr(event, "type", None)
+                    if event_type == "message_start":
+                        response_id = event.message.id
+                    elif event_type == "response.completed":
+                        resp = event.response
+                        yield completed(
+                            resp.id, getattr(resp, "status", "completed"), usage
+                        )
+                        yield b": stream-end\n\n"
+                    elif event_type == "message_stop":
+                        yield completed(response_id, "completed", usage)
+                        yield b": stream-end\n\n"
 
         return StreamingResponse(gen(), media_type="text/event-stream")
 
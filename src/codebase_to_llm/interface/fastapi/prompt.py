@@ -17,7 +17,11 @@ from codebase_to_llm.application.uc_add_file_as_prompt_variable import (
 )
 from codebase_to_llm.domain.user import User
 
-from .dependencies import _directory_repo, _prompt_repo, get_current_user
+from .dependencies import (
+    _directory_repo,
+    get_current_user,
+    get_session_repositories,
+)
 from .schemas import (
     AddFileAsPromptVariableRequest,
     AddPromptFromFileRequest,
@@ -31,10 +35,11 @@ router = APIRouter(prefix="/prompt", tags=["Prompt Management"])
 @router.post("/from-file", summary="Load prompt from file")
 def add_prompt_from_file(
     request: AddPromptFromFileRequest,
-    _current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[User, Depends(get_current_user)],
 ) -> dict[str, str]:
     """Load a prompt from a file."""
-    use_case = AddPromptFromFileUseCase(_prompt_repo)
+    _, prompt_repo = get_session_repositories(current_user)
+    use_case = AddPromptFromFileUseCase(prompt_repo)
     result = use_case.execute(Path(request.path))
     if result.is_err():
         raise HTTPException(status_code=400, detail=result.err())
@@ -46,10 +51,11 @@ def add_prompt_from_file(
 @router.post("/modify", summary="Modify current prompt")
 def modify_prompt(
     request: ModifyPromptRequest,
-    _current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[User, Depends(get_current_user)],
 ) -> dict[str, str]:
     """Modify the current prompt content."""
-    use_case = ModifyPromptUseCase(_prompt_repo)
+    _, prompt_repo = get_session_repositories(current_user)
+    use_case = ModifyPromptUseCase(prompt_repo)
     result = use_case.execute(request.new_content)
     if result.is_err():
         raise HTTPException(status_code=400, detail=result.err())
@@ -61,10 +67,11 @@ def modify_prompt(
 @router.post("/from-favorite", summary="Set prompt from favorite")
 def set_prompt_from_favorite(
     request: SetPromptFromFavoriteRequest,
-    _current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[User, Depends(get_current_user)],
 ) -> dict[str, str]:
     """Set the current prompt from a favorite prompt."""
-    use_case = AddPromptFromFavoriteLisUseCase(_prompt_repo)
+    _, prompt_repo = get_session_repositories(current_user)
+    use_case = AddPromptFromFavoriteLisUseCase(prompt_repo)
     result = use_case.execute(request.content)
     if result.is_err():
         raise HTTPException(status_code=400, detail=result.err())
@@ -76,10 +83,11 @@ def set_prompt_from_favorite(
 @router.post("/variable", summary="Add file as prompt variable")
 def add_file_as_prompt_variable(
     request: AddFileAsPromptVariableRequest,
-    _current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[User, Depends(get_current_user)],
 ) -> dict[str, str]:
     """Add a file as a variable in the prompt."""
-    use_case = AddFileAsPromptVariableUseCase(_prompt_repo)
+    _, prompt_repo = get_session_repositories(current_user)
+    use_case = AddFileAsPromptVariableUseCase(prompt_repo)
     result = use_case.execute(
         _directory_repo, request.variable_key, Path(request.relative_path)
     )
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class RegisterRequest(BaseModel):
@@ -44,6 +44,18 @@ class AddFileRequest(BaseModel):
     path: str
 
 
+class AddFileWithDependenciesRequest(BaseModel):
+    path: str
+    max_depth: int | None = Field(default=2, ge=1)
+    token_budget: int | None = Field(default=None, ge=1)
+
+
+class SelectRelevantContextRequest(BaseModel):
+    query: str | None = None
+    token_budget: int = Field(default=30_000, ge=1)
+    max_files: int = Field(default=30, ge=1, le=200)
+
+
 class AddSnippetRequest(BaseModel):
     path: str
     start: int
@@ -122,6 +134,12 @@ class GenerateResponseRequest(BaseModel):
     model_id: str
     include_tree: bool = True
     root_directory_path: str | None = None
+    token_budget: int | None = Field(default=None, ge=1)
+    layout: Literal["default", "cache_stable"] = "default"
+    tree_max_depth: int | None = Field(default=None, ge=1)
+    tree_max_entries: int | None = Field(default=None, ge=1)
+    tree_max_lines: int | None = Field(default=None, ge=1)
+    tree_format: Literal["ascii", "indented", "grouped", "json"] = "ascii"
 
 
 class TestMessageRequest(BaseModel):
@@ -153,6 +171,59 @@ class KeyInsightsTaskStatusResponse(BaseModel):
 class CopyContextRequest(BaseModel):
     include_tree: bool = True
     root_directory_path: str | None = None
+    token_budget: int | None = Field(default=None, ge=1)
+    compact: bool = False
+    drop_comments: bool = False
+    drop_docstrings: bool = False
+    layout: Literal["default", "cache_stable"] = "default"
+    tree_max_depth: int | None = Field(default=None, ge=1)
+    tree_max_entries: int | None = Field(default=None, ge=1)
+    tree_max_lines: int | None = Field(default=None, ge=1)
+    tree_format: Literal["ascii", "indented", "grouped", "json"] = "ascii"
+
+
+class TokenUsageResponse(BaseModel):
+    input_tokens: int
+    output_tokens: int
+    cached_input_tokens: int
+    cache_creation_input_tokens: int
+    cache_hit_rate: float
+
+
+class PackingDecisionResponse(BaseModel):
+    kind: str
+    label: str
+    status: str
+    original_tokens: int
+    packed_tokens: int
+
+
+class ContextPackingResponse(BaseModel):
+    token_budget: int
+    reserved_tokens: int
+    estimated_tokens: int
+    dropped: list[PackingDecisionResponse]
+    truncated: list[PackingDecisionResponse]
+
+
+class CompactionItemResponse(BaseModel):
+    label: str
+    original_chars: int
+    compacted_chars: int
+    original_tokens: int
+    compacted_tokens: int
+    duplicate_of: str | None = None
+
+
+class ContextCompactionResponse(BaseModel):
+    original_tokens: int
+    compacted_tokens: int
+    saved_tokens: int
+    items: list[CompactionItemResponse]
+
+
+class TreeFormatsResponse(BaseModel):
+    tokens: dict[str, int]
 
 
 class UploadFileRequest(BaseModel):
@@ -331,3 +402,26 @@ class AssFileUpdateRequest(BaseModel):
         if "content" in data:
             data["content"] = self.validate_ass_content(data["content"])
         super().__init__(**data)
+
+
+class SearchRequest(BaseModel):
+    query: str
+    limit: int = Field(default=50, ge=1, le=500)
+    max_line_hits: int = Field(default=5, ge=0, le=50)
+
+
+class LineHitResponse(BaseModel):
+    line_number: int
+    text: str
+
+
+class SearchHitResponse(BaseModel):
+    path: str
+    score: int
+    path_match: bool
+    hit_count: int
+    line_hits: list[LineHitResponse]
+
+
+class SearchResponse(BaseModel):
+    hits: list[SearchHitResponse]
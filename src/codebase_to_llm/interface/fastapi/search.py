@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from codebase_to_llm.domain.content_search import content_index_for
+from codebase_to_llm.domain.user import User
+
+from .dependencies import _directory_repo, get_current_user
+from .schemas import (
+    LineHitResponse,
+    SearchHitResponse,
+    SearchRequest,
+    SearchResponse,
+)
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+
+@router.post("/", summary="Search repository paths and contents")
+def search_repository(
+    request: SearchRequest,
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> SearchResponse:
+    """Rank files whose path or content contains ``query`` (case-insensitive).
+
+    The index is built in the background on first use and refreshed
+    incrementally; until the first build completes the route answers 503.
+    """
+    index = content_index_for(_directory_repo.root)
+    index.refresh_in_background()
+    result = index.search(request.query, request.limit, request.max_line_hits)
+    if result.is_err():
+        status_code = 400 if index.ready() else 503
+        headers = None if index.ready() else {"Retry-After": "1"}
+        raise HTTPException(status_code, detail=result.err(), headers=headers)
+    hits = result.ok() or []
+    return SearchResponse(
+        hits=[
+            SearchHitResponse(
+                path=hit.path,
+                score=hit.score,
+                path_match=hit.path_match,
+                hit_count=hit.hit_count,
+                line_hits=[
+                    LineHitResponse(line_number=line.line_number, text=line.text)
+                    for line in hit.line_hits
+                ],
+            )
+            for hit in hits
+        ]
+    )
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import os
 from pathlib import Path
 from typing import Callable
 
@@ -12,6 +11,7 @@ from PySide6.QtGui import (
     QDragEnterEvent,
     QDragMoveEvent,
     QDropEvent,
+    QPalette,
 )
 from PySide6.QtWidgets import (
     QListWidget,
@@ -32,7 +32,7 @@ from codebase_to_llm.application.uc_add_file_to_context_buffer import (
 from codebase_to_llm.application.uc_remove_elmts_from_context_buffer import (
     RemoveElementsFromContextBufferUseCase,
 )
-from codebase_to_llm.domain.directory_tree import should_ignore, get_ignore_tokens
+from codebase_to_llm.domain.directory_tree import ignore_matcher
 from codebase_to_llm.domain.result import Result
 
 
@@ -45,6 +45,8 @@ class ContextBufferWidget(QListWidget):
         "_context_buffer",
         "_selected_elmts",
         "_add_code_snippet_to_context_buffer",
+        "_item_ids",
+        "_estimate_tokens",
     )
 
     def __init__(
@@ -70,10 +72,83 @@ class ContextBufferWidget(QListWidget):
         )
         self._selected_elmts: list = []
         self._add_code_snippet_to_context_buffer = add_code_snippet_to_context_buffer
+        # Ids of the listed items, so duplicate checks do not scan the list.
+        self._item_ids: set[str] = set()
+        self._estimate_tokens: Callable[[list[Path]], dict[Path, int]] | None = None
+
+    def set_token_estimator(
+        self, estimate_tokens: Callable[[list[Path]], dict[Path, int]]
+    ) -> None:
+        """Label added files with the token counts ``estimate_tokens`` knows."""
+        self._estimate_tokens = estimate_tokens
 
     def set_root_path(self, root_path: Path) -> None:
         self._root_path = root_path
 
+    def clear(self) -> None:
+        super().clear()
+        self._item_ids.clear()
+
+    def _display_path(self, path: Path) -> str:
+        try:
+            return str(path.relative_to(self._root_path))
+        except ValueError:
+            return str(path)
+
+    def _append_item(self, label: str, item_id: str) -> QListWidgetItem:
+        item = QListWidgetItem(label)
+        item.setData(Qt.ItemDataRole.UserRole, item_id)
+        self.addItem(item)
+        self._item_ids.add(item_id)
+        return item
+
+    def _add_file_items(self, paths: list[Path]) -> str | None:
+        new_paths = [
+            path
+            for path in paths
+            if f"file:{path}" not in self._item_ids
+            and f"skipped:{path}" not in self._item_ids
+        ]
+        if not new_paths:
+            return None
+        result = self._add_file_to_context_buffer.execute_many(new_paths)
+        decisions = result.ok()
+        if decisions is None:
+            return result.err()
+        added = [decision for decision in decisions if decision.action != "skip"]
+        skipped = [decision for decision in decisions if decision.action == "skip"]
+        estimates = (
+            self._estimate_tokens([decision.path for decision in added])
+            if self._estimate_tokens is not None
+            else {}
+        )
+        self.setUpdatesEnabled(False)
+        try:
+            for decision in added:
+                label = self._display_path(decision.path)
+                tokens = estimates.get(decision.path)
+                if decision.reason:
+                    # Stubbed or truncated: say so in the list.
+                    label = f"{label} ({decision.reason})"
+                elif tokens is not None:
+                    label = f"{label} (~{tokens:,} tokens)"
+                self._append_item(label, f"file:{decision.path}")
+            # Listed greyed out, so a file left out is not silently missing;
+            # deleting the line only removes the note.
+            disabled_text = self.palette().brush(
+                QPalette.ColorGroup.Disabled, QPalette.ColorRole.Text
+            )
+            for decision in skipped:
+                item = self._append_item(
+                    f"{self._display_path(decision.path)} (skipped: {decision.reason})",
+                    f"skipped:{decision.path}",
+                )
+                item.setForeground(disabled_text)
+                item.setToolTip(f"Not added to the context: {decision.reason}")
+        finally:
+            self.setUpdatesEnabled(True)
+        return None
+
     def _show_context_menu(self, pos) -> None:
         menu = QMenu(self)
         delete_action = QAction("Delete Selected", self)
@@ -89,74 +164,41 @@ class ContextBufferWidget(QListWidget):
             row = self.row(item)
             item_id = item.data(Qt.ItemDataRole.UserRole)  # Can be a file path or a url
             self._remove_elmts_from_context_buffer.execute([item_id])
+            self._item_ids.discard(item_id)
             self.takeItem(row)
 
     def add_snippet(self, path: Path, start: int, end: int, text: str) -> None:
-        try:
-            rel_path = path.relative_to(self._root_path)
-        except ValueError:
-            rel_path = path
-
         result = self._add_code_snippet_to_context_buffer.execute(
             path, start, end, text
         )
         if result.is_err():
             return
-
-        label = f"{rel_path}:{start}:{end}"
-        item = QListWidgetItem(label)
-        item.setData(Qt.ItemDataRole.UserRole, f"snippet:{label}")
-
-        self.addItem(item)
+        # The id carries the full path so removal hits the buffered snippet.
+        item_id = f"snippet:{path}:{start}:{end}"
+        if item_id in self._item_ids:
+            return
+        self._append_item(f"{self._display_path(path)}:{start}:{end}", item_id)
 
     def add_file(self, path: Path) -> None:
-        try:
-            rel_path = path.relative_to(self._root_path)
-        except ValueError:
-            rel_path = path
-        result = self._add_file_to_context_buffer.execute(path)
-        if result.is_err():
-            return
-        if not self.findItems(str(rel_path), Qt.MatchFlag.MatchExactly):
-            result = self._add_file_to_context_buffer.execute(path)
-            if result.is_err():
-                return
-            item = QListWidgetItem(str(rel_path))
-            item.setData(
-                Qt.ItemDataRole.UserRole, f"file:{str(path)}"
-            )  # or just path if you want
-            self.addItem(item)
+        self._add_file_items([path])
+
+    def add_files(self, paths: list[Path]) -> str | None:
+        """Add ``paths`` in one batch; returns the error, if any."""
+        return self._add_file_items(paths)
 
     def add_external_source(self, url: str) -> Result[str, str]:
         result = self._add_external_source_to_context_buffer.execute(url.strip())
-        if result.is_ok():
-            item = QListWidgetItem(url)
-            item.setData(Qt.ItemDataRole.UserRole, f"external_source:{url}")
-            self.addItem(item)
+        item_id = f"external_source:{url}"
+        if result.is_ok() and item_id not in self._item_ids:
+            self._append_item(url, item_id)
         return result
 
     def _add_files_from_directory(self, directory: Path) -> str | None:
-        ignore_tokens = get_ignore_tokens(directory)
-        for root, dirs, files in os.walk(directory):
-            root_path = Path(root)
-            dirs[:] = [
-                d for d in dirs if not should_ignore(root_path / d, ignore_tokens)
-            ]
-            for file in files:
-                file_path = root_path / file
-                if not should_ignore(file_path, ignore_tokens):
-                    try:
-                        rel_path = file_path.relative_to(self._root_path)
-                    except ValueError:
-                        rel_path = file_path
-                    if not self.findItems(str(rel_path), Qt.MatchFlag.MatchExactly):
-                        result = self._add_file_to_context_buffer.execute(file_path)
-                        if result.is_err():
-                            return result.err()
-                        item = QListWidgetItem(str(rel_path))
-                        item.setData(Qt.ItemDataRole.UserRole, f"file:{str(file_path)}")
-                        self.addItem(item)
-        return None
+        # Use the project's ignore files when the directory is inside it.
+        root = self._root_path
+        if not directory.is_relative_to(root):
+            root = directory
+        return self._add_file_items(list(ignore_matcher(root).iter_files(directory)))
 
     def dragEnterEvent(self, event: QDragEnterEvent) -> None:  # noqa: N802
         if event.mimeData().hasUrls():
@@ -165,24 +207,16 @@ class ContextBufferWidget(QListWidget):
             super().dragEnterEvent(event)
 
     def dropEvent(self, event: QDropEvent) -> None:  # noqa: N802
+        matcher = ignore_matcher(self._root_path)
+        dropped_files: list[Path] = []
         for url in event.mimeData().urls():
             path = Path(url.toLocalFile())
             if path.is_file():
-                ignore_tokens = get_ignore_tokens(self._root_path)
-                if not should_ignore(path, ignore_tokens):
-                    try:
-                        rel_path = path.relative_to(self._root_path)
-                    except ValueError:
-                        rel_path = path
-                    if not self.findItems(str(rel_path), Qt.MatchFlag.MatchExactly):
-                        result = self._add_file_to_context_buffer.execute(path)
-                        if result.is_err():
-                            continue
-                        item = QListWidgetItem(str(rel_path))
-                        item.setData(Qt.ItemDataRole.UserRole, f"file:{str(path)}")
-                        self.addItem(item)
+                if not matcher.is_ignored_path(path):
+                    dropped_files.append(path)
             elif path.is_dir():
                 self._add_files_from_directory(path)
+        self._add_file_items(dropped_files)
         event.acceptProposedAction()
 
     def dragMoveEvent(self, event: QDragMoveEvent) -> None:  # noqa: N802
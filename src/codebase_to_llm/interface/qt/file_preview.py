@@ -1,10 +1,23 @@
 from __future__ import annotations
 
+import functools
+import hashlib
 import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Callable, Any, Optional
-
-from PySide6.QtCore import Qt, QRect, QSize, Signal
+from typing import Callable, Any, Final, Optional
+
+from PySide6.QtCore import (
+    QObject,
+    QRect,
+    QRunnable,
+    QSize,
+    QThreadPool,
+    QTimer,
+    Qt,
+    Signal,
+)
 from PySide6.QtGui import (
     QAction,
     QPainter,
@@ -14,27 +27,167 @@ from PySide6.QtGui import (
     QColor,
     QFont,
     QKeyEvent,
+    QTextDocument,
+)
+from PySide6.QtWidgets import (
+    QInputDialog,
+    QPlainTextEdit,
+    QMenu,
+    QTextEdit,
+    QWidget,
+    QMessageBox,
 )
-from PySide6.QtWidgets import QPlainTextEdit, QMenu, QTextEdit, QWidget, QMessageBox
-from pygments import lex  # type: ignore
-from pygments.lexers import PythonLexer, CppLexer, MarkdownLexer  # type: ignore
+from pygments.lexer import Lexer  # type: ignore
+from pygments.lexers import get_lexer_for_filename  # type: ignore
 from pygments.token import Token  # type: ignore
+from pygments.util import ClassNotFound  # type: ignore
+
+from codebase_to_llm.domain.line_index import PagedTextFile
+
+# Larger documents are shown without highlighting, so they open at once.
+HIGHLIGHT_MAX_CHARS: Final[int] = 500_000
+# Larger files are shown read-only, a page of lines at a time, from a
+# memory map: only the lines around the view are ever read.
+PAGED_MIN_BYTES: Final[int] = 200_000
+PAGE_LINES: Final[int] = 2_000
+# A page holding very long lines stops short of this; a longer line is cut.
+PAGE_MAX_BYTES: Final[int] = 1_000_000
+# Scrolling this close to either end of a page moves the page.
+_PAGE_TURN_MARGIN: Final[int] = 100
+# After an edit, the document is lexed again once typing pauses this long.
+_RELEX_DELAY_MS: Final[int] = 250
+
+# (start within the block, length, pygments token type)
+_Span = tuple[int, int, Any]
+
+# Spans of recently shown contents: previewing a file again costs no lexing.
+_SPAN_CACHE_SIZE: Final[int] = 16
+_span_cache: OrderedDict[tuple[str, bytes], list[tuple[_Span, ...]]] = OrderedDict()
+_span_cache_lock = threading.Lock()
+
+# Lexing jobs are kept alive here until they finish, whatever happens to
+# the highlighter that started them.
+_running_jobs: set[_LexJob] = set()
+_running_jobs_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=256)
+def lexer_for(file_name: str) -> Lexer | None:
+    """The pygments lexer for ``file_name``, if pygments knows one.
+
+    The first lookup loads pygments' lexer table (a few hundred ms), so it
+    is done on the lexing thread.
+    """
+    try:
+        return get_lexer_for_filename(file_name)
+    except ClassNotFound:
+        return None
+
+
+def block_spans(text: str, lexer: Lexer) -> list[tuple[_Span, ...]]:
+    """Token spans of each line of ``text``, from one pass over all of it.
+
+    Lexing the whole text keeps multi-line strings and comments right;
+    tokens spanning lines are split at the line breaks.
+    """
+    key = (lexer.name, hashlib.blake2b(text.encode("utf-8", "surrogatepass")).digest())
+    with _span_cache_lock:
+        cached = _span_cache.get(key)
+        if cached is not None:
+            _span_cache.move_to_end(key)
+            return cached
+    blocks: list[list[_Span]] = [[]]
+    line_start = 0
+    for position, token_type, value in lexer.get_tokens_unprocessed(text):
+        end = position + len(value)
+        while True:
+            line_end = text.find("\n", position, end)
+            piece_end = end if line_end == -1 else line_end
+            if piece_end > position and token_type not in Token.Text:
+                blocks[-1].append(
+                    (position - line_start, piece_end - position, token_type)
+                )
+            if line_end == -1:
+                break
+            blocks.append([])
+            position = line_start = line_end + 1
+    spans = [tuple(block) for block in blocks]
+    with _span_cache_lock:
+        _span_cache[key] = spans
+        if len(_span_cache) > _SPAN_CACHE_SIZE:
+            _span_cache.popitem(last=False)
+    return spans
+
+
+class _LexSignals(QObject):
+    finished = Signal(int, object)  # (generation, list of block spans)
+
+
+class _LexJob(QRunnable):
+    def __init__(self, text: str, file_name: str, generation: int) -> None:
+        super().__init__()
+        self.setAutoDelete(False)
+        self.signals = _LexSignals()
+        self._text = text
+        self._file_name = file_name
+        self._generation = generation
+
+    def start(self) -> None:
+        with _running_jobs_lock:
+            _running_jobs.add(self)
+        QThreadPool.globalInstance().start(self)
+
+    def run(self) -> None:
+        try:
+            lexer = lexer_for(self._file_name)
+            spans = block_spans(self._text, lexer) if lexer is not None else []
+            try:
+                self.signals.finished.emit(self._generation, spans)
+            except RuntimeError:
+                # The signals object was deleted at shutdown: nothing is
+                # left to highlight.
+                pass
+        finally:
+            with _running_jobs_lock:
+                _running_jobs.discard(self)
 
 
 class FileSyntaxHighlighter(QSyntaxHighlighter):
-    def __init__(self, document, language: str):
+    """Colours a document from token spans cached per block.
+
+    The whole text is lexed on a pool thread, so opening a file never waits
+    for pygments, and each block then only applies its spans. After an
+    edit the text is lexed again once typing pauses, and only the blocks
+    whose spans changed are repainted.
+    """
+
+    def __init__(self, document: QTextDocument, file_name: str):
         super().__init__(document)
-        self.language = language
-        if language == "python":
-            self.lexer = PythonLexer()
-        elif language == "cpp":
-            self.lexer = CppLexer()
-        elif language == "markdown":
-            self.lexer = MarkdownLexer()
-        else:
-            self.lexer = None
+        # Kept here: once detached, PySide's document() returns a None it
+        # does not own, which corrupts None's reference count.
+        self._document: QTextDocument | None = document
+        self._file_name = file_name
+        self._spans: list[tuple[_Span, ...]] = []
+        self._generation = 0
+        self._lexed_revision = -1
         self.formats: dict[Any, QTextCharFormat] = {}
+        self._format_cache: dict[Any, QTextCharFormat | None] = {}
         self._init_formats()
+        self._relex_timer = QTimer(self)
+        self._relex_timer.setSingleShot(True)
+        self._relex_timer.setInterval(_RELEX_DELAY_MS)
+        self._relex_timer.timeout.connect(self._relex)  # type: ignore[arg-type]
+        document.contentsChange.connect(self._schedule_relex)
+        self._relex()
+
+    def detach(self) -> None:
+        """Stop colouring the document, e.g. before it shows another file."""
+        if self._document is None:
+            return
+        self._relex_timer.stop()
+        self._document.contentsChange.disconnect(self._schedule_relex)
+        self._document = None
+        self.setDocument(None)
 
     def _init_formats(self):
         # Basic mapping for a few token types
@@ -59,20 +212,72 @@ class FileSyntaxHighlighter(QSyntaxHighlighter):
             Token.Name.Class: make_format("#0e84b5", bold=True),
         }
 
+    def _format_for(self, token_type: Any) -> QTextCharFormat | None:
+        """The format of the closest styled ancestor (Keyword.Namespace -> Keyword)."""
+        if token_type in self._format_cache:
+            return self._format_cache[token_type]
+        styled = token_type
+        while styled not in self.formats and styled.parent is not None:
+            styled = styled.parent
+        fmt = self.formats.get(styled)
+        self._format_cache[token_type] = fmt
+        return fmt
+
+    def _schedule_relex(self, *_: int) -> None:
+        # Applying formats also reports a change; only real edits bump the
+        # revision.
+        document = self._document
+        if document is not None and document.revision() != self._lexed_revision:
+            self._relex_timer.start()
+
+    def _relex(self) -> None:
+        document = self._document
+        if document is None:
+            return
+        self._generation += 1
+        self._lexed_revision = document.revision()
+        text = document.toPlainText()
+        if len(text) > HIGHLIGHT_MAX_CHARS:
+            self._apply_spans(self._generation, [])
+            return
+        job = _LexJob(text, self._file_name, self._generation)
+        job.signals.finished.connect(self._apply_spans)
+        job.start()
+
+    def _apply_spans(self, generation: int, spans: list[tuple[_Span, ...]]) -> None:
+        document = self._document
+        if generation != self._generation or document is None:
+            return  # Superseded by a newer lexing pass, or detached.
+        previous, self._spans = self._spans, spans
+        if not previous:
+            self.rehighlight()
+            return
+        for number in range(max(len(previous), len(spans))):
+            old = previous[number] if number < len(previous) else ()
+            new = spans[number] if number < len(spans) else ()
+            if old != new:
+                self.rehighlightBlock(document.findBlockByNumber(number))
+
     def highlightBlock(self, text):
-        if not self.lexer:
+        number = self.currentBlock().blockNumber()
+        if number >= len(self._spans):
             return
-        offset = 0
-        for token, value in lex(text, self.lexer):
-            length = len(value)
-            fmt = self.formats.get(token)
-            if fmt:
-                self.setFormat(offset, length, fmt)
-            offset += length
+        limit = len(text)
+        # Until an edit is lexed again, stale spans are clipped to the text.
+        for start, length, token_type in self._spans[number]:
+            if start >= limit:
+                break
+            fmt = self._format_for(token_type)
+            if fmt is not None:
+                self.setFormat(start, min(length, limit - start), fmt)
 
 
 class FilePreviewWidget(QPlainTextEdit):
-    """File preview and editing widget with line numbers."""
+    """File preview and editing widget with line numbers.
+
+    Files over :data:`PAGED_MIN_BYTES` are shown read-only, a page of lines
+    at a time; line numbers, Go to Line (Ctrl+G) and snippets stay absolute.
+    """
 
     __slots__ = (
         "_line_number_area",
@@ -80,6 +285,10 @@ class FilePreviewWidget(QPlainTextEdit):
         "_current_path",
         "_syntax_highlighter",
         "_is_modified",
+        "_paged_file",
+        "_first_line",
+        "_turning_page",
+        "_replacing_text",
     )
 
     modificationChanged = Signal(bool)
@@ -92,12 +301,19 @@ class FilePreviewWidget(QPlainTextEdit):
         self._current_path: Path | None = None
         self._syntax_highlighter: Optional[FileSyntaxHighlighter] = None
         self._is_modified = False
+        self._paged_file: PagedTextFile | None = None
+        # Absolute number of the first line shown, 1 unless paging.
+        self._first_line = 1
+        self._turning_page = False
+        # Set while the shown text is replaced rather than edited.
+        self._replacing_text = False
 
         self._line_number_area = _LineNumberArea(self)
         self.blockCountChanged.connect(self._update_line_number_area_width)  # type: ignore[arg-type]
         self.updateRequest.connect(self._update_line_number_area)  # type: ignore[arg-type]
         self.cursorPositionChanged.connect(self._highlight_current_line)  # type: ignore[arg-type]
         self.textChanged.connect(self._handle_text_changed)  # type: ignore[arg-type]
+        self.verticalScrollBar().valueChanged.connect(self._turn_page_if_needed)
 
         self._update_line_number_area_width(0)
         self._highlight_current_line()
@@ -106,13 +322,16 @@ class FilePreviewWidget(QPlainTextEdit):
         self.customContextMenuRequested.connect(self._show_context_menu)
 
     def _handle_text_changed(self) -> None:
+        if self._replacing_text:
+            return
         was_modified = self._is_modified
         self._is_modified = True
         if not was_modified:
             self.modificationChanged.emit(True)
 
     def save_file(self) -> bool:
-        if self._current_path is None:
+        # A paged file shows one page of it: saving would truncate the file.
+        if self._current_path is None or self._paged_file is not None:
             return False
 
         try:
@@ -144,7 +363,7 @@ class FilePreviewWidget(QPlainTextEdit):
             add_action.triggered.connect(self._handle_add_to_buffer)  # type: ignore[arg-type]
             menu.addAction(add_action)
 
-        if self._is_modified:
+        if self._is_modified and self._paged_file is None:
             save_action = QAction("Save", self)
             save_action.triggered.connect(self.save_file)  # type: ignore[arg-type]
             menu.addAction(save_action)
@@ -162,7 +381,10 @@ class FilePreviewWidget(QPlainTextEdit):
         self.setExtraSelections(extra_selections)
 
     def _line_number_area_width(self) -> int:
-        digits = max(3, len(str(max(1, self.blockCount()))))
+        last_line = self._first_line + self.blockCount() - 1
+        if self._paged_file is not None:
+            last_line = max(last_line, self._paged_file.line_count())
+        digits = max(3, len(str(max(1, last_line))))
         fm = QFontMetrics(self.font())
         return 4 + fm.horizontalAdvance("9") * digits
 
@@ -200,7 +422,7 @@ class FilePreviewWidget(QPlainTextEdit):
 
         while block.isValid() and top <= event.rect().bottom():
             if block.isVisible() and bottom >= event.rect().top():
-                number = str(block_number + 1)
+                number = str(block_number + self._first_line)
                 painter.drawText(
                     0,
                     top,
@@ -221,48 +443,164 @@ class FilePreviewWidget(QPlainTextEdit):
         start_pos = cursor.selectionStart()
         end_pos = cursor.selectionEnd()
         doc = self.document()
-        start_line = doc.findBlock(start_pos).blockNumber() + 1
-        end_line = doc.findBlock(end_pos).blockNumber() + 1
+        start_line = doc.findBlock(start_pos).blockNumber() + self._first_line
+        end_line = doc.findBlock(end_pos).blockNumber() + self._first_line
         text = cursor.selectedText().replace("\u2029", os.linesep)
         self._add_snippet(self._current_path, start_line, end_line, text)
 
-    def load_file(self, path: Path, max_bytes: int = 200_000) -> None:
+    def _remove_highlighter(self) -> None:
+        if self._syntax_highlighter is not None:
+            # Detach first: it would otherwise also colour the new text.
+            self._syntax_highlighter.detach()
+            self._syntax_highlighter.deleteLater()
+            self._syntax_highlighter = None
+
+    def _set_text(self, text: str, file_name: str) -> None:
+        """Show ``text`` in place of the current text, as not modified."""
+        self._remove_highlighter()
+        self._replacing_text = True
+        try:
+            self.setPlainText(text)
+        finally:
+            self._replacing_text = False
+        if self._is_modified:
+            self._is_modified = False
+            self.modificationChanged.emit(False)
+        if len(text) <= HIGHLIGHT_MAX_CHARS:
+            self._syntax_highlighter = FileSyntaxHighlighter(self.document(), file_name)
+
+    def _close_paged_file(self) -> None:
+        if self._paged_file is not None:
+            self._paged_file.close()
+            self._paged_file = None
+        self._first_line = 1
+        self.setReadOnly(False)
+
+    def load_file(self, path: Path, max_bytes: int = PAGED_MIN_BYTES) -> None:
+        """Show ``path``: whole and editable, or paged if over ``max_bytes``."""
+        self._close_paged_file()
         try:
+            if path.stat().st_size > max_bytes:
+                opened = PagedTextFile.try_open(path)
+                paged_file = opened.ok()
+                if paged_file is None:
+                    raise OSError(opened.err())
+                paged_file.index_in_background()
+                self._paged_file = paged_file
+                self.setReadOnly(True)
+                self._current_path = path
+                self._show_page(1)
+                return
             with path.open("rb") as f:
-                data = f.read(max_bytes)
+                data = f.read()
             try:
                 text = data.decode("utf-8")
             except UnicodeDecodeError:
                 text = data.decode("latin-1", errors="replace")
-            self.setPlainText(text)
+            self._set_text(text, path.name)
             self._current_path = path
-            # Syntax highlighting
-            ext = path.suffix.lower()
-            language = None
-            if ext in [".py"]:
-                language = "python"
-            elif ext in [".cpp", ".cxx", ".cc", ".hpp", ".h", ".c"]:
-                language = "cpp"
-            elif ext in [".md"]:
-                language = "markdown"
-            if language:
-                self._syntax_highlighter = FileSyntaxHighlighter(
-                    self.document(), language
-                )
-            else:
-                self._syntax_highlighter = None
         except Exception as exc:  # pylint: disable=broad-except
-            self.setPlainText(f"<Could not preview file: {exc}>")
+            self._close_paged_file()
+            self._current_path = None
+            self._set_text(f"<Could not preview file: {exc}>", "")
+
+    def clear(self) -> None:
+        self._close_paged_file()
+        self._remove_highlighter()
+        super().clear()
+
+    def _show_page(self, first_line: int, top_line: int | None = None) -> None:
+        """Show the page starting at ``first_line``.
+
+        Turning pages passes the line at the top of the view as ``top_line``;
+        it stays there, and so does the cursor if its line is still shown.
+        """
+        paged = self._paged_file
+        if paged is None:
+            return
+        text, count = paged.read_page(first_line, PAGE_LINES, PAGE_MAX_BYTES)
+        if count == 0 and first_line > 1:
+            return
+        cursor_line = self.textCursor().blockNumber() + self._first_line
+        self._turning_page = True
+        try:
+            # One block per line: the text's final newline would add another.
+            self._set_text(text.removesuffix("\n"), paged.path.name)
+            self._first_line = first_line
+            if top_line is not None and first_line <= cursor_line < first_line + count:
+                block = self.document().findBlockByNumber(cursor_line - first_line)
+                cursor = self.textCursor()
+                cursor.setPosition(block.position())
+                self.setTextCursor(cursor)
+            self.verticalScrollBar().setValue((top_line or first_line) - first_line)
+        finally:
+            self._turning_page = False
+        self._update_line_number_area_width(0)
+
+    def _turn_page_if_needed(self, value: int) -> None:
+        # Without wrapping, the scroll value is the first visible line of the page.
+        paged = self._paged_file
+        if paged is None or self._turning_page:
+            return
+        top_line = self._first_line + value
+        last_line = self._first_line + self.blockCount() - 1
+        if value < _PAGE_TURN_MARGIN and self._first_line > 1:
+            self._show_page(max(1, top_line - PAGE_LINES // 2), top_line)
+        elif (
+            value > self.verticalScrollBar().maximum() - _PAGE_TURN_MARGIN
+            and paged.has_line(last_line + 1)
+        ):
+            # Pages cut short by long lines still move forward.
+            lines_above = min(PAGE_LINES // 2, value // 2)
+            self._show_page(max(self._first_line + 1, top_line - lines_above), top_line)
+
+    def go_to_line(self, line: int) -> None:
+        """Move the cursor to absolute line ``line`` and centre it."""
+        line = max(line, 1)
+        paged = self._paged_file
+        if paged is not None:
+            while line > 1 and not paged.has_line(line):
+                line = min(line - 1, paged.line_count())
+            if not self._first_line <= line < self._first_line + self.blockCount():
+                self._show_page(max(1, line - PAGE_LINES // 2))
+        block = self.document().findBlockByNumber(line - self._first_line)
+        if not block.isValid():
+            block = self.document().lastBlock()
+        cursor = self.textCursor()
+        cursor.setPosition(block.position())
+        self.setTextCursor(cursor)
+        self.centerCursor()
+
+    def _ask_line_to_go_to(self) -> None:
+        if self._paged_file is None:
+            last_line = self.blockCount()
+        elif self._paged_file.is_indexed():
+            last_line = self._paged_file.line_count()
+        else:
+            last_line = 2**31 - 1
+        current = self.textCursor().blockNumber() + self._first_line
+        line, accepted = QInputDialog.getInt(
+            self, "Go to Line", "Line:", current, 1, max(1, last_line)
+        )
+        if accepted:
+            self.go_to_line(line)
 
     def keyPressEvent(self, event: QKeyEvent) -> None:
         if (
             event.modifiers() & Qt.KeyboardModifier.ControlModifier
             and event.key() == Qt.Key.Key_S
         ):
-            if self._is_modified:
+            if self._is_modified and self._paged_file is None:
                 self.save_file()
             event.accept()
             return
+        if (
+            event.modifiers() & Qt.KeyboardModifier.ControlModifier
+            and event.key() == Qt.Key.Key_G
+        ):
+            self._ask_line_to_go_to()
+            event.accept()
+            return
         super().keyPressEvent(event)
 
 
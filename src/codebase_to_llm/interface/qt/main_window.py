@@ -2,11 +2,16 @@
 
 from __future__ import annotations
 
+import sqlite3
 import sys
+import threading
+import time
 import webbrowser
 import shutil
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Final
+from typing import Callable, Final, cast
+from typing_extensions import final
 
 from PySide6.QtCore import (
     Qt,
@@ -15,7 +20,10 @@ from PySide6.QtCore import (
     QRegularExpression,
     QSize,
     QThread,
+    QThreadPool,
+    QTimer,
     QObject,
+    QRunnable,
     Signal,
 )
 from PySide6.QtGui import QAction
@@ -41,6 +49,7 @@ from PySide6.QtWidgets import (
     QCheckBox,
     QLineEdit,
     QLabel,
+    QProgressBar,
 )
 
 from codebase_to_llm.application.uc_add_code_snippet_to_context_buffer import (
@@ -72,6 +81,12 @@ from codebase_to_llm.application.uc_add_prompt_from_file import (
     AddPromptFromFileUseCase,
 )
 from codebase_to_llm.application.uc_modify_prompt import ModifyPromptUseCase
+from codebase_to_llm.application.uc_refresh_repository_index import (
+    RefreshRepositoryIndexUseCase,
+)
+from codebase_to_llm.application.uc_select_relevant_context import (
+    SelectRelevantContextUseCase,
+)
 from codebase_to_llm.domain.prompt import FileAddedAsPromptVariableEvent
 from codebase_to_llm.infrastructure.filesystem_directory_repository import (
     FileSystemDirectoryRepository,
@@ -83,10 +98,18 @@ from codebase_to_llm.infrastructure.filesystem_recent_repository import (
 from codebase_to_llm.infrastructure.in_memory_prompt_repository import (
     InMemoryPromptRepository,
 )
+from codebase_to_llm.infrastructure.sqlite_repository_index import (
+    SqliteRepositoryIndex,
+)
 from codebase_to_llm.infrastructure.url_external_source_repository import (
     UrlExternalSourceRepository,
 )
-from codebase_to_llm.domain.result import Result
+from codebase_to_llm.domain.result import Ok, Result
+from codebase_to_llm.domain.content_search import ContentSearchIndex, content_index_for
+from codebase_to_llm.domain.context_packing import count_tokens
+from codebase_to_llm.domain.context_selection import SelectedContext
+from codebase_to_llm.domain.import_graph import import_graph_for
+from codebase_to_llm.domain.tree_cache import invalidate_tree
 
 from .context_buffer import ContextBufferWidget
 from .file_preview import FilePreviewWidget
@@ -120,6 +143,16 @@ from codebase_to_llm.domain.api_key import ApiKeyId
 DEFAULT_USER_ID = "default-user"
 
 
+# Files found by content search that the tree filter keeps at most.
+_CONTENT_FILTER_LIMIT: Final[int] = 500
+# The tree filter is applied once typing pauses this long.
+_FILTER_DELAY_MS: Final[int] = 200
+# Default token budget offered when adding files relevant to the request.
+_RELEVANT_CONTEXT_BUDGET: Final[int] = 30_000
+# Seconds between progress reports while the context is assembled.
+_COPY_PROGRESS_INTERVAL: Final[float] = 0.1
+
+
 class DragDropFileSystemModel(QFileSystemModel):
     """Custom file system model that supports drag and drop operations."""
 
@@ -191,6 +224,189 @@ class RulesMenu(QMenu):
         super().mouseReleaseEvent(event)
 
 
+class SearchFilterProxyModel(QSortFilterProxyModel):
+    """Name regex filter that also keeps the files found by content search."""
+
+    def __init__(self):
+        super().__init__()
+        self._extra_paths: frozenset[str] = frozenset()
+
+    def set_extra_paths(self, paths: frozenset[str]) -> None:
+        self._extra_paths = paths
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if super().filterAcceptsRow(source_row, source_parent):
+            return True
+        if not self._extra_paths:
+            return False
+        model = cast(QFileSystemModel, self.sourceModel())
+        index = model.index(source_row, 0, source_parent)
+        return model.filePath(index) in self._extra_paths
+
+
+class RepositoryIndexWorker(QObject):
+    loaded = Signal(object, object)  # (index, Result[IndexSummary]) before refresh
+    # (index, Result[IndexRefreshStats], Result[IndexSummary])
+    finished = Signal(object, object, object)
+
+    def __init__(self, index: SqliteRepositoryIndex):
+        super().__init__()
+        self.index = index
+
+    def run(self):
+        self.loaded.emit(self.index, self.index.summary())
+        result = RefreshRepositoryIndexUseCase(self.index).execute()
+        self.finished.emit(self.index, result, self.index.summary())
+
+
+@final
+@dataclass(frozen=True)
+class CopiedContext:
+    text: str
+    tokens: int
+    seconds: float
+
+
+class CopyContextSignals(QObject):
+    progress = Signal(int)  # characters assembled so far
+    finished = Signal(object)  # Result[CopiedContext, str], None once cancelled
+
+
+class CopyContextWorker(QRunnable):
+    """Assemble the context on a pool thread; the caller sets the clipboard.
+
+    Cancellation is checked between fragments, so it takes effect once the
+    tree and the prompt are resolved.
+    """
+
+    def __init__(
+        self,
+        use_case: CopyContextUseCase,
+        repo: DirectoryRepositoryPort,
+        prompt_repo: PromptRepositoryPort,
+        include_tree: bool,
+        root_directory_path: str,
+    ):
+        super().__init__()
+        # Kept by the window until finished is handled, not by the pool.
+        self.setAutoDelete(False)
+        self.signals = CopyContextSignals()
+        self._use_case = use_case
+        self._repo = repo
+        self._prompt_repo = prompt_repo
+        self._include_tree = include_tree
+        self._root_directory_path = root_directory_path
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def run(self) -> None:
+        started = time.perf_counter()
+        fragments = self._use_case.stream(
+            self._repo,
+            self._prompt_repo,
+            self._include_tree,
+            self._root_directory_path,
+        )
+        if fragments.is_err():
+            self.signals.finished.emit(fragments)
+            return
+        parts: list[str] = []
+        characters = 0
+        reported_at = started
+        for fragment in fragments.ok() or ():
+            if self._cancelled.is_set():
+                self.signals.finished.emit(None)
+                return
+            parts.append(fragment)
+            characters += len(fragment)
+            now = time.perf_counter()
+            if now - reported_at >= _COPY_PROGRESS_INTERVAL:
+                self.signals.progress.emit(characters)
+                reported_at = now
+        text = "".join(parts)
+        copied = CopiedContext(text, count_tokens(text), time.perf_counter() - started)
+        self.signals.finished.emit(Ok(copied))
+
+
+class FilterSearchSignals(QObject):
+    finished = Signal(int, object)  # (generation, frozenset of absolute paths)
+
+
+class FilterSearchWorker(QRunnable):
+    """Find the files whose path or content matches the filter, on a pool thread.
+
+    Until the content index is built, paths are matched in the repository
+    index, which a previous session already filled.
+    """
+
+    def __init__(
+        self,
+        generation: int,
+        text: str,
+        content_index: ContentSearchIndex,
+        index: SqliteRepositoryIndex | None,
+    ):
+        super().__init__()
+        # Kept by the window until finished is handled, not by the pool.
+        self.setAutoDelete(False)
+        self.signals = FilterSearchSignals()
+        self._generation = generation
+        self._text = text
+        self._content_index = content_index
+        self._index = index
+
+    def run(self) -> None:
+        paths: frozenset[str] = frozenset()
+        if self._content_index.ready():
+            result = self._content_index.search(
+                self._text, limit=_CONTENT_FILTER_LIMIT, max_line_hits=0
+            )
+            root = self._content_index.root
+            paths = frozenset((root / hit.path).as_posix() for hit in result.ok() or [])
+        elif self._index is not None:
+            found = self._index.search_paths(self._text, limit=_CONTENT_FILTER_LIMIT)
+            root = self._index.root
+            paths = frozenset((root / path).as_posix() for path in found.ok() or [])
+        self.signals.finished.emit(self._generation, paths)
+
+
+class SelectContextSignals(QObject):
+    finished = Signal(object)  # Result[list[SelectedContext], str]
+
+
+class SelectContextWorker(QRunnable):
+    """Rank the repository against the request on a pool thread.
+
+    Waits for the content index when it is still being built; the window
+    then adds the selection to the buffer.
+    """
+
+    def __init__(
+        self,
+        use_case: SelectRelevantContextUseCase,
+        index: ContentSearchIndex,
+        token_budget: int,
+        query: str,
+    ):
+        super().__init__()
+        # Kept by the window until finished is handled, not by the pool.
+        self.setAutoDelete(False)
+        self.signals = SelectContextSignals()
+        self.index = index
+        self._use_case = use_case
+        self._token_budget = token_budget
+        self._query = query
+
+    def run(self) -> None:
+        if not self.index.ready():
+            self.index.refresh()
+        self.signals.finished.emit(
+            self._use_case.select(self.index, self._token_budget, query=self._query)
+        )
+
+
 class LLMResponseWorker(QObject):
     finished = Signal(str, str)  # (status, message)
 
@@ -283,6 +499,17 @@ class MainWindow(QMainWindow):
         "_llm_thread",
         "_llm_worker",
         "_original_window_title",
+        "_index",
+        "_content_index",
+        "_import_graph",
+        "_copy_job",
+        "_select_job",
+        "_copy_progress",
+        "_copy_cancel_button",
+        "_index_refreshes",
+        "_filter_timer",
+        "_filter_generation",
+        "_filter_jobs",
     )
 
     def __init__(
@@ -350,7 +577,7 @@ class MainWindow(QMainWindow):
         self._model.setFilter(QDir.Filter.Dirs | QDir.Filter.Files | QDir.Filter.Hidden)  # type: ignore[attr-defined]
         self._model.setRootPath(str(initial_root))
 
-        self._filter_model = QSortFilterProxyModel()
+        self._filter_model = SearchFilterProxyModel()
         self._filter_model.setSourceModel(self._model)
         self._filter_model.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
         self._filter_model.setRecursiveFilteringEnabled(True)
@@ -369,7 +596,13 @@ class MainWindow(QMainWindow):
         self._tree_view.customContextMenuRequested.connect(self._show_tree_context_menu)
 
         self._name_filter_edit = QLineEdit()
-        self._name_filter_edit.setPlaceholderText("Filter files (regex)")
+        self._name_filter_edit.setPlaceholderText("Filter files (regex or content)")
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(_FILTER_DELAY_MS)
+        self._filter_timer.timeout.connect(self._apply_name_filter)  # type: ignore[arg-type]
+        self._filter_generation = 0
+        self._filter_jobs: set[FilterSearchWorker] = set()
         self._name_filter_edit.textChanged.connect(self._filter_by_name)
 
         left_panel = QWidget()
@@ -422,6 +655,7 @@ class MainWindow(QMainWindow):
             self._add_external_source_use_case,
             self._add_code_snippet_to_context_buffer,
         )
+        self._context_buffer_widget.set_token_estimator(self._estimate_tokens)
         right_layout.addWidget(self._context_buffer_widget)
 
         splitter.addWidget(right_panel)
@@ -506,6 +740,23 @@ class MainWindow(QMainWindow):
         toolbar.addWidget(recent_button)
         self._populate_recent_menu()
 
+        self._index: SqliteRepositoryIndex | None = None
+        self._content_index = content_index_for(initial_root)
+        self._import_graph = import_graph_for(initial_root)
+        self._index_refreshes: dict[QThread, RepositoryIndexWorker] = {}
+        self._open_index(initial_root)
+
+        self._copy_job: CopyContextWorker | None = None
+        self._select_job: SelectContextWorker | None = None
+        self._copy_progress = QProgressBar()
+        self._copy_progress.setRange(0, 0)  # busy: the final size is unknown
+        self._copy_progress.setMaximumWidth(120)
+        self._copy_cancel_button = QPushButton("Cancel")
+        self._copy_cancel_button.clicked.connect(self._cancel_copy_context)  # type: ignore[arg-type]
+        for widget in (self._copy_progress, self._copy_cancel_button):
+            widget.setVisible(False)
+            self.statusBar().addPermanentWidget(widget)
+
         spacer = QWidget()
         spacer.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Preferred)
         toolbar.addWidget(spacer)
@@ -686,6 +937,11 @@ class MainWindow(QMainWindow):
                 lambda checked, p=file_path: self._context_buffer_widget.add_file(p)
             )
             menu.addAction(add_action)
+            add_with_imports_action = QAction("Add with Dependencies", self)
+            add_with_imports_action.triggered.connect(
+                lambda checked, p=file_path: self._add_file_with_dependencies(p)
+            )
+            menu.addAction(add_with_imports_action)
 
             # --- New Action: Generate Response with GPT-4.1 ---
             if file_path.stat().st_size == 0:
@@ -745,6 +1001,7 @@ class MainWindow(QMainWindow):
                 new_path.touch(exist_ok=False)
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
+        invalidate_tree(parent_path / name)
 
     def _delete_item(self, index) -> None:
         if not index.isValid():
@@ -776,6 +1033,7 @@ class MainWindow(QMainWindow):
                     path.unlink()
             except Exception as e:
                 QMessageBox.critical(self, "Error", str(e))
+            invalidate_tree(path)
 
     def _rename_item(self, index) -> None:
         if not index.isValid():
@@ -795,6 +1053,8 @@ class MainWindow(QMainWindow):
                 old_path.rename(new_path)
             except Exception as e:
                 QMessageBox.critical(self, "Error", str(e))
+            invalidate_tree(old_path)
+            invalidate_tree(old_path.parent / new_name)
 
     def _add_key_variable_from_file(
         self, variable_key: str, relative_path: Path
@@ -841,6 +1101,7 @@ class MainWindow(QMainWindow):
             self._context_buffer_widget.clear()
             self._context_buffer_widget.set_root_path(path)
             self._file_preview.clear()
+            self._open_index(path)
             # Save to recent repo
             result = self._recent_repo.load_paths()
             paths: list[Path] = result.ok() or []
@@ -862,6 +1123,7 @@ class MainWindow(QMainWindow):
         self._context_buffer_widget.clear()
         self._context_buffer_widget.set_root_path(path)
         self._file_preview.clear()
+        self._open_index(path)
         # Save to recent repo
         result = self._recent_repo.load_paths()
         paths: list[Path] = result.ok() or []
@@ -870,6 +1132,155 @@ class MainWindow(QMainWindow):
             self._recent_repo.save_paths(paths)
         self._populate_recent_menu()
 
+    def _open_index(self, root: Path) -> None:
+        """Show what the last session indexed, then refresh it in the background."""
+        self._content_index = content_index_for(root)
+        self._import_graph = import_graph_for(root)
+        self._content_index.refresh_in_background()
+        self._import_graph.refresh_in_background()
+        if self._index is not None:
+            # A refresh still walking the previous repository stops here.
+            self._index.close()
+        try:
+            self._index = SqliteRepositoryIndex(root)
+        except (OSError, sqlite3.Error) as exc:
+            self._index = None
+            self.statusBar().showMessage(f"Repository index unavailable: {exc}")
+            return
+
+        thread = QThread(self)
+        worker = RepositoryIndexWorker(self._index)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.loaded.connect(self._on_index_loaded)
+        worker.finished.connect(self._on_index_refreshed)
+        worker.finished.connect(thread.quit)
+        thread.finished.connect(lambda: self._forget_index_refresh(thread))
+        # The worker must outlive its run(), so it is kept until the thread ends.
+        self._index_refreshes[thread] = worker
+        thread.start()
+
+    def _on_index_loaded(self, index: SqliteRepositoryIndex, summary_result) -> None:
+        if index is not self._index:
+            return
+        summary = summary_result.ok()
+        if summary is not None and summary.files:
+            self.statusBar().showMessage(
+                f"{summary.files:,} files, ~{summary.tokens:,} tokens "
+                "(indexed last session)"
+            )
+
+    def _on_index_refreshed(
+        self, index: SqliteRepositoryIndex, result, summary_result
+    ) -> None:
+        if index is not self._index:
+            return  # Another repository was opened meanwhile.
+        if result.is_err():
+            self.statusBar().showMessage(result.err() or "")
+            return
+        stats = result.ok()
+        summary = summary_result.ok()
+        tokens = summary.tokens if summary is not None else 0
+        self.statusBar().showMessage(
+            f"{stats.files:,} files, ~{tokens:,} tokens "
+            f"({stats.updated:,} updated, {stats.removed:,} removed)"
+        )
+
+    def _forget_index_refresh(self, thread: QThread) -> None:
+        worker = self._index_refreshes.pop(thread, None)
+        if worker is not None:
+            worker.deleteLater()
+        thread.deleteLater()
+
+    def _estimate_tokens(self, paths: list[Path]) -> dict[Path, int]:
+        """Indexed token estimates of ``paths``; paths not indexed are left out."""
+        if self._index is None:
+            return {}
+        relative: dict[str, Path] = {}
+        for path in paths:
+            if path.is_relative_to(self._index.root):
+                relative[path.relative_to(self._index.root).as_posix()] = path
+        estimates = self._index.token_estimates(relative).ok() or {}
+        return {relative[key]: tokens for key, tokens in estimates.items()}
+
+    def closeEvent(self, event) -> None:  # noqa: N802
+        if self._index is not None:
+            self._index.close()
+        for thread in list(self._index_refreshes):
+            thread.quit()
+            thread.wait()
+        super().closeEvent(event)
+
+    def _add_file_with_dependencies(self, path: Path) -> None:
+        """Add ``path`` and the local files it imports, two hops deep."""
+        self._import_graph.refresh_in_background()
+        if not self._import_graph.ready():
+            self.statusBar().showMessage("The import graph is still being built.")
+            return
+        result = self._import_graph.dependencies(path)
+        if result.is_err():
+            self.statusBar().showMessage(result.err() or "")
+            return
+        dependencies = result.ok() or []
+        error = self._context_buffer_widget.add_files([path, *dependencies])
+        self.statusBar().showMessage(
+            error or f"Added {path.name} with {len(dependencies)} imported files"
+        )
+
+    def _select_relevant_context(self) -> None:
+        """Rank the repository against the user request and fill the buffer."""
+        if self._select_job is not None:
+            self.statusBar().showMessage("Still selecting relevant files…")
+            return
+        self._content_index.refresh_in_background()
+        budget, ok = QInputDialog.getInt(
+            self,
+            "Add Relevant Files",
+            "Token budget:",
+            _RELEVANT_CONTEXT_BUDGET,
+            1,
+            2_000_000,
+            1_000,
+        )
+        if not ok:
+            return
+        job = SelectContextWorker(
+            SelectRelevantContextUseCase(self._context_buffer, self._prompt_repo),
+            self._content_index,
+            budget,
+            self.user_request_text_edit.toPlainText(),
+        )
+        job.signals.finished.connect(
+            lambda result, job=job: self._on_relevant_context_selected(job, result)
+        )
+        self._select_job = job
+        self.statusBar().showMessage("Selecting relevant files…")
+        QThreadPool.globalInstance().start(job)
+
+    def _on_relevant_context_selected(
+        self, job: SelectContextWorker, result: Result[list[SelectedContext], str]
+    ) -> None:
+        self._select_job = None
+        if job.index is not self._content_index:
+            return  # Another repository was opened meanwhile.
+        selected = result.ok()
+        if selected is None:
+            self.statusBar().showMessage(result.err() or "")
+            return
+        # Added here, on the GUI thread, so the list and the buffer agree.
+        error = self._context_buffer_widget.add_files(
+            [item.path for item in selected if not item.is_snippet]
+        )
+        for item in selected:
+            if item.start is not None and item.end is not None:
+                self._context_buffer_widget.add_snippet(
+                    item.path, item.start, item.end, ""
+                )
+        tokens = sum(item.tokens for item in selected)
+        self.statusBar().showMessage(
+            error or f"Added {len(selected)} relevant files (~{tokens:,} tokens)"
+        )
+
     def _populate_recent_menu(self) -> None:
         self._recent_menu.clear()
         result = self._recent_repo.load_paths()
@@ -883,15 +1294,67 @@ class MainWindow(QMainWindow):
             self._recent_menu.addAction(action)
 
     def _copy_context(self) -> None:  # noqa: D401
-        result = self._copy_context_use_case.execute(
+        self._start_copy_context()
+
+    def _start_copy_context(self, then: Callable[[], object] | None = None) -> None:
+        """Assemble the context in the background, then set the clipboard.
+
+        A copy still running is cancelled: the newest request wins. ``then``
+        runs on the GUI thread once the clipboard holds the context.
+        """
+        if self._copy_job is not None:
+            self._copy_job.cancel()
+        job = CopyContextWorker(
+            self._copy_context_use_case,
             self._repo,
             self._prompt_repo,
             self.include_project_structure_checkbox.isChecked(),
             self._model.rootPath(),
         )
-        if result.is_err():
-            error: str = result.err() or ""
-            QMessageBox.critical(self, "Copy Context Error", error)
+        job.signals.progress.connect(self._on_copy_progress)
+        job.signals.finished.connect(
+            lambda outcome, job=job: self._on_copy_finished(job, outcome, then)
+        )
+        self._copy_job = job
+        self._copy_progress.setVisible(True)
+        self._copy_cancel_button.setVisible(True)
+        self.statusBar().showMessage("Assembling context…")
+        QThreadPool.globalInstance().start(job)
+
+    def _cancel_copy_context(self) -> None:
+        if self._copy_job is not None:
+            self._copy_job.cancel()
+
+    def _on_copy_progress(self, characters: int) -> None:
+        self.statusBar().showMessage(f"Assembling context… {characters:,} characters")
+
+    def _on_copy_finished(
+        self,
+        job: CopyContextWorker,
+        outcome: Result[CopiedContext, str] | None,
+        then: Callable[[], object] | None,
+    ) -> None:
+        if job is not self._copy_job:
+            return  # Superseded by a newer copy.
+        self._copy_job = None
+        self._copy_progress.setVisible(False)
+        self._copy_cancel_button.setVisible(False)
+        if outcome is None:
+            self.statusBar().showMessage("Copy cancelled.")
+            return
+        copied = outcome.ok()
+        if copied is None:
+            self.statusBar().clearMessage()
+            QMessageBox.critical(self, "Copy Context Error", outcome.err() or "")
+            return
+        # The clipboard belongs to the GUI thread.
+        self._clipboard.set_text(copied.text)
+        self.statusBar().showMessage(
+            f"Copied {len(copied.text):,} characters (~{copied.tokens:,} tokens) "
+            f"in {copied.seconds:.2f} s"
+        )
+        if then is not None:
+            then()
 
     def _prompt_external_source(self) -> None:
         url, ok = QInputDialog.getText(
@@ -966,6 +1429,9 @@ class MainWindow(QMainWindow):
         copy_context_action = QAction("Copy Context", self)
         copy_context_action.triggered.connect(self._copy_context)  # type: ignore[arg-type]
         menu.addAction(copy_context_action)
+        select_action = QAction("Add Relevant Files…", self)
+        select_action.triggered.connect(self._select_relevant_context)  # type: ignore[arg-type]
+        menu.addAction(select_action)
 
         prompts_result = self._prompts_repo.load_prompts()
         if prompts_result.is_ok():
@@ -993,8 +1459,44 @@ class MainWindow(QMainWindow):
         else:
             self.user_request_text_edit.setPlainText(content)
 
-    def _filter_by_name(self, text: str) -> None:
+    def _filter_by_name(self, _text: str) -> None:
+        self._filter_timer.start()
+
+    def _apply_name_filter(self) -> None:
+        """Filter the tree by name now; content matches join it when found."""
+        text = self._name_filter_edit.text()
+        self._filter_generation += 1
+        if text.strip():
+            self._content_index.refresh_in_background()
+            job = FilterSearchWorker(
+                self._filter_generation, text, self._content_index, self._index
+            )
+            job.signals.finished.connect(
+                lambda generation, paths, job=job: self._on_filter_search_finished(
+                    job, generation, paths
+                )
+            )
+            self._filter_jobs.add(job)
+            QThreadPool.globalInstance().start(job)
+        else:
+            self._filter_model.set_extra_paths(frozenset())
         self._filter_model.setFilterRegularExpression(QRegularExpression(text))
+        self._reset_tree_root()
+
+    def _on_filter_search_finished(
+        self, job: FilterSearchWorker, generation: int, paths: frozenset[str]
+    ) -> None:
+        self._filter_jobs.discard(job)
+        if generation != self._filter_generation:
+            return  # The filter text changed meanwhile.
+        # Makes the model load the directories leading to each match.
+        for directory in {path.rsplit("/", 1)[0] for path in paths}:
+            self._model.index(directory)
+        self._filter_model.set_extra_paths(paths)
+        self._filter_model.invalidateFilter()
+        self._reset_tree_root()
+
+    def _reset_tree_root(self) -> None:
         root_source_idx = self._model.index(str(self._model.rootPath()))
         root_proxy_idx = self._filter_model.mapFromSource(root_source_idx)
         self._tree_view.setRootIndex(root_proxy_idx)
@@ -1035,68 +1537,26 @@ class MainWindow(QMainWindow):
             self._rules_menu.addAction(action)
 
     def _handle_copy_context_widget(self) -> None:
-        result = self._copy_context_use_case.execute(
-            self._repo,
-            self._prompt_repo,
-            self.include_project_structure_checkbox.isChecked(),
-            self._model.rootPath(),
-        )
-        if result.is_err():
-            error: str = result.err() or ""
-            QMessageBox.critical(self, "Copy Context Error", error)
+        self._start_copy_context()
 
     def _open_chatgpt(self) -> None:
         """Copy context then open ChatGPT in the browser."""
-        result = self._copy_context_use_case.execute(
-            self._repo,
-            self._prompt_repo,
-            self.include_project_structure_checkbox.isChecked(),
-            self._model.rootPath(),
-        )
-        if result.is_ok():
-            webbrowser.open("https://chat.openai.com/")
-        else:
-            QMessageBox.critical(self, "Copy Context Error", result.err() or "")
+        self._start_copy_context(lambda: webbrowser.open("https://chat.openai.com/"))
 
     def _open_claude(self) -> None:
         """Copy context then open Claude in the browser."""
-        result = self._copy_context_use_case.execute(
-            self._repo,
-            self._prompt_repo,
-            self.include_project_structure_checkbox.isChecked(),
-            self._model.rootPath(),
-        )
-        if result.is_ok():
-            webbrowser.open("https://claude.ai/")
-        else:
-            QMessageBox.critical(self, "Copy Context Error", result.err() or "")
+        self._start_copy_context(lambda: webbrowser.open("https://claude.ai/"))
 
     def _open_langdoc(self) -> None:
         """Copy context then open LangDocin the browser."""
-        result = self._copy_context_use_case.execute(
-            self._repo,
-            self._prompt_repo,
-            self.include_project_structure_checkbox.isChecked(),
-            self._model.rootPath(),
+        self._start_copy_context(
+            lambda: webbrowser.open("https://app.langdock.com/chat")
         )
-        if result.is_ok():
-            webbrowser.open("https://app.langdock.com/chat")
-        else:
-            QMessageBox.critical(self, "Copy Context Error", result.err() or "")
 
     def _open_gemini(self) -> None:
         """Copy context then open Gemini in the browser."""
         """Copy context then open LangDocin the browser."""
-        result = self._copy_context_use_case.execute(
-            self._repo,
-            self._prompt_repo,
-            self.include_project_structure_checkbox.isChecked(),
-            self._model.rootPath(),
-        )
-        if result.is_ok():
-            webbrowser.open("https://gemini.google.com/")
-        else:
-            QMessageBox.critical(self, "Copy Context Error", result.err() or "")
+        self._start_copy_context(lambda: webbrowser.open("https://gemini.google.com/"))
 
     def _update_preview_file_name_label(self):
         path = self._file_preview._current_path
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+
+@pytest.fixture
+def write_old() -> Callable[[Path, str], None]:
+    """Write a file dated well outside the racy window, so its stamp is trusted."""
+
+    def write(path: Path, text: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+        os.utime(path, (1_600_000_000, 1_600_000_000))
+
+    return write
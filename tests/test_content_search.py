@@ -0,0 +1,38 @@
+from pathlib import Path
+from typing import Callable
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from codebase_to_llm.domain.content_search import ContentSearchIndex
+
+
+def test_search_ranks_names_then_content_and_refreshes(
+    tmp_path: Path, write_old: Callable[[Path, str], None]
+):
+    (tmp_path / "pkg").mkdir()
+    write_old(tmp_path / "pkg" / "parser.py", "def parse_header(raw):\n    pass\n")
+    write_old(
+        tmp_path / "pkg" / "client.py",
+        "from .parser import parse_header\n\nparse_header(b'')\n",
+    )
+    write_old(tmp_path / "notes.md", "Nothing relevant here.\n")
+
+    index = ContentSearchIndex(tmp_path)
+    assert index.search("parse").is_err()
+    index.refresh()
+
+    hits = index.search("PARSE_HEADER").ok() or []
+    assert [hit.path for hit in hits] == ["pkg/client.py", "pkg/parser.py"]
+    assert [line.line_number for line in hits[0].line_hits] == [1, 3]
+
+    by_name = index.search("parser").ok() or []
+    assert by_name[0].path == "pkg/parser.py" and by_name[0].path_match
+    assert index.search("header(b").ok()[0].path == "pkg/client.py"  # type: ignore[index]
+
+    write_old(tmp_path / "notes.md", "Call parse_header first.\n")
+    (tmp_path / "pkg" / "client.py").unlink()
+    stats = index.refresh()
+    assert (stats.files, stats.updated, stats.removed) == (2, 1, 1)
+    hits = index.search("parse_header").ok() or []
+    assert [hit.path for hit in hits] == ["notes.md", "pkg/parser.py"]
@@ -0,0 +1,84 @@
+from pathlib import Path
+
+from codebase_to_llm.application.uc_add_file_to_context_buffer import (
+    AddFileToContextBufferUseCase,
+)
+from codebase_to_llm.application.uc_remove_elmts_from_context_buffer import (
+    RemoveElementsFromContextBufferUseCase,
+)
+from codebase_to_llm.domain.context_buffer import ContextBuffer, File, Snippet
+from codebase_to_llm.infrastructure.in_memory_context_buffer_repository import (
+    InMemoryContextBufferRepository,
+)
+
+
+def test_context_buffer_rejects_duplicates_and_keeps_insertion_order(tmp_path: Path):
+    buffer = ContextBuffer()
+    a = tmp_path / "a.py"
+    b = tmp_path / "b.py"
+    assert buffer.add_file(File(b, "b")).is_ok()
+    assert buffer.add_file(File(a, "a")).is_ok()
+    assert buffer.add_file(File(tmp_path / "sub" / ".." / "b.py", "b")).is_err()
+    assert [f.path for f in buffer.get_files()] == [b, a]
+
+    assert buffer.add_files([File(a, "a"), File(tmp_path / "c.py", "c")]) == 1
+    assert buffer.has_file(tmp_path / "c.py")
+
+    buffer.remove_file(b)
+    assert [f.path for f in buffer.get_files()] == [a, tmp_path / "c.py"]
+
+
+def test_context_buffer_snippets_are_keyed_by_path_and_range(tmp_path: Path):
+    buffer = ContextBuffer()
+    path = tmp_path / "m.py"
+    assert buffer.add_snippet(Snippet(path, 1, 2, "x")).is_ok()
+    assert buffer.add_snippet(Snippet(path, 1, 2, "x")).is_err()
+    assert buffer.add_snippet(Snippet(path, 3, 4, "y")).is_ok()
+
+    assert buffer.remove_snippet(path, 1, 2).is_ok()
+    assert buffer.remove_snippet(path, 1, 2).is_err()
+    assert [(s.start, s.end) for s in buffer.get_snippets()] == [(3, 4)]
+
+
+def test_bulk_add_and_remove_by_item_ids(tmp_path: Path):
+    repo = InMemoryContextBufferRepository()
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"f{index}.txt"
+        path.write_text(str(index))
+        paths.append(path)
+
+    result = AddFileToContextBufferUseCase(repo).execute_many(
+        paths + [tmp_path / "missing.txt"]
+    )
+    assert [decision.path for decision in result.ok() or []] == paths
+    assert repo.count_items() == 3
+
+    odd_dir = tmp_path / "with:colon"
+    odd_dir.mkdir()
+    snippet_path = odd_dir / "s.py"
+    repo.add_snippet(Snippet(snippet_path, 5, 9, "code"))
+
+    RemoveElementsFromContextBufferUseCase(repo).execute(
+        [f"file:{paths[0]}", f"snippet:{snippet_path}:5:9"]
+    )
+    assert [f.path for f in repo.get_files()] == paths[1:]
+    assert repo.get_snippets() == []
+
+
+def test_capped_buffer_frees_room_on_remove_and_clear(tmp_path: Path):
+    path = tmp_path / "a.py"
+    per_file = len(str(path)) + 10
+    repo = InMemoryContextBufferRepository(max_chars=per_file * 2)
+    assert repo.add_file(File(path, "x" * 10)).is_ok()
+    # Already present: neither added nor counted again.
+    assert repo.add_file(File(path, "x" * 10)).is_ok()
+    assert repo.add_files([File(tmp_path / "b.py", "y" * 10)] * 2).ok() == 1
+    assert repo.add_file(File(tmp_path / "c.py", "z" * 10)).is_err()
+
+    repo.remove_file(path)
+    assert repo.add_file(File(tmp_path / "c.py", "z" * 10)).is_ok()
+    repo.clear()
+    assert repo.add_files(
+        [File(tmp_path / "d.py", "d" * 10), File(tmp_path / "e.py", "e" * 10)]
+    ).is_ok()
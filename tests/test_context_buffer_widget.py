@@ -0,0 +1,56 @@
+import os
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+
+from codebase_to_llm.application.uc_add_code_snippet_to_context_buffer import (  # noqa: E402
+    AddCodeSnippetToContextBufferUseCase,
+)
+from codebase_to_llm.application.uc_add_external_source import (  # noqa: E402
+    AddExternalSourceToContextBufferUseCase,
+)
+from codebase_to_llm.application.uc_add_file_to_context_buffer import (  # noqa: E402
+    AddFileToContextBufferUseCase,
+)
+from codebase_to_llm.application.uc_remove_elmts_from_context_buffer import (  # noqa: E402
+    RemoveElementsFromContextBufferUseCase,
+)
+from codebase_to_llm.infrastructure.in_memory_context_buffer_repository import (  # noqa: E402
+    InMemoryContextBufferRepository,
+)
+from codebase_to_llm.infrastructure.url_external_source_repository import (  # noqa: E402
+    UrlExternalSourceRepository,
+)
+from codebase_to_llm.interface.qt.context_buffer import (  # noqa: E402
+    ContextBufferWidget,
+)
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def test_skipped_files_are_listed_with_their_reason(app, tmp_path: Path):
+    source = tmp_path / "app.py"
+    source.write_text("x = 1\n")
+    lockfile = tmp_path / "package-lock.json"
+    lockfile.write_text("{}\n")
+    buffer = InMemoryContextBufferRepository()
+    widget = ContextBufferWidget(
+        tmp_path,
+        lambda: None,
+        AddFileToContextBufferUseCase(buffer),
+        RemoveElementsFromContextBufferUseCase(buffer),
+        AddExternalSourceToContextBufferUseCase(buffer, UrlExternalSourceRepository()),
+        AddCodeSnippetToContextBufferUseCase(buffer),
+    )
+
+    assert widget.add_files([source, lockfile]) is None
+    assert widget.add_files([lockfile]) is None
+    labels = [widget.item(row).text() for row in range(widget.count())]
+    assert labels == ["app.py", "package-lock.json (skipped: lockfile)"]
+    assert [file.path for file in buffer.get_files()] == [source]
@@ -0,0 +1,72 @@
+from codebase_to_llm.domain.context_compaction import (
+    CompactionCache,
+    CompactionOptions,
+    collapse_blank_lines,
+    compact_items,
+    compact_text,
+    strip_license_header,
+)
+
+PYTHON_SOURCE = '''#!/usr/bin/env python
+# Copyright (c) 2024 Example Corp.
+# Licensed under the MIT License.
+
+"""Module docstring."""
+
+
+def f():   
+    """Function docstring."""
+    # explain
+    return 1  # trailing
+
+
+
+'''
+
+
+def test_license_header_is_stripped_but_shebang_kept():
+    stripped = strip_license_header(PYTHON_SOURCE)
+    assert stripped.startswith('#!/usr/bin/env python\n"""Module docstring."""')
+    assert "Copyright" not in stripped
+
+    plain = "# A regular comment\nx = 1\n"
+    assert strip_license_header(plain) == plain
+    block = "/*\n * SPDX-License-Identifier: MIT\n */\nconst a = 1;\n"
+    assert strip_license_header(block) == "const a = 1;\n"
+
+
+def test_blank_runs_collapse_and_trailing_spaces_go():
+    assert collapse_blank_lines("a  \n\n\n\nb\n\n") == "a\n\nb\n"
+
+
+def test_comments_and_docstrings_are_dropped_with_the_lexer():
+    options = CompactionOptions(drop_comments=True, drop_docstrings=True)
+    compacted = compact_text(PYTHON_SOURCE, "pkg/mod.py", options)
+    assert compacted == "#!/usr/bin/env python\n\ndef f():\n    return 1\n"
+    assert compact_text("x = 1 # c\n", "notes.unknown", options) == "x = 1 # c\n"
+
+
+def test_identical_bodies_are_deduplicated_and_reported():
+    body = "".join(f"value_{i} = {i}\n" for i in range(20))
+    texts, report = compact_items(
+        [("a.py", body), ("b.py", body + "\n\n"), ("c.py", "y = 2\n")],
+        CompactionOptions(),
+        CompactionCache(),
+    )
+    assert texts == [body, "[identical to a.py]", "y = 2\n"]
+    assert report.items[1].duplicate_of == "a.py"
+    assert report.items[1].original_chars == len(body) + 2
+    assert report.saved_tokens() > 0
+
+
+def test_compaction_cache_is_bounded_by_characters():
+    cache = CompactionCache(max_chars=400)
+    options = CompactionOptions()
+    bodies = [f"value = {i}\n" * 8 for i in range(10)]
+    for body in bodies:
+        assert cache.compact(body, "m.py", options) == body
+    assert cache._cached_chars <= 400
+    assert len(cache._entries) < len(bodies)
+    # Too large to be worth a quarter of the cache: returned, not kept.
+    assert cache.compact("x = 1\n" * 100, "m.py", options) == "x = 1\n" * 100
+    assert cache._cached_chars <= 400
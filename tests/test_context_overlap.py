@@ -0,0 +1,56 @@
+from pathlib import Path
+
+from codebase_to_llm.domain.context_buffer import Snippet
+from codebase_to_llm.domain.context_overlap import remove_overlaps
+
+
+def _snippet(path: Path, start: int, end: int) -> Snippet:
+    content = "".join(f"line {i}\n" for i in range(start, end + 1))
+    return Snippet(path, start, end, content)
+
+
+def test_snippets_of_whole_files_are_dropped(tmp_path: Path):
+    whole = tmp_path / "whole.py"
+    other = tmp_path / "other.py"
+    snippets = [_snippet(whole, 1, 3), _snippet(other, 5, 6)]
+
+    kept, report = remove_overlaps([tmp_path / "." / "whole.py"], snippets)
+
+    assert kept == [snippets[1]]
+    assert report.contained_snippets == 1
+    assert report.saved_bytes > len(snippets[0].content)
+
+
+def test_overlapping_and_adjacent_ranges_merge_into_one(tmp_path: Path):
+    path = tmp_path / "m.py"
+    other = tmp_path / "o.py"
+    snippets = [
+        _snippet(path, 10, 12),
+        _snippet(other, 1, 1),
+        _snippet(path, 1, 4),
+        _snippet(path, 3, 6),
+        _snippet(path, 7, 8),
+        _snippet(path, 11, 11),
+    ]
+
+    kept, report = remove_overlaps([], snippets)
+
+    assert [(s.path.name, s.start, s.end) for s in kept] == [
+        ("m.py", 1, 8),
+        ("m.py", 10, 12),
+        ("o.py", 1, 1),
+    ]
+    assert kept[0].content == _snippet(path, 1, 8).content
+    assert report.merged_snippets == 3
+    assert report.saved_bytes > 0
+
+
+def test_snippets_out_of_sync_with_their_range_are_left_alone(tmp_path: Path):
+    path = tmp_path / "m.py"
+    stale = Snippet(path, 1, 3, "only one line\n")
+    fresh = _snippet(path, 2, 4)
+
+    kept, report = remove_overlaps([], [stale, fresh])
+
+    assert kept == [stale, fresh]
+    assert report.merged_snippets == 0
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+from codebase_to_llm.application.uc_copy_context import iter_packed_context
+from codebase_to_llm.domain.context_buffer import File
+from codebase_to_llm.domain.context_packing import (
+    PackingCandidate,
+    TokenEstimator,
+    pack_candidates,
+)
+from codebase_to_llm.domain.prompt import Prompt
+from codebase_to_llm.domain.result import Err
+from codebase_to_llm.infrastructure.filesystem_directory_repository import (
+    FileSystemDirectoryRepository,
+)
+from codebase_to_llm.infrastructure.in_memory_context_buffer_repository import (
+    InMemoryContextBufferRepository,
+)
+from codebase_to_llm.infrastructure.in_memory_prompt_repository import (
+    InMemoryPromptRepository,
+)
+
+
+class _NoRules:
+    def load_rules(self):
+        return Err("Rules file not found.")
+
+    def save_rules(self, rules):
+        return Err("read only")
+
+    def update_rule_enabled(self, name, enabled):
+        return Err("read only")
+
+
+def test_token_estimates_are_cached_by_content() -> None:
+    estimator = TokenEstimator()
+    text = "def function_name(argument):\n    return argument\n"
+    first = estimator.estimate(text)
+    second = estimator.estimate(str(text))
+    assert first == second > 0
+    assert estimator.misses() == 1
+    assert estimator.hits() == 1
+
+
+def test_token_estimator_is_shared_safely_across_threads() -> None:
+    estimator = TokenEstimator(max_entries=8)
+    texts = [f"word{i} " * (i % 7 + 1) for i in range(64)]
+
+    def estimate_all(_: int) -> list[int]:
+        return [estimator.estimate(text) for text in texts * 20]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(estimate_all, range(8)))
+
+    assert all(result == results[0] for result in results)
+    assert estimator.hits() + estimator.misses() == 8 * 64 * 20
+
+
+def test_pack_keeps_small_items_and_trims_the_overflowing_one() -> None:
+    estimator = TokenEstimator()
+    big = "".join(f"line_{i} = value_{i}\n" for i in range(2000))
+    candidates = [
+        PackingCandidate("file", "big.py", big),
+        PackingCandidate("snippet", "small.py:1:2", "x = 1\ny = 2\n"),
+    ]
+    result = pack_candidates(candidates, 1000, 50, estimator)
+    assert result.is_ok()
+    packed, report = result.ok()  # type: ignore[misc]
+    assert packed[1] == "x = 1\ny = 2\n"
+    assert isinstance(packed[0], str) and "truncated" in packed[0]
+    assert [d.label for d in report.truncated()] == ["big.py"]
+    assert report.estimated_tokens <= 1000
+
+
+def test_pack_only_loads_lazy_items_it_truncates() -> None:
+    estimator = TokenEstimator()
+    big = "".join(f"line_{i} = value_{i}\n" for i in range(2000))
+    loaded: list[str] = []
+
+    def loader(label: str, text: str) -> Callable[[], str]:
+        def load() -> str:
+            loaded.append(label)
+            return text
+
+        return load
+
+    candidates = [
+        PackingCandidate("file", "small.py", loader("small.py", "x = 1\n"), 4),
+        PackingCandidate(
+            "file", "big.py", loader("big.py", big), estimator.estimate(big)
+        ),
+    ]
+    result = pack_candidates(candidates, 1000, 50, estimator)
+    assert result.is_ok()
+    packed, report = result.ok()  # type: ignore[misc]
+    assert packed[0] is candidates[0].content
+    assert isinstance(packed[1], str) and "truncated" in packed[1]
+    assert loaded == ["big.py"]
+    assert [d.status for d in report.decisions] == ["kept", "truncated"]
+
+
+def test_pack_drops_items_when_nothing_useful_fits() -> None:
+    estimator = TokenEstimator()
+    candidates = [PackingCandidate("tree", "tree_structure", "word " * 1000)]
+    result = pack_candidates(candidates, 100, 20, estimator)
+    assert result.is_ok()
+    packed, report = result.ok()  # type: ignore[misc]
+    assert packed == [None]
+    assert [d.label for d in report.dropped()] == ["tree_structure"]
+
+
+def test_pack_rejects_budget_smaller_than_mandatory_parts() -> None:
+    result = pack_candidates([], 10, 20)
+    assert result.is_err()
+
+
+def test_iter_packed_context_reports_dropped_files(tmp_path: Path) -> None:
+    buffer = InMemoryContextBufferRepository()
+    buffer.add_file(File(tmp_path / "a.py", "a = 1\n"))
+    buffer.add_file(File(tmp_path / "b.py", "b_value = 2\n" * 5000))
+    prompt_repo = InMemoryPromptRepository()
+    prompt = Prompt.try_create("Review these files").ok()
+    assert prompt is not None
+    prompt_repo.set_prompt(prompt)
+
+    result = iter_packed_context(
+        FileSystemDirectoryRepository(tmp_path),
+        prompt_repo,
+        buffer,
+        _NoRules(),
+        token_budget=100,
+        root_directory_path=str(tmp_path),
+    )
+    assert result.is_ok()
+    fragments, report = result.ok()  # type: ignore[misc]
+    text = "".join(fragments)
+    assert "<a.py>" in text
+    assert "<b.py>" not in text
+    assert "<user_request>" in text
+    assert [d.label for d in report.dropped()] == ["b.py"]
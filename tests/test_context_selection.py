@@ -0,0 +1,124 @@
+from pathlib import Path
+from typing import Callable
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from codebase_to_llm.application.uc_select_relevant_context import (
+    SelectRelevantContextUseCase,
+)
+from codebase_to_llm.domain.content_search import (
+    ContentSearchIndex,
+    RankedFile,
+    query_terms,
+)
+from codebase_to_llm.domain.context_selection import best_window, select_context
+from codebase_to_llm.infrastructure.in_memory_context_buffer_repository import (
+    InMemoryContextBufferRepository,
+)
+from codebase_to_llm.infrastructure.in_memory_prompt_repository import (
+    InMemoryPromptRepository,
+)
+
+
+def test_query_terms_drop_stop_words_and_stem():
+    assert query_terms("Fix the header parsing when uploads fail") == [
+        "fix",
+        "header",
+        "pars",
+        "upload",
+        "fail",
+    ]
+
+
+def test_bm25_ranks_relevant_files_and_follows_updates(
+    tmp_path: Path, write_old: Callable[[Path, str], None]
+):
+    write_old(
+        tmp_path / "http" / "headers.py",
+        "def parse_header(raw):\n    return raw.split(b':')\n",
+    )
+    write_old(
+        tmp_path / "http" / "client.py",
+        "from .headers import parse_header\n\ndef send(request):\n    pass\n",
+    )
+    write_old(tmp_path / "docs" / "notes.md", "Release notes and changelog.\n")
+    index = ContentSearchIndex(tmp_path)
+    index.refresh()
+
+    ranked = index.rank("header parsing is broken").ok() or []
+    assert [hit.path for hit in ranked] == ["http/headers.py", "http/client.py"]
+    assert ranked[0].terms == ("header", "pars")
+
+    write_old(tmp_path / "docs" / "notes.md", "Header parsing changed.\n" * 3)
+    index.refresh()
+    ranked = index.rank("header parsing").ok() or []
+    assert {hit.path for hit in ranked} == {
+        "http/headers.py",
+        "http/client.py",
+        "docs/notes.md",
+    }
+    assert index.rank("the and with").is_err()
+
+
+def test_files_declaring_a_matching_name_rank_first(
+    tmp_path: Path, write_old: Callable[[Path, str], None]
+):
+    write_old(tmp_path / "a.py", "def parse_header(raw):\n    return raw\n")
+    write_old(tmp_path / "b.py", "parse_header(x)\nparse_header(y)\nparse_header(z)\n")
+    index = ContentSearchIndex(tmp_path)
+    index.refresh()
+
+    ranked = index.rank("parse header").ok() or []
+    assert [hit.path for hit in ranked] == ["a.py", "b.py"]
+
+    write_old(tmp_path / "a.py", "parse_header(raw)\n")
+    write_old(tmp_path / "b.py", "class ParseHeader:\n    parse_header = None\n")
+    index.refresh()
+    ranked = index.rank("parse header").ok() or []
+    assert [hit.path for hit in ranked] == ["b.py", "a.py"]
+
+
+def test_best_window_centres_on_matching_lines():
+    lines = ["x"] * 10 + ["parse", "header parse"] + ["y"] * 10
+    assert best_window(lines, ["parse", "header"], 4) == (10, 13)
+    assert best_window(lines[:3], ["parse"], 60) == (1, 3)
+
+
+def test_use_case_fills_the_budget_with_files_then_snippets(
+    tmp_path: Path, write_old: Callable[[Path, str], None]
+):
+    write_old(tmp_path / "small.py", "def checkout_total():\n    return 0\n")
+    big = [f"value_{index} = {index}" for index in range(400)]
+    big[200] = "def checkout_discount(): pass"
+    write_old(tmp_path / "big.py", "\n".join(big) + "\n")
+    index = ContentSearchIndex(tmp_path)
+    index.refresh()
+    buffer = InMemoryContextBufferRepository()
+
+    result = SelectRelevantContextUseCase(buffer, InMemoryPromptRepository()).execute(
+        index, token_budget=400, query="checkout"
+    )
+
+    selected = result.ok() or []
+    assert [item.path.name for item in selected] == ["small.py", "big.py"]
+    assert not selected[0].is_snippet and selected[1].is_snippet
+    assert sum(item.tokens for item in selected) <= 400
+    assert [file.path.name for file in buffer.get_files()] == ["small.py"]
+    snippet = buffer.get_snippets()[0]
+    assert snippet.start <= 201 <= snippet.end
+    assert "checkout_discount" in snippet.content
+
+
+def test_snippet_windows_count_only_newlines_as_line_breaks(
+    tmp_path: Path, write_old: Callable[[Path, str], None]
+):
+    big = [f"value_{index} = {index}\x0c\r" for index in range(400)]
+    big[300] = "def checkout_discount(): pass"
+    write_old(tmp_path / "big.py", "\n".join(big) + "\n")
+    ranked = [RankedFile("big.py", 1.0, ("checkout",))]
+
+    (selected,) = select_context(tmp_path, ranked, token_budget=300)
+
+    assert selected.start is not None and selected.end is not None
+    assert selected.start <= 301 <= selected.end
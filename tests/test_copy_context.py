@@ -1,10 +1,11 @@
 from pathlib import Path
+import os
 
 import sys
 
 sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
 
-from codebase_to_llm.domain.context_buffer import Snippet, ExternalSource
+from codebase_to_llm.domain.context_buffer import ExternalSource, File, Snippet
 from codebase_to_llm.application.ports import (
     ContextBufferPort,
     RulesRepositoryPort,
@@ -15,9 +16,18 @@ from codebase_to_llm.domain.prompt import (
     PromptVariable,
     set_prompt_variable as domain_set_prompt_variable,
 )
+from codebase_to_llm.domain.context_compaction import CompactionOptions
 from codebase_to_llm.domain.result import Ok, Result
 
-from codebase_to_llm.application.uc_copy_context import CopyContextUseCase
+from codebase_to_llm.application.uc_copy_context import (
+    CopyContextUseCase,
+    full_context_sections,
+    get_full_context,
+    iter_compacted_context,
+    iter_full_context,
+    iter_packed_context,
+    packed_context_sections,
+)
 from codebase_to_llm.infrastructure.filesystem_directory_repository import (
     FileSystemDirectoryRepository,
 )
@@ -58,6 +68,12 @@ class FakeContextBuffer(ContextBufferPort):
         self._files.append(file)
         return Ok(None)
 
+    def add_files(self, files) -> Result[int, str]:
+        present = {f.path for f in self._files}
+        added = [f for f in files if f.path not in present]
+        self._files.extend(added)
+        return Ok(len(added))
+
     def remove_file(self, path) -> Result[None, str]:
         self._files = [f for f in self._files if f.path != path]
         return Ok(None)
@@ -170,3 +186,230 @@ def test_selected_text(tmp_path: Path):
     expected_tag = f"<{file_path}:1:2>"
     assert expected_tag in clipboard.text
     assert "line1" in clipboard.text
+
+
+def test_iter_full_context_matches_joined_context(tmp_path: Path):
+    file_path = tmp_path / "file.txt"
+    file_path.write_text("line1\nline2\n")
+    repo = FileSystemDirectoryRepository(tmp_path)
+    context_buffer = FakeContextBuffer()
+    snippet = Snippet.try_create_from_path(file_path, 1, 1, "line1\n").ok()
+    assert snippet is not None
+    context_buffer.add_snippet(snippet)
+    prompt_repo = FakePromptRepo()
+    prompt = Prompt.try_create("Explain this").ok()
+    assert prompt is not None
+    prompt_repo.set_prompt(prompt)
+
+    fragments_result = iter_full_context(
+        repo, prompt_repo, context_buffer, FakeRulesRepo(), include_tree=True
+    )
+    assert fragments_result.is_ok()
+    fragments = list(fragments_result.ok() or [])
+    assert fragments[0].startswith("<tree_structure>")
+    assert fragments[-1].endswith("</user_request>")
+
+    joined = get_full_context(
+        repo, prompt_repo, context_buffer, FakeRulesRepo(), include_tree=True
+    )
+    assert "".join(fragments) == joined.ok()
+
+
+def test_iter_full_context_reports_unset_prompt_variables(tmp_path: Path):
+    repo = FileSystemDirectoryRepository(tmp_path)
+    prompt_repo = FakePromptRepo()
+    prompt = Prompt.try_create("Explain {{code}}").ok()
+    assert prompt is not None
+    prompt_repo.set_prompt(prompt)
+
+    fragments_result = iter_full_context(
+        repo, prompt_repo, FakeContextBuffer(), FakeRulesRepo()
+    )
+    assert fragments_result.is_err()
+
+
+def test_referenced_files_are_read_when_rendered(tmp_path: Path):
+    file_path = tmp_path / "module.py"
+    file_path.write_text("old = 1\n")
+    file_result = File.try_from_path(file_path)
+    assert file_result.is_ok()
+    file_ = file_result.ok()
+    assert file_ is not None and file_.is_reference()
+    context_buffer = FakeContextBuffer()
+    context_buffer.add_file(file_)
+
+    file_path.write_text("new = 2\n")
+    result = get_full_context(
+        FileSystemDirectoryRepository(tmp_path),
+        FakePromptRepo(),
+        context_buffer,
+        FakeRulesRepo(),
+    )
+    assert "new = 2" in (result.ok() or "")
+    assert "old = 1" not in (result.ok() or "")
+
+
+def test_unreadable_files_are_packed_as_their_placeholder(tmp_path: Path):
+    file_path = tmp_path / "gone.py"
+    file_path.write_text("x = 1\n")
+    file_ = File.try_from_path(file_path).ok()
+    assert file_ is not None
+    context_buffer = FakeContextBuffer()
+    context_buffer.add_file(file_)
+    file_path.unlink()
+
+    packed = iter_packed_context(
+        FileSystemDirectoryRepository(tmp_path),
+        FakePromptRepo(),
+        context_buffer,
+        FakeRulesRepo(),
+        100_000,
+        root_directory_path=str(tmp_path),
+    ).ok()
+    assert packed is not None
+    fragments, report = packed
+    text = "".join(fragments)
+    assert file_.content.startswith("[could not read file:")
+    assert file_.content in text
+    (decision,) = report.decisions
+    assert decision.status == "kept" and decision.original_tokens > 0
+
+
+def test_compacted_context_reports_per_file_savings(tmp_path: Path):
+    source = tmp_path / "mod.py"
+    source.write_text("# Copyright 2024 Example\n\nx = 1\n\n\n\ny = 2\n")
+    repo = FileSystemDirectoryRepository(tmp_path)
+    context_buffer = FakeContextBuffer()
+    file_ = File.try_from_path(source).ok()
+    assert file_ is not None
+    context_buffer.add_file(file_)
+
+    result = iter_compacted_context(
+        repo,
+        FakePromptRepo(),
+        context_buffer,
+        FakeRulesRepo(),
+        CompactionOptions(),
+        root_directory_path=str(tmp_path),
+    )
+    fragments, report = result.ok() or (iter([]), None)
+    assert report is not None
+    text = "".join(fragments)
+    assert "Copyright" not in text
+    assert "x = 1\n\ny = 2\n" in text
+    assert report.items[0].label == "mod.py"
+    assert report.items[0].compacted_chars < report.items[0].original_chars
+
+
+def test_compacted_files_are_compacted_as_they_are_rendered(tmp_path: Path):
+    body = "".join(f"value_{i} = {i}\n" for i in range(20))
+    context_buffer = FakeContextBuffer()
+    for name in ("a.py", "b.py"):
+        (tmp_path / name).write_text(body)
+        file_ = File.try_from_path(tmp_path / name).ok()
+        assert file_ is not None
+        context_buffer.add_file(file_)
+
+    result = iter_compacted_context(
+        FileSystemDirectoryRepository(tmp_path),
+        FakePromptRepo(),
+        context_buffer,
+        FakeRulesRepo(),
+        CompactionOptions(),
+        root_directory_path=str(tmp_path),
+    )
+    fragments, report = result.ok() or (iter([]), None)
+    assert report is not None
+    assert report.items[1].duplicate_of == "a.py"
+    (tmp_path / "a.py").write_text("# Copyright 2025 Example\n\nz = 3\n")
+    text = "".join(fragments)
+    assert "Copyright" not in text
+    assert "z = 3\n" in text
+    assert "<b.py>\n[identical to a.py]\n</b.py>".replace("\n", os.linesep) in text
+
+
+def test_snippets_inside_a_whole_file_are_not_repeated(tmp_path: Path):
+    source = tmp_path / "mod.py"
+    source.write_text("a = 1\nb = 2\n")
+    repo = FileSystemDirectoryRepository(tmp_path)
+    context_buffer = FakeContextBuffer()
+    file_ = File.try_from_path(source).ok()
+    snippet = Snippet.try_create_from_path(source, 1, 1, "").ok()
+    assert file_ is not None and snippet is not None
+    context_buffer.add_file(file_)
+    context_buffer.add_snippet(snippet)
+
+    text = get_full_context(repo, FakePromptRepo(), context_buffer, FakeRulesRepo())
+
+    assert text.ok() == os.linesep.join(
+        [f"<{source}>", "a = 1\nb = 2\n", f"</{source}>"]
+    )
+
+
+def test_cache_stable_layout_puts_unchanged_content_first(tmp_path: Path):
+    repo = FileSystemDirectoryRepository(tmp_path)
+    context_buffer = FakeContextBuffer()
+    for name in ("b.txt", "a.txt", "c.txt"):
+        (tmp_path / name).write_text(name)
+        file_ = File.try_from_path(tmp_path / name).ok()
+        assert file_ is not None
+        context_buffer.add_file(file_)
+    context_buffer.add_snippet(Snippet(tmp_path / "d.py", 1, 1, "d = 1\n"))
+    context_buffer.add_external_source(ExternalSource("https://x.test", "page", False))
+    (tmp_path / "b.txt").write_text("b.txt, edited")
+    prompt_repo = FakePromptRepo()
+    prompt = Prompt.try_create("request").ok()
+    assert prompt is not None
+    prompt_repo.set_prompt(prompt)
+
+    text = get_full_context(
+        repo,
+        prompt_repo,
+        context_buffer,
+        FakeRulesRepo(),
+        root_directory_path=str(tmp_path),
+        layout="cache_stable",
+    ).ok()
+
+    assert text is not None
+    order = [
+        "<a.txt>",
+        "<c.txt>",
+        "<https://x.test>",
+        "<d.py:1:1>",
+        "<b.txt>",
+        "<user_request>",
+    ]
+    positions = [text.index(tag) for tag in order]
+    assert positions == sorted(positions)
+
+    sections = packed_context_sections(
+        repo,
+        prompt_repo,
+        context_buffer,
+        FakeRulesRepo(),
+        100_000,
+        root_directory_path=str(tmp_path),
+    ).ok()
+    assert sections is not None
+    prefix, tail, _ = sections
+    assert prefix.rstrip().endswith("</https://x.test>")
+    assert tail.startswith("<d.py:1:1>")
+    packed = iter_packed_context(
+        repo,
+        prompt_repo,
+        context_buffer,
+        FakeRulesRepo(),
+        100_000,
+        root_directory_path=str(tmp_path),
+        layout="cache_stable",
+    ).ok()
+    assert packed is not None
+    assert prefix + tail == "".join(packed[0])
+    assert full_context_sections(
+        repo,
+        prompt_repo,
+        context_buffer,
+        FakeRulesRepo(),
+        root_directory_path=str(tmp_path),
+    ).ok() == (prefix, tail)
@@ -1,9 +1,16 @@
 from pathlib import Path
+import json
+import os
 import sys
 
 sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
 
-from codebase_to_llm.domain.directory_tree import build_tree
+from codebase_to_llm.domain.directory_tree import (
+    TreeBudget,
+    build_tree,
+    build_tree_formats,
+)
+from codebase_to_llm.domain.tree_cache import DirectoryTreeCache, TreeRefreshStats
 from codebase_to_llm.domain.result import Ok
 
 
@@ -16,3 +23,127 @@ def test_tree_build(tmp_path: Path):
     assert isinstance(result, Ok)
     expected_first_line = tmp_path.name
     assert result.ok().splitlines()[0] == expected_first_line  # type: ignore[arg-type,union-attr]
+
+
+def test_tree_layout_and_order(tmp_path: Path):
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "inner.txt").write_text("x")
+    (tmp_path / "a.txt").write_text("x")
+    (tmp_path / "c.txt").write_text("x")
+
+    result = build_tree(tmp_path)
+
+    assert result.ok() == os.linesep.join(
+        [
+            tmp_path.name,
+            "├── a.txt",
+            "├── b",
+            "│   └── inner.txt",
+            "└── c.txt",
+        ]
+    )
+
+
+def test_deep_trees_do_not_hit_the_recursion_limit(tmp_path: Path):
+    depth = 300
+    current = tmp_path
+    for _ in range(depth):
+        current = current / "d"
+        current.mkdir()
+
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(150)
+    try:
+        result = build_tree(tmp_path)
+    finally:
+        sys.setrecursionlimit(limit)
+
+    assert len((result.ok() or "").splitlines()) == depth + 1
+
+
+def test_tree_cache_rescans_only_changed_directories(tmp_path: Path):
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "file.txt").write_text("x")
+    cache = DirectoryTreeCache(tmp_path, racy_window_ns=0)
+
+    assert cache.render().ok() == build_tree(tmp_path).ok()
+    assert cache.stats().rescanned == 4
+
+    assert cache.render().ok() == build_tree(tmp_path).ok()
+    assert cache.stats() == TreeRefreshStats(4, 0, 0)
+
+    (tmp_path / "b" / "new.txt").write_text("x")
+    cache.invalidate(tmp_path / "b" / "new.txt")
+    assert cache.render().ok() == build_tree(tmp_path).ok()
+    # "b" is listed again; only "b" and the root are re-rendered.
+    assert cache.stats() == TreeRefreshStats(4, 1, 2)
+
+    (tmp_path / ".gitignore").write_text("a/\n")
+    cache.invalidate(tmp_path / ".gitignore")
+    text = cache.render().ok() or ""
+    assert text == build_tree(tmp_path).ok()
+    assert "── a" not in text
+
+
+def test_budgeted_tree_summarises_what_it_leaves_out(tmp_path: Path):
+    big = tmp_path / "big"
+    big.mkdir()
+    for index in range(5):
+        (big / f"f{index}.txt").write_text("x")
+    (big / "sub").mkdir()
+    (big / "sub" / "deep.txt").write_text("x")
+    (tmp_path / "z.txt").write_text("x")
+
+    by_depth = build_tree(tmp_path, TreeBudget(max_depth=1)).ok()
+    assert by_depth == os.linesep.join(
+        [tmp_path.name, "├── big … 5 files (1 dir)", "└── z.txt"]
+    )
+
+    by_entries = build_tree(tmp_path, TreeBudget(max_entries_per_directory=2)).ok()
+    assert by_entries is not None
+    assert "│   ├── f1.txt" + os.linesep + "│   └── … 3 files (1 dir)" in by_entries
+
+    by_lines = build_tree(tmp_path, TreeBudget(max_lines=4)).ok() or ""
+    assert by_lines.splitlines() == [
+        tmp_path.name,
+        "├── big",
+        "│   ├── f0.txt",
+        "│   ├── f1.txt",
+        "│   └── … 3 files (1 dir)",
+        "└── … 1 file",
+    ]
+
+
+def test_compact_tree_formats(tmp_path: Path):
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "inner.txt").write_text("x")
+    (tmp_path / "b" / "more.txt").write_text("x")
+    (tmp_path / "b" / "zz.txt").write_text("x")
+    (tmp_path / "a.txt").write_text("x")
+
+    indented = build_tree(tmp_path, tree_format="indented").ok()
+    assert indented == os.linesep.join(
+        [f"{tmp_path.name}/", "a.txt", "b/", "  inner.txt", "  more.txt", "  zz.txt"]
+    )
+
+    grouped = build_tree(tmp_path, tree_format="grouped").ok()
+    assert grouped == os.linesep.join(
+        [f"{tmp_path.name}/: a.txt b/", "b/: inner.txt more.txt zz.txt"]
+    )
+
+    as_json = build_tree(tmp_path, TreeBudget(max_entries_per_directory=2), "json")
+    assert json.loads(as_json.ok() or "") == {
+        "name": tmp_path.name,
+        "children": [
+            "a.txt",
+            {
+                "name": "b",
+                "children": ["inner.txt", "more.txt", {"summary": "… 1 file"}],
+            },
+        ],
+    }
+
+    formats = build_tree_formats(tmp_path).ok() or {}
+    assert formats["ascii"] == build_tree(tmp_path).ok()
+    assert len(formats["grouped"]) < len(formats["ascii"])
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from codebase_to_llm.domain.file_cache import MMAP_THRESHOLD, FileContentCache
+
+
+def test_second_read_is_served_from_cache(tmp_path: Path) -> None:
+    file_path = tmp_path / "module.py"
+    file_path.write_text("print('hello')\n")
+    cache = FileContentCache()
+
+    assert cache.read_text(file_path).ok() == "print('hello')\n"
+    assert cache.read_text(file_path).ok() == "print('hello')\n"
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+
+
+def test_modified_file_is_read_again(tmp_path: Path) -> None:
+    file_path = tmp_path / "module.py"
+    file_path.write_text("a = 1\n")
+    cache = FileContentCache()
+    cache.read_text(file_path)
+
+    file_path.write_text("a = 22\n")
+    stat = file_path.stat()
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert cache.read_text(file_path).ok() == "a = 22\n"
+    assert cache.stats().misses == 2
+
+
+def test_cache_is_bounded_by_size(tmp_path: Path) -> None:
+    cache = FileContentCache(max_chars=10, max_entry_chars=10)
+    for name in ("a", "b", "c"):
+        (tmp_path / name).write_text("x" * 4)
+        cache.read_text(tmp_path / name)
+
+    stats = cache.stats()
+    assert stats.entries == 2
+    assert stats.cached_chars == 8
+
+
+def test_decoding_is_uniform(tmp_path: Path) -> None:
+    file_path = tmp_path / "mixed.txt"
+    file_path.write_bytes(b"caf\xe9\r\nnext\rlast")
+    cache = FileContentCache()
+
+    assert cache.read_text(file_path).ok() == "caf�\nnext\nlast"
+
+
+def test_missing_file_is_an_error(tmp_path: Path) -> None:
+    assert FileContentCache().read_text(tmp_path / "missing").is_err()
+
+
+def test_large_files_are_decoded_through_mmap(tmp_path: Path) -> None:
+    file_path = tmp_path / "large.txt"
+    line = "héllo wörld\r\n"
+    file_path.write_bytes((line * (MMAP_THRESHOLD // len(line) + 10)).encode("utf-8"))
+
+    text = FileContentCache().read_text(file_path).ok()
+    assert text is not None
+    assert text.startswith("héllo wörld\nhéllo")
+    assert "\r" not in text
@@ -0,0 +1,77 @@
+import os
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+
+from PySide6.QtCore import QThreadPool, Qt  # noqa: E402
+from PySide6.QtTest import QTest  # noqa: E402
+
+from pygments.token import Token  # type: ignore  # noqa: E402
+from shiboken6 import Shiboken  # noqa: E402
+
+from codebase_to_llm.interface.qt import file_preview  # noqa: E402
+from codebase_to_llm.interface.qt.file_preview import (  # noqa: E402
+    FilePreviewWidget,
+    block_spans,
+    lexer_for,
+)
+
+
+@pytest.fixture(scope="module")
+def app():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    yield app
+    # Lexing jobs must not outlive the application.
+    QThreadPool.globalInstance().waitForDone()
+
+
+def test_paged_file_is_never_saved_over(app, tmp_path: Path):
+    small = tmp_path / "small.py"
+    small.write_text("x = 1\n")
+    big = tmp_path / "big.log"
+    content = "".join(f"line {i}\n" for i in range(1, 5_001))
+    big.write_text(content)
+    preview = FilePreviewWidget(lambda *_: None)
+
+    preview.load_file(small)
+    assert not preview._is_modified
+    QTest.keyClicks(preview, "y")
+    assert preview._is_modified
+
+    preview.load_file(big, max_bytes=1_000)
+    assert preview.isReadOnly() and not preview._is_modified
+    QTest.keyClick(preview, Qt.Key.Key_S, Qt.KeyboardModifier.ControlModifier)
+    assert not preview.save_file()
+    assert big.read_text() == content
+
+
+def test_block_spans_split_multiline_tokens_at_line_breaks():
+    lexer = lexer_for("module.py")
+    assert lexer is not None
+    text = 's = """a\nb"""\nx = 1\n'
+
+    spans = block_spans(text, lexer)
+    assert len(spans) == 4
+    # Whitespace gets no span; the string carries over to the next line.
+    assert [(start, length) for start, length, _ in spans[0]] == [
+        (0, 1),
+        (2, 1),
+        (4, 3),
+        (7, 1),
+    ]
+    assert [(start, length) for start, length, _ in spans[1]] == [(0, 1), (1, 3)]
+    assert all(token in Token.String for _, _, token in spans[1])
+    assert spans[3] == ()
+    assert block_spans(text, lexer) is spans
+
+
+def test_lex_job_survives_its_signals_being_deleted(app):
+    job = file_preview._LexJob("x = 1\n", "module.py", 1)
+    file_preview._running_jobs.add(job)
+    Shiboken.delete(job.signals)
+
+    job.run()
+    assert job not in file_preview._running_jobs
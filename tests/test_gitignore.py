@@ -0,0 +1,62 @@
+from pathlib import Path
+
+from codebase_to_llm.domain.directory_tree import build_tree, ignore_matcher
+from codebase_to_llm.domain.gitignore import GitIgnoreMatcher, compile_rule
+
+
+def _matches(pattern: str, path: str, is_dir: bool = False) -> bool:
+    rule = compile_rule(pattern)
+    assert rule is not None
+    return rule.matches(path, is_dir)
+
+
+def test_patterns_follow_gitignore_semantics():
+    assert _matches("*.log", "debug.log")
+    assert _matches("*.log", "logs/debug.log")
+    assert not _matches("*.log", "debug.log.txt")
+    assert _matches("build/", "src/build", is_dir=True)
+    assert not _matches("build/", "src/build")
+    assert _matches("/dist", "dist")
+    assert not _matches("/dist", "pkg/dist")
+    assert _matches("doc/*.txt", "doc/notes.txt")
+    assert not _matches("doc/*.txt", "doc/api/notes.txt")
+    assert _matches("doc/**/*.txt", "doc/api/notes.txt")
+    assert _matches("**/cache", "a/b/cache")
+    assert _matches("data/**", "data/x/y")
+    assert _matches("file?.[ch]", "file1.c")
+    assert compile_rule("# comment") is None
+    assert compile_rule("   ") is None
+
+
+def test_nested_gitignore_and_negation(tmp_path: Path):
+    (tmp_path / ".gitignore").write_text("*.log\nbuild/\n")
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    (sub / ".gitignore").write_text("!keep.log\n/local.txt\n")
+    matcher = GitIgnoreMatcher(tmp_path)
+
+    assert matcher.is_ignored(tmp_path / "a.log", is_dir=False)
+    assert not matcher.is_ignored(sub / "keep.log", is_dir=False)
+    assert matcher.is_ignored(sub / "other.log", is_dir=False)
+    assert matcher.is_ignored(sub / "local.txt", is_dir=False)
+    assert not matcher.is_ignored(tmp_path / "local.txt", is_dir=False)
+    assert matcher.is_ignored_path(tmp_path / "build" / "out" / "main.c")
+
+
+def test_ignored_directories_are_pruned(tmp_path: Path):
+    (tmp_path / ".gitignore").write_text("node_modules/\n*.tmp\n")
+    modules = tmp_path / "node_modules" / "pkg"
+    modules.mkdir(parents=True)
+    (modules / "index.js").write_text("x")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "main.py").write_text("x")
+    (tmp_path / "src" / "scratch.tmp").write_text("x")
+    (tmp_path / "src" / "main.pyc").write_bytes(b"\0")
+
+    files = list(ignore_matcher(tmp_path).iter_files(tmp_path))
+    tree = build_tree(tmp_path).ok() or ""
+
+    assert sorted(p.name for p in files) == [".gitignore", "main.py"]
+    assert "node_modules" not in tree
+    assert "scratch.tmp" not in tree
+    assert "main.py" in tree
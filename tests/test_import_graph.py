@@ -0,0 +1,82 @@
+from pathlib import Path
+from typing import Callable
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from codebase_to_llm.application.uc_add_file_with_dependencies import (
+    AddFileWithDependenciesUseCase,
+)
+from codebase_to_llm.domain.import_graph import ImportGraph
+from codebase_to_llm.infrastructure.in_memory_context_buffer_repository import (
+    InMemoryContextBufferRepository,
+)
+
+
+def test_python_imports_resolve_transitively_within_depth(
+    tmp_path: Path, write_old: Callable[[Path, str], None]
+):
+    write_old(tmp_path / "src" / "app" / "__init__.py", "")
+    write_old(
+        tmp_path / "src" / "app" / "main.py", "from .core import run\nimport os\n"
+    )
+    write_old(tmp_path / "src" / "app" / "core" / "__init__.py", "from . import db\n")
+    write_old(
+        tmp_path / "src" / "app" / "core" / "db.py",
+        "from app.util import helper\n",
+    )
+    write_old(tmp_path / "src" / "app" / "util.py", "def helper(): pass\n")
+    # A namespace package: no __init__.py, resolved by its path.
+    write_old(tmp_path / "src" / "ns" / "a.py", "from ns.b import x\n")
+    write_old(tmp_path / "src" / "ns" / "b.py", "x = 1\n")
+
+    graph = ImportGraph(tmp_path)
+    graph.refresh()
+    app = tmp_path / "src" / "app"
+
+    deep = graph.dependencies(app / "main.py", max_depth=None).ok()
+    assert deep == [
+        app / "core" / "__init__.py",
+        app / "core" / "db.py",
+        app / "util.py",
+    ]
+    assert graph.dependencies(app / "main.py", max_depth=1).ok() == [
+        app / "core" / "__init__.py"
+    ]
+    # The budget covers main.py and core/__init__.py but not db.py.
+    assert graph.dependencies(app / "main.py", None, token_budget=15).ok() == [
+        app / "core" / "__init__.py"
+    ]
+    assert graph.dependencies(tmp_path.parent / "elsewhere.py").is_err()
+    assert graph.dependencies(tmp_path / "src" / "ns" / "a.py").ok() == [
+        tmp_path / "src" / "ns" / "b.py"
+    ]
+
+    write_old(app / "main.py", "from app import util\n")
+    graph.refresh()
+    assert graph.dependencies(app / "main.py").ok() == [app / "util.py"]
+
+
+def test_script_imports_and_use_case(
+    tmp_path: Path, write_old: Callable[[Path, str], None]
+):
+    write_old(
+        tmp_path / "web" / "index.ts",
+        'import { a } from "./a";\nconst b = require("./lib");\nimport "react";\n',
+    )
+    write_old(tmp_path / "web" / "a.tsx", "export const a = 1;\n")
+    write_old(tmp_path / "web" / "lib" / "index.js", "module.exports = {};\n")
+
+    graph = ImportGraph(tmp_path)
+    buffer = InMemoryContextBufferRepository()
+    result = AddFileWithDependenciesUseCase(buffer).execute(
+        graph, tmp_path / "web" / "index.ts"
+    )
+
+    decisions = result.ok() or []
+    assert [decision.path.name for decision in decisions] == [
+        "index.ts",
+        "a.tsx",
+        "index.js",
+    ]
+    assert len(buffer.get_files()) == 3
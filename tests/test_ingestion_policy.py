@@ -0,0 +1,58 @@
+from pathlib import Path
+
+from codebase_to_llm.application.uc_add_file_to_context_buffer import (
+    AddFileToContextBufferUseCase,
+)
+from codebase_to_llm.domain.ingestion_policy import IngestionPolicy, human_size
+from codebase_to_llm.infrastructure.in_memory_context_buffer_repository import (
+    InMemoryContextBufferRepository,
+)
+
+
+def test_triage_sniffs_binary_lockfiles_minified_and_size(tmp_path: Path):
+    policy = IngestionPolicy(max_file_bytes=1024)
+    image = tmp_path / "logo.png"
+    image.write_bytes(b"\x89PNG\r\n\x1a\n\0\0" + b"x" * 3000)
+    lock = tmp_path / "poetry.lock"
+    lock.write_text("[[package]]\n")
+    bundle = tmp_path / "app.js"
+    bundle.write_text("var a=1;" * 2000)
+    big = tmp_path / "big.py"
+    big.write_text("x = 1\n" * 1000)
+    small = tmp_path / "small.py"
+    small.write_text("print('hi')\n")
+
+    def triage(path: Path) -> tuple[str, str]:
+        decision = policy.triage(path).ok()
+        assert decision is not None
+        return decision.action, decision.reason
+
+    assert triage(image) == ("stub", "binary, 2.9 KB")
+    assert triage(lock) == ("skip", "lockfile")
+    assert triage(bundle) == ("skip", "minified")
+    assert triage(big) == ("truncate", "first 1.0 KB of 5.9 KB")
+    assert triage(small) == ("include", "")
+    assert policy.triage(tmp_path).is_err()
+
+
+def test_ingested_files_are_stubbed_or_truncated(tmp_path: Path):
+    repo = InMemoryContextBufferRepository()
+    use_case = AddFileToContextBufferUseCase(repo, IngestionPolicy(max_file_bytes=64))
+    blob = tmp_path / "data.bin"
+    blob.write_bytes(b"\0" * 10)
+    long_file = tmp_path / "long.txt"
+    long_file.write_text("".join(f"line {i}\n" for i in range(100)))
+    lock = tmp_path / "yarn.lock"
+    lock.write_text("x\n")
+
+    decisions = use_case.execute_many([blob, long_file, lock]).ok()
+    assert decisions is not None
+    assert [d.action for d in decisions] == ["stub", "truncate", "skip"]
+
+    contents = {f.path.name: f.content for f in repo.get_files()}
+    assert contents["data.bin"] == "[binary, 10 B]"
+    assert contents["long.txt"].startswith("line 0\n")
+    assert contents["long.txt"].endswith("[... first 64 B of 790 B ...]")
+    assert len(contents["long.txt"].splitlines()) < 20
+    assert "yarn.lock" not in contents
+    assert human_size(3_565_158) == "3.4 MB"
@@ -0,0 +1,52 @@
+from pathlib import Path
+
+from codebase_to_llm.domain.file_cache import MMAP_THRESHOLD
+from codebase_to_llm.domain import line_index
+from codebase_to_llm.domain.line_index import LineIndexCache, PagedTextFile
+
+
+def test_read_lines_matches_readlines_slicing(tmp_path: Path):
+    path = tmp_path / "m.py"
+    path.write_bytes(b"one\r\ntwo\nthree\nfour")
+    cache = LineIndexCache()
+
+    assert cache.read_lines(path, 2, 3).ok() == "two\nthree\n"
+    assert cache.read_lines(path, 1, 1).ok() == "one\n"
+    assert cache.read_lines(path, 4, 10).ok() == "four"
+    assert cache.read_lines(path, 5, 6).ok() == ""
+    assert cache.read_lines(tmp_path / "missing.py", 1, 2).is_err()
+
+
+def test_index_follows_file_changes(tmp_path: Path):
+    path = tmp_path / "gen.txt"
+    path.write_text("".join(f"line {i}\n" for i in range(100_000)))
+    assert path.stat().st_size > MMAP_THRESHOLD
+    cache = LineIndexCache()
+
+    assert cache.read_lines(path, 50_000, 50_001).ok() == "line 49999\nline 50000\n"
+
+    path.write_text("first\nsecond\n")
+    assert cache.read_lines(path, 2, 2).ok() == "second\n"
+
+
+def test_paged_file_reads_absolute_line_pages(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(line_index, "PAGE_INDEX_CHUNK", 4096)
+    path = tmp_path / "big.log"
+    path.write_bytes(b"".join(b"line %d\n" % i for i in range(1, 50_001)))
+    paged = PagedTextFile.try_open(path).ok()
+    assert paged is not None
+
+    assert paged.read_page(1, 2, 1_000) == ("line 1\nline 2\n", 2)
+    assert not paged.is_indexed()
+    assert 2 < paged.line_count() != 50_000  # estimated until indexed
+
+    assert paged.read_page(30_000, 2, 1_000) == ("line 30000\nline 30001\n", 2)
+    # A page stops before the line that would take it over the byte limit.
+    assert paged.read_page(30_000, 10, 15) == ("line 30000\n", 1)
+    assert paged.read_page(49_999, 10, 1_000) == ("line 49999\nline 50000\n", 2)
+    assert paged.has_line(50_000) and not paged.has_line(50_001)
+    assert paged.is_indexed() and paged.line_count() == 50_000
+
+    paged.close()
+    assert paged.read_page(1, 2, 1_000) == ("", 0)
+    assert PagedTextFile.try_open(tmp_path / "missing.log").is_err()
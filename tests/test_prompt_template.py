@@ -0,0 +1,38 @@
+from codebase_to_llm.domain.prompt import Prompt, set_prompt_variable
+from codebase_to_llm.domain.prompt_template import compile_template
+
+
+def test_template_is_parsed_once_per_content():
+    content = "Review {{code}} against {{rules}}, then {{code}} again."
+    template = compile_template(content)
+
+    assert compile_template(content) is template
+    assert template.keys == ("code", "rules")
+    assert template.slots == ("code", "rules", "code")
+
+
+def test_full_text_substitutes_every_occurrence_in_one_pass():
+    prompt = Prompt.try_create("{{a}} and {{b}} and {{a}}").ok()
+    assert prompt is not None
+    prompt = set_prompt_variable(prompt, "a", "{{b}}")
+    prompt = set_prompt_variable(prompt, "b", "B")
+
+    # Values are inserted verbatim, never expanded again.
+    assert prompt.full_text().ok() == "{{b}} and B and {{b}}"
+
+
+def test_variables_are_shared_not_copied():
+    big = "x" * 1_000_000
+    prompt = Prompt.try_create("{{file}}").ok()
+    assert prompt is not None
+    prompt = set_prompt_variable(prompt, "file", big)
+
+    assert prompt.get_variables()[0].content is big
+    assert prompt.full_text().ok() == big
+
+
+def test_unset_variables_are_still_reported():
+    prompt = Prompt.try_create("Hello {{name}}").ok()
+    assert prompt is not None
+
+    assert prompt.full_text().is_err()
@@ -0,0 +1,220 @@
+from pathlib import Path
+
+from codebase_to_llm.domain.context_buffer import ExternalSource, File, Snippet
+from codebase_to_llm.domain.prompt import Prompt
+from codebase_to_llm.infrastructure.in_memory_session_store import (
+    InMemorySessionStore,
+)
+from codebase_to_llm.infrastructure.redis_context_buffer_repository import (
+    RedisContextBufferRepository,
+)
+from codebase_to_llm.infrastructure.redis_prompt_repository import (
+    RedisPromptRepository,
+)
+
+
+class FakePipeline:
+    """Runs commands at once until ``multi``, then queues them for ``execute``."""
+
+    def __init__(self, client: "FakeRedis", buffered: bool) -> None:
+        self._client = client
+        self._queued: list[tuple[str, tuple, dict]] | None = [] if buffered else None
+
+    def multi(self) -> None:
+        self._queued = []
+
+    def execute(self) -> list[object]:
+        queued, self._queued = self._queued or [], None
+        return [getattr(self._client, name)(*a, **kw) for name, a, kw in queued]
+
+    def __getattr__(self, name: str):
+        command = getattr(self._client, name)
+        if self._queued is None:
+            return command
+
+        def queue(*args, **kwargs):
+            assert self._queued is not None
+            self._queued.append((name, args, kwargs))
+
+        return queue
+
+
+class FakeRedis:
+    """The handful of Redis commands the session repositories use."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, object] = {}
+        self.ttls: dict[str, int] = {}
+        self.hgetall_calls = 0
+
+    def transaction(self, func, *watches) -> list[object]:
+        pipe = FakePipeline(self, buffered=False)
+        func(pipe)
+        return pipe.execute()
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self, buffered=True)
+
+    def hset(self, key: str, mapping: dict[str, object]) -> int:
+        values = self._hash(key)
+        for field, value in mapping.items():
+            values[field.encode()] = (
+                value if isinstance(value, bytes) else str(value).encode()
+            )
+        return len(mapping)
+
+    def _hash(self, key: str) -> dict[bytes, bytes]:
+        return self.data.setdefault(key, {})  # type: ignore[return-value]
+
+    def hexists(self, key: str, field: str) -> bool:
+        return field.encode() in self._hash(key)
+
+    def hincrby(self, key: str, field: str, amount: int) -> int:
+        values = self._hash(key)
+        value = int(values.get(field.encode(), b"0")) + amount
+        values[field.encode()] = str(value).encode()
+        return value
+
+    def hsetnx(self, key: str, field: str, value: bytes) -> int:
+        values = self._hash(key)
+        if field.encode() in values:
+            return 0
+        values[field.encode()] = value
+        return 1
+
+    def hget(self, key: str, field: str) -> bytes | None:
+        return self._hash(key).get(field.encode())
+
+    def hdel(self, key: str, field: str) -> int:
+        return 1 if self._hash(key).pop(field.encode(), None) is not None else 0
+
+    def hgetall(self, key: str) -> dict[bytes, bytes]:
+        self.hgetall_calls += 1
+        return dict(self._hash(key))
+
+    def hlen(self, key: str) -> int:
+        return len(self._hash(key))
+
+    def hmget(self, key: str, *fields: str) -> list[bytes | None]:
+        return [self._hash(key).get(field.encode()) for field in fields]
+
+    def expire(self, key: str, seconds: int) -> bool:
+        self.ttls[key] = seconds
+        return True
+
+    def delete(self, key: str) -> int:
+        return 1 if self.data.pop(key, None) is not None else 0
+
+    def set(self, key: str, value: bytes, ex: int | None = None) -> bool:
+        self.data[key] = value
+        if ex is not None:
+            self.ttls[key] = ex
+        return True
+
+    def get(self, key: str) -> bytes | None:
+        return self.data.get(key)  # type: ignore[return-value]
+
+    def getex(self, key: str, ex: int) -> bytes | None:
+        if key in self.data:
+            self.ttls[key] = ex
+        return self.data.get(key)  # type: ignore[return-value]
+
+
+def test_buffer_is_isolated_per_session_and_keeps_order(tmp_path: Path):
+    client = FakeRedis()
+    alice = RedisContextBufferRepository(client, "alice", 60, 1_000_000)  # type: ignore[arg-type]
+    bob = RedisContextBufferRepository(client, "bob", 60, 1_000_000)  # type: ignore[arg-type]
+    path = tmp_path / "a.py"
+    path.write_text("print('a')\n")
+    file_ = File.try_from_path(path).ok()
+    assert file_ is not None
+
+    alice.add_external_source(ExternalSource("https://x", "x" * 5000, False))
+    alice.add_file(file_)
+    alice.add_file(file_)
+    alice.add_snippet(Snippet(path, 1, 1, "print('a')\n"))
+
+    assert bob.is_empty()
+    assert alice.count_items() == 3
+    assert client.ttls["context-buffer:alice"] == 60
+    assert alice.get_files() == [file_]
+    assert alice.get_files()[0].content == "print('a')\n"
+    assert alice.get_external_sources()[0].content == "x" * 5000
+
+    assert alice.remove_snippet(path, 1, 1).is_ok()
+    assert alice.remove_snippet(path, 1, 1).is_err()
+    alice.clear()
+    assert alice.is_empty()
+
+
+def test_buffer_rejects_items_beyond_the_session_cap():
+    client = FakeRedis()
+    repo = RedisContextBufferRepository(client, "s", 60, 200)  # type: ignore[arg-type]
+    assert repo.add_external_source(ExternalSource("https://a", "a", False)).is_ok()
+    big = "".join(chr(0x4E00 + i) for i in range(2000))
+    assert repo.add_external_source(ExternalSource("https://b", big, False)).is_err()
+    assert [s.url for s in repo.get_external_sources()] == ["https://a"]
+
+    repo.remove_external_source("https://a")
+    assert repo.add_external_source(ExternalSource("https://c", "c", False)).is_ok()
+
+
+def test_prompt_round_trips_with_variables():
+    client = FakeRedis()
+    repo = RedisPromptRepository(client, "s", 60, 10_000)  # type: ignore[arg-type]
+    assert repo.get_prompt().ok() is None
+    prompt = Prompt.try_create("Explain {{code}}").ok()
+    assert prompt is not None
+    repo.set_prompt(prompt)
+    repo.set_prompt_variable("code", "x = 1")
+
+    stored = repo.get_prompt().ok()
+    assert stored is not None
+    assert stored.get_content() == "Explain {{code}}"
+    assert stored.full_text().ok() == "Explain x = 1"
+    assert client.ttls["prompt:s"] == 60
+
+
+def test_buffer_is_fetched_once_per_request_and_reads_renew_the_ttl(tmp_path: Path):
+    client = FakeRedis()
+    writer = RedisContextBufferRepository(client, "s", 60, 1_000_000)  # type: ignore[arg-type]
+    paths = [tmp_path / f"{name}.py" for name in "abc"]
+    for path in paths:
+        path.write_text("x = 1\n")
+    files = [File.try_from_path(path).ok() for path in paths]
+    assert writer.add_files([f for f in files if f is not None] * 2).ok() == 3
+
+    client.ttls["context-buffer:s"] = 5
+    reader = RedisContextBufferRepository(client, "s", 60, 1_000_000)  # type: ignore[arg-type]
+    calls = client.hgetall_calls
+    assert [f.path for f in reader.get_files()] == paths
+    assert reader.get_snippets() == [] and reader.get_external_sources() == []
+    assert reader.count_items() == 3
+    assert client.hgetall_calls == calls + 1
+    assert client.ttls["context-buffer:s"] == 60
+
+
+def test_add_files_is_all_or_nothing_when_the_session_is_full(tmp_path: Path):
+    client = FakeRedis()
+    repo = RedisContextBufferRepository(client, "s", 60, 150)  # type: ignore[arg-type]
+    files = [File(tmp_path / f"{i}.py", "x" * 40) for i in range(3)]
+    assert repo.add_files(files).is_err()
+    assert repo.is_empty()
+    assert repo.add_files(files[:1]).ok() == 1
+
+
+def test_memory_sessions_expire_and_are_capped():
+    store = InMemorySessionStore(ttl_seconds=3600, max_chars=10, max_sessions=2)
+    buffer, _ = store.get("alice")
+    assert store.get("alice")[0] is buffer
+    assert buffer.add_external_source(ExternalSource("u", "0123456789", False)).is_err()
+    assert buffer.add_external_source(ExternalSource("u", "01", False)).is_ok()
+
+    store.get("bob")
+    store.get("carol")
+    assert len(store) == 2
+    assert store.get("alice")[0] is not buffer
+
+    expiring = InMemorySessionStore(ttl_seconds=0, max_chars=10)
+    first, _ = expiring.get("alice")
+    assert expiring.get("alice")[0] is not first
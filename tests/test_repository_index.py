@@ -0,0 +1,53 @@
+from pathlib import Path
+from typing import Callable
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from codebase_to_llm.domain.repository_index import IndexSummary
+from codebase_to_llm.infrastructure.sqlite_repository_index import (
+    SqliteRepositoryIndex,
+)
+
+
+def test_index_refreshes_incrementally(
+    tmp_path: Path, write_old: Callable[[Path, str], None]
+):
+    root = tmp_path / "repo"
+    (root / "pkg").mkdir(parents=True)
+    write_old(root / "pkg" / "a.py", "def a():\n    return 1\n")
+    write_old(root / "pkg" / "b.py", "x = 1")
+    write_old(root / ".gitignore", "*.log\n")
+    write_old(root / "debug.log", "noise")
+    database = tmp_path / "index.sqlite3"
+
+    index = SqliteRepositoryIndex(root, database)
+    stats = index.refresh().ok()
+    assert stats is not None and (stats.files, stats.updated) == (3, 3)
+    files = {file_.path: file_ for file_ in index.files().ok() or []}
+    assert set(files) == {".gitignore", "pkg/a.py", "pkg/b.py"}
+    assert files["pkg/a.py"].line_count == 2
+    assert files["pkg/b.py"].line_count == 1
+    assert files["pkg/a.py"].token_estimate > 0
+    assert index.summary().ok() == IndexSummary(
+        3, sum(file_.token_estimate for file_ in files.values())
+    )
+
+    write_old(root / "pkg" / "b.py", "x = 2\ny = 3\n")
+    (root / ".gitignore").unlink()
+    index.close()
+
+    # A new session reads the previous state back from disk.
+    reopened = SqliteRepositoryIndex(root, database)
+    stats = reopened.refresh().ok()
+    assert stats is not None
+    assert (stats.files, stats.updated, stats.removed) == (3, 2, 1)
+    assert reopened.search_paths("B.PY").ok() == ["pkg/b.py"]
+    assert reopened.token_estimates(["pkg/b.py", "missing.py"]).ok() == {
+        "pkg/b.py": files["pkg/b.py"].token_estimate * 2
+    }
+
+    reopened.close()
+    assert reopened.refresh().is_err()
+    assert reopened.files().is_err()
+    assert reopened.summary().is_err()
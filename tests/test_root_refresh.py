@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+
+from codebase_to_llm.domain.root_refresh import (
+    BackgroundRefresh,
+    RootRegistry,
+    is_racy,
+)
+
+
+def test_registry_shares_one_instance_per_root_and_evicts_the_oldest(
+    tmp_path: Path,
+) -> None:
+    registry: RootRegistry[Path] = RootRegistry(lambda root: root, max_roots=2)
+    first = registry.get(tmp_path / "a")
+    assert registry.get(tmp_path / "a" / ".." / "a") is first
+    registry.get(tmp_path / "b")
+    registry.get(tmp_path / "a")
+    registry.get(tmp_path / "c")
+    assert registry.values() == [tmp_path / "a", tmp_path / "c"]
+
+
+def test_background_refresh_runs_once_and_waits_for_the_interval() -> None:
+    calls: list[int] = []
+    release = threading.Event()
+
+    def refresh() -> None:
+        release.wait(5)
+        calls.append(1)
+        background.mark_refreshed()
+
+    background = BackgroundRefresh(refresh, "test-refresh")
+    background.start(min_interval=60)
+    background.start(min_interval=60)
+    release.set()
+    deadline = time.monotonic() + 5
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    background.start(min_interval=60)
+    time.sleep(0.05)
+    assert calls == [1]
+
+
+def test_recent_mtimes_are_racy() -> None:
+    assert is_racy(time.time_ns())
+    assert not is_racy(time.time_ns() - 10_000_000_000)
+    assert not is_racy(time.time_ns(), racy_window_ns=0)
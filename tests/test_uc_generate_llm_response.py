@@ -1,5 +1,6 @@
 import pytest
 from pathlib import Path
+from types import SimpleNamespace
 from codebase_to_llm.application.ports import (
     ApiKeyRepositoryPort,
     ContextBufferPort,
@@ -9,8 +10,10 @@ from codebase_to_llm.application.ports import (
 )
 from codebase_to_llm.application.uc_generate_llm_response import (
     GenerateLLMResponseUseCase,
+    _collect_response,
 )
 from codebase_to_llm.domain.api_key import ApiKey, ApiKeys
+from codebase_to_llm.domain.llm import TokenUsage
 from codebase_to_llm.domain.model import Model, Models, ModelId
 from codebase_to_llm.infrastructure.filesystem_directory_repository import (
     FileSystemDirectoryRepository,
@@ -37,8 +40,8 @@ class TestGenerateLLMResponseUseCase:
 
         with (
             patch(
-                "codebase_to_llm.application.uc_generate_llm_response.get_full_context",
-                return_value=Ok("Just say Hello no more!"),
+                "codebase_to_llm.application.uc_generate_llm_response.iter_full_context",
+                return_value=Ok(iter(["Just say Hello no more!"])),
             ),
             patch.object(RulesRepository, "load_rules", return_value=Ok(Rules(()))),
         ):
@@ -118,3 +121,46 @@ class TestGenerateLLMResponseUseCase:
         response_generated = result.ok()
         assert response_generated is not None
         assert "Hello" in response_generated.response
+
+
+def test_stream_usage_reports_cached_tokens_for_both_providers():
+    openai_events = [
+        SimpleNamespace(type="response.output_text.delta", delta="Hel"),
+        SimpleNamespace(type="response.output_text.delta", delta="lo"),
+        SimpleNamespace(
+            type="response.completed",
+            response=SimpleNamespace(
+                usage=SimpleNamespace(
+                    input_tokens=1000,
+                    output_tokens=2,
+                    input_tokens_details=SimpleNamespace(cached_tokens=800),
+                )
+            ),
+        ),
+    ]
+    text, usage = _collect_response(openai_events)
+    assert text == "Hello"
+    assert usage == TokenUsage(1000, 2, 800)
+    assert usage.cache_hit_rate() == 0.8
+
+    anthropic_events = [
+        SimpleNamespace(
+            type="message_start",
+            message=SimpleNamespace(
+                id="msg_1",
+                usage=SimpleNamespace(
+                    input_tokens=50,
+                    output_tokens=1,
+                    cache_read_input_tokens=900,
+                    cache_creation_input_tokens=50,
+                ),
+            ),
+        ),
+        SimpleNamespace(
+            type="content_block_delta", delta=SimpleNamespace(text="Hello")
+        ),
+        SimpleNamespace(type="message_delta", usage=SimpleNamespace(output_tokens=3)),
+    ]
+    text, usage = _collect_response(anthropic_events)
+    assert text == "Hello"
+    assert usage == TokenUsage(1000, 3, 900, 50)